@@ -0,0 +1,239 @@
+"""
+Benchmarks for scale bar construction, rendering and I/O.
+
+Each case is timed phase by phase (SRS parse, dataset open, inverse
+projection, distance computation, geometry, drawing build and save) over
+a sweep of node counts, tick counts and symmetry.  Peak memory and output
+size are recorded alongside.  Results are written as JSON so that two runs,
+e.g. from different commits, can be compared:
+
+    python benchmarks/bench_scalebar.py -o new.json
+    python benchmarks/bench_scalebar.py --compare base.json new.json
+"""
+import argparse
+import io
+import itertools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scalebar.bar import bar, projections, writers
+from scalebar.bar.geometry import compute_geometry
+from scalebar.examples import get_path
+from scalebar.metadata import extract_metadata as emd
+
+WKT = {
+    'mercator': """PROJCS["Mercator_MARS",GEOGCS["GCS_MARS",DATUM["MARS",SPHEROID["MARS",3396190,169.8944472236118]],PRIMEM["Reference_Meridian",0],UNIT["Degree",0.017453292519943295]],PROJECTION["Mercator_1SP"],PARAMETER["central_meridian",0],PARAMETER["false_easting",0],PARAMETER["false_northing",0],UNIT["Meter",1],PARAMETER["latitude_of_origin",0.0]]""",
+    'polar_stereographic': """PROJCS["Mars_South_Pole_Stereographic",GEOGCS["Mars 2000",DATUM["D_Mars_2000",SPHEROID["Mars_2000_IAU_IAG",3396190.0,169.89444722361179]],PRIMEM["Greenwich",0],UNIT["Decimal_Degree",0.0174532925199433]],PROJECTION["Stereographic"],PARAMETER["False_Easting",0],PARAMETER["False_Northing",0],PARAMETER["Central_Meridian",0],PARAMETER["Scale_Factor",1],PARAMETER["Latitude_Of_Origin",-90],UNIT["Meter",1]]""",
+    'lambert': """PROJCS["Moon_Lambert_Conformal_Conic_AUTO",GEOGCS["Moon 2000",DATUM["D_Moon_2000",SPHEROID["Moon_2000_IAU_IAG",1737400.0,0.0]],PRIMEM["Greenwich",0],UNIT["Decimal_Degree",0.0174532925199433]],PROJECTION["Lambert_Conformal_Conic"],PARAMETER["False_Easting",0],PARAMETER["False_Northing",0],PARAMETER["Central_Meridian",0],PARAMETER["Standard_Parallel_1",43],PARAMETER["Standard_Parallel_2",73],PARAMETER["Latitude_Of_Origin",0],UNIT["Meter",1]]""",
+    'transverse_mercator': """PROJCS["Mars_Transverse_Mercator",GEOGCS["Mars 2000",DATUM["D_Mars_2000",SPHEROID["Mars_2000_IAU_IAG",3396190.0,169.89444722361179]],PRIMEM["Greenwich",0],UNIT["Decimal_Degree",0.0174532925199433]],PROJECTION["Transverse_Mercator"],PARAMETER["False_Easting",0],PARAMETER["False_Northing",0],PARAMETER["Central_Meridian",0],PARAMETER["Scale_Factor",0.9996],PARAMETER["Latitude_Of_Origin",30],UNIT["Meter",1]]""",
+    'equirectangular': """PROJCS["Mars_Equidistant_Cylindrical",GEOGCS["Mars 2000",DATUM["D_Mars_2000",SPHEROID["Mars_2000_IAU_IAG",3396190.0,169.89444722361179]],PRIMEM["Greenwich",0],UNIT["Decimal_Degree",0.0174532925199433]],PROJECTION["Equidistant_Cylindrical"],PARAMETER["False_Easting",0],PARAMETER["False_Northing",0],PARAMETER["Central_Meridian",180],PARAMETER["Standard_Parallel_1",30],UNIT["Meter",1]]""",
+}
+
+#Projection string cases, (projection, extent, keyword arguments)
+PROJSTRING_CASES = [('mercator', (0, 0, 180, 65), {}),
+                    ('polar_stereographic', (0, -90, 180, -40), {'cliplat': -90}),
+                    ('lambert', (33.25, 36, 60, 78.11), {}),
+                    ('transverse_mercator', (0, 0, 10, 30), {}),
+                    ('equirectangular', (0, 0, 180, 30), {})]
+
+IMAGE_CASES = ['Mars_MGS_MOLA_ClrShade_MAP2_90.0N0.0_POLA.tif',
+               'Lunar_LRO_LOLA_Shade_MAP2_90.0N20.0_LAMB.tif',
+               'MOLA128Hillshade_Mercator_test.tif']
+
+TICKS = {3: ([25, 50], [12.5]),
+         7: ([25, 50, 75, 100], [12.5, 37.5, 62.5])}
+
+def image_reader():
+    """
+    Return the gdalio module, or None, with a note on stderr, when GDAL is
+    not installed and the image cases are skipped.
+    """
+    try:
+        from scalebar.fileio import gdalio
+    except ImportError as e:
+        print('Skipping the image cases: {}'.format(e), file=sys.stderr)
+        return None
+    return gdalio
+
+def timeit(func, repeat):
+    """
+    Run func repeat times, returning the minimum wall time in seconds
+    and the result of the last call.
+    """
+    best = float('inf')
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def peakmemory(func):
+    """
+    Return the peak traced Python allocation, in bytes, of a call to func.
+    """
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def bench_case(name, srs, extent, latlon, kwargs, repeat, outdir):
+    """
+    Time each phase of building, rendering and saving one scale bar.
+    """
+    params = emd.get_parameters(srs)
+    nnodes = kwargs.get('nnodes', 51)
+    phases = {}
+
+    (xmin, ymin, xmax, ymax) = extent
+    y = np.linspace(ymin, ymax, nnodes)
+    if latlon:
+        lat = y
+    else:
+        phases['inverse_projection'], (lon, lat) = timeit(
+            lambda: params.proj(np.full(nnodes, xmin, dtype=float), y, inverse=True), repeat)
+    kernel = projections.get_kernel(params.name)
+    if kernel.anchor is not None:
+        lat = projections.resample(lat, kernel.anchor(params))
+    phases['distance'], _ = timeit(lambda: kernel.scale(lat, params), repeat)
+
+    geomkwargs = {k: v for k, v in kwargs.items() if k not in ('symmetrical',)}
+    phases['geometry'], _ = timeit(lambda: compute_geometry(params, extent, latlon=latlon, **geomkwargs), repeat)
+
+    s = bar.ScaleBar(params, extent, latlon=latlon, **kwargs)
+    phases['build_drawing'], dwg = timeit(lambda: s.draw(writers.SvgwriteWriter()), repeat)
+    outputname = os.path.join(outdir, name + '.svg')
+    phases['save'], _ = timeit(lambda: dwg.saveas(outputname), repeat)
+
+    def stream():
+        f = io.StringIO()
+        s.draw(writers.StreamWriter(f))
+        return f
+    phases['stream'], _ = timeit(stream, repeat)
+
+    def total():
+        bar.ScaleBar(params, extent, latlon=latlon, outputname=outputname, **kwargs)
+    phases['total'], _ = timeit(total, repeat)
+
+    return {'name': name,
+            'phases': phases,
+            'peak_memory': peakmemory(total),
+            'output_size': os.path.getsize(outputname)}
+
+def sweep(nnodes, ticks, repeat):
+    """
+    Generate benchmark records for every case over the parameter sweep.
+    """
+    outdir = tempfile.mkdtemp()
+    try:
+        for record in _sweep(nnodes, ticks, repeat, outdir):
+            yield record
+    finally:
+        shutil.rmtree(outdir)
+
+def _sweep(nnodes, ticks, repeat, outdir):
+    gdalio = image_reader()
+    for (n, t, symmetrical) in itertools.product(nnodes, ticks, (True, False)):
+        major, minor = TICKS[t]
+        kwargs = {'nnodes': n, 'lon_major_ticks': major, 'lon_minor_ticks': minor,
+                  'symmetrical': symmetrical}
+        suffix = 'n{}_t{}_{}'.format(n, t, 'sym' if symmetrical else 'asym')
+
+        for proj, extent, extra in PROJSTRING_CASES:
+            emd.projection_parameters.cache_clear()
+            parse, srs = timeit(lambda: emd.projection_parameters(WKT[proj]), 1)
+            kw = dict(kwargs, **extra)
+            record = bench_case('{}_{}'.format(proj, suffix), srs, extent, True, kw, repeat, outdir)
+            record['phases']['srs_parse'] = parse
+            record.update(kw)
+            yield record
+
+        for image in IMAGE_CASES if gdalio is not None else []:
+            path = get_path(image)
+            if not os.path.exists(path):
+                continue
+            emd.projection_parameters.cache_clear()
+            opentime, header = timeit(lambda: gdalio.read_header(path), repeat)
+            parse, srs = timeit(lambda: emd.projection_parameters(header.projection, backend='osr'), 1)
+            e = header.extent
+            extent = (e[0][0], e[0][1], e[1][0], e[1][1])
+            record = bench_case('{}_{}'.format(os.path.splitext(image)[0], suffix), srs, extent,
+                                False, kwargs, repeat, outdir)
+            record['phases']['open'] = opentime
+            record['phases']['srs_parse'] = parse
+            record.update(kwargs)
+            yield record
+
+def revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(base, new, threshold):
+    """
+    Print the per-phase ratio of new to base timings, flagging any that
+    regressed by more than threshold.  Returns the number of regressions.
+    """
+    with open(base, 'r') as f:
+        base = {r['name']: r for r in json.load(f)['results']}
+    with open(new, 'r') as f:
+        new = {r['name']: r for r in json.load(f)['results']}
+
+    nregressions = 0
+    for name in sorted(set(base) & set(new)):
+        for phase, t in sorted(new[name]['phases'].items()):
+            b = base[name]['phases'].get(phase)
+            if not b:
+                continue
+            ratio = t / b
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = '  REGRESSION'
+                nregressions += 1
+            print('{:60s} {:20s} {:8.3f}x{}'.format(name, phase, ratio, flag))
+    return nregressions
+
+def parseargs():
+    parser = argparse.ArgumentParser(description='Scale bar benchmarks')
+    parser.add_argument('-o', dest='output', default='bench_scalebar.json', help='JSON results file.')
+    parser.add_argument('-n', dest='nnodes', type=int, nargs='+', default=[51, 1001, 10001], help='Node counts to sweep.')
+    parser.add_argument('-t', dest='ticks', type=int, nargs='+', default=[3, 7], choices=sorted(TICKS), help='Tick counts to sweep.')
+    parser.add_argument('-r', dest='repeat', type=int, default=3, help='Repetitions per phase; the minimum is kept.')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), help='Compare two results files instead of running.')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Fractional slow down reported as a regression.')
+    return parser.parse_args()
+
+def main():
+    args = parseargs()
+    if args.compare:
+        sys.exit(1 if compare(args.compare[0], args.compare[1], args.threshold) else 0)
+
+    results = []
+    for record in sweep(args.nnodes, args.ticks, args.repeat):
+        print('{name:60s} {total:8.4f}s {output_size:10d}B {peak_memory:12d}B'.format(
+            total=record['phases']['total'], **record))
+        results.append(record)
+
+    with open(args.output, 'w') as f:
+        json.dump({'revision': revision(),
+                   'python': platform.python_version(),
+                   'numpy': np.__version__,
+                   'results': results}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
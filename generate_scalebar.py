@@ -1,14 +1,67 @@
 import argparse
 import os
+import sys
+import threading
 
-from scalebar.bar import bar
+#The scale bar modules load GDAL, pyproj, numpy and svgwrite, so they are
+#imported once the arguments have been parsed and the mode is known.
 
-def parseargs():
+def joinextents(argv):
+    """
+    Attach -e/--extent values that start with a minus sign, e.g.
+    -e -90,0,180,-40, to their flag as --extent=-90,0,180,-40, so that
+    they are not mistaken for options.
+    """
+    joined = []
+    args = iter(argv)
+    for arg in args:
+        if arg in ('-e', '--extent'):
+            value = next(args, None)
+            if value is not None and value.startswith('-') and value[1:2] in '0123456789.':
+                joined.append('--extent=' + value)
+                continue
+            joined.append(arg)
+            if value is not None:
+                joined.append(value)
+            continue
+        joined.append(arg)
+    return joined
+
+def parseextent(value):
+    """
+    Parse one -e value, either a single number or a comma separated extent.
+    """
+    return [float(v) for v in value.replace(',', ' ').split()]
+
+def groupextents(values):
+    """
+    Group the parsed -e values into extents.  Four single number values,
+    e.g. -e 0 -e 0 -e 180 -e 65, form one extent; otherwise each value
+    must be a complete extent, e.g. -e 0,0,30,65 -e 0,65,30,90.
+    """
+    if values and all(len(v) == 1 for v in values):
+        values = [[v[0] for v in values]]
+    for v in values:
+        if len(v) != 4:
+            raise ValueError('An extent needs four values, (minlat, minlon, maxlat, maxlon), got {}'.format(v))
+    return values
+
+def seriesnames(outputname, n):
+    """
+    Output names for a map series, formatting the index into outputname
+    if it contains a {} field, otherwise suffixing it, e.g. bar_3.svg.
+    """
+    if '{' in outputname:
+        return [outputname.format(i) for i in range(n)]
+    root, ext = os.path.splitext(outputname)
+    return ['{}_{}{}'.format(root, i, ext) for i in range(n)]
+
+def parseargs(argv=None):
     """
     Parse command line arguments.
     """
     parser = argparse.ArgumentParser(description='Latitude dependent scalebar generation')
-    parser.add_argument('-e', '--extent', action='append', dest='extent', default=[],help='If providing a projection string, an extent in the form (minlat, minlon, maxlat, maxlon) is also required.')
+    parser.add_argument('-e', '--extent', action='append', type=parseextent, dest='extent', default=[],help='If providing a projection string, an extent in the form (minlat, minlon, maxlat, maxlon) is also required.  Repeat with comma separated extents, e.g. -e 0,0,30,65 -e -90,0,-65,30, to generate a map series with one scale bar per extent.')
     parser.add_argument('-L', action='append', dest='lon_major_ticks', default=[25, 50, 75], help='Distance(s) at which major ticks are to be drawn and labeled.')
     parser.add_argument('-l', action='append', dest='lon_minor_ticks', default=[12.5], help='Distance(s) at which minor ticks are to be drawn, but not labeled.')
     parser.add_argument('-n', action='store', type=int, dest='nnodes', default=51, help='Number of nodes at which to draw verticals.  More nodes results in smoother plots.')
@@ -17,23 +70,175 @@ def parseargs():
     parser.add_argument('-m', action='store', type=float, dest='mapscale', default=1/1e6, help='Map scale in fractional form, e.g. 1/1000000')
     parser.add_argument('-t', action='store', type=float, dest='height', default=4.0, help='Scalebar height in cm.')
     parser.add_argument('-f', action='store', type=float, dest='fontsize', default=12.0, help='Font size.')
-    parser.add_argument('inputds', action='store', help='Either a projected image, or a projection string')
-    parser.add_argument('outputname', action='store', help='The output file name')    
+    parser.add_argument('-b', '--batch', action='store', dest='manifest', default=None, help='A CSV or JSON lines manifest of jobs to run in parallel.  Each job provides an inputds, an outputname, an extent for projection strings, and any other scale bar options.')
+    parser.add_argument('-j', action='store', type=int, dest='processes', default=None, help='Number of worker processes used in batch mode.  Defaults to the number of CPUs.')
+    parser.add_argument('-r', '--retries', action='store', type=int, dest='retries', default=0, help='Number of times a failed batch job is retried.')
+    parser.add_argument('--crawl', action='store_true', dest='crawl', default=False, help='Treat inputds as a directory tree of rasters and outputname as the directory their scale bars are written to.  Rasters with the same projection and extent share one scale bar and reruns only process changed files.')
+    parser.add_argument('--sheet', action='store_true', dest='sheet', default=False, help='Write all of the scale bars of a map series to a single sheet.')
+    parser.add_argument('--preview', action='store', type=int, dest='preview_size', default=None, metavar='PIXELS', help='Embed a thumbnail of the input image, at most PIXELS along its longest side, next to the scale bar.  The thumbnail is read from the image overviews, or by a decimated read, never at full resolution.')
+    parser.add_argument('--precision', action='store', type=float, dest='precision', default=None, metavar='CM', help='Write minified output with coordinates quantized to CM, e.g. 0.001.')
+    parser.add_argument('--max-bytes', action='store', type=int, dest='max_bytes', default=None, metavar='N', help='Fail, rather than write a scale bar larger than N bytes.')
+    parser.add_argument('--cache', action='store', dest='cache', default=None, help='A directory in which rendered scale bars are cached and reused across runs.')
+    parser.add_argument('--profile', action='store', nargs='?', const='-', dest='profile', default=None, metavar='JSON', help='Report the time and peak Python allocations of each phase, summed over all jobs in batch mode.  The breakdown is printed, or written as JSON to the given file, e.g. --profile=stats.json.')
+    parser.add_argument('--serve', action='store', dest='serve', default=None, metavar='[HOST:]PORT', help='Run a local HTTP scale bar service on the given port instead of generating a single scale bar.')
+    parser.add_argument('inputds', action='store', nargs='?', help='Either a projected image, or a projection string')
+    parser.add_argument('outputname', action='store', nargs='?', help='The output file name')    
     
-    return parser.parse_args()
+    args = parser.parse_args(joinextents(sys.argv[1:] if argv is None else argv))
+    if args.manifest is None and args.serve is None and (args.inputds is None or args.outputname is None):
+        parser.error('inputds and outputname are required unless a batch manifest or --serve is given')
+    if (args.manifest is None and args.serve is None and not args.crawl and not args.extent and
+            not os.path.exists(args.inputds)):
+        parser.error('a projection string requires -e/--extent')
+    if args.profile is not None and args.crawl:
+        parser.error('--profile is not supported in crawl mode')
+    try:
+        args.extent = groupextents(args.extent)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+def writeprofile(stats, profile):
+    """
+    Print the phase breakdown, or write it as JSON if profile is a file name.
+    """
+    if profile == '-':
+        print(stats.report())
+    else:
+        with open(profile, 'w') as f:
+            f.write(stats.to_json(indent=2))
+
+def runbatch(manifest, processes=None, retries=0, cache=None, profile=None):
+    """
+    Run all jobs in a manifest, reporting the status of each job as it completes.
+    Returns the exit status, 1 if any job failed, 2 if the manifest has an
+    invalid job and 130 if interrupted.
+    """
+    from scalebar.batch import batch
+    from scalebar.utils.stats import Stats
+    cancel = threading.Event()
+    nfailed = 0
+    interrupted = False
+    stats = Stats(memory=True) if profile is not None else None
+    results = batch.run_batch(batch.read_manifest(manifest), processes=processes,
+                              retries=retries, cancel=cancel, cache=cache, stats=stats)
+    n = 0
+    while True:
+        try:
+            for result in results:
+                n += 1
+                if result.status != 'success':
+                    nfailed += 1
+                msg = '[{}] job {} {}: {}'.format(n, result.index, result.status,
+                                                  result.job.get('outputname'))
+                if result.error is not None:
+                    msg += ' ({!r})'.format(result.error)
+                print(msg)
+            break
+        except KeyboardInterrupt:
+            #Stop submitting, then report the cancelled and the draining jobs.
+            #run_batch re-raises an interrupt once it has reported every job.
+            interrupted = True
+            cancel.set()
+        except ValueError as e:
+            #An invalid manifest line stops the batch once the running jobs finish
+            print('invalid manifest: {}'.format(e))
+            return 2
+    if stats is not None:
+        writeprofile(stats, profile)
+    if interrupted:
+        print('interrupted')
+        return 130
+    return 1 if nfailed else 0
+
+def runcrawl(directory, outputdir, processes=None, **options):
+    """
+    Crawl a raster tree, reporting what was rendered, linked and skipped.
+    """
+    from scalebar.batch import crawl
+    options = {k: v for k, v in options.items() if v is not None}
+    result = crawl.crawl(directory, outputdir, max_workers=processes, **options)
+    for path, error in result.failed:
+        print('failed {}: {!r}'.format(path, error))
+    print('{} rendered, {} linked, {} unchanged, {} failed'.format(len(result.rendered), len(result.linked),
+                                                                  len(result.unchanged), len(result.failed)))
+    return len(result.failed)
 
 def main():
     """
     Program Main
     """
     kwargs = vars(parseargs())
+    manifest = kwargs.pop('manifest')
+    processes = kwargs.pop('processes')
+    retries = kwargs.pop('retries')
+    cache = kwargs.pop('cache')
+    address = kwargs.pop('serve')
+    if address is not None:
+        from scalebar.service import server
+        host, _, port = address.rpartition(':')
+        print('Serving scale bars on http://{}:{}/scalebar'.format(host or '127.0.0.1', port))
+        try:
+            server.serve(host or '127.0.0.1', int(port))
+        except KeyboardInterrupt:
+            pass
+        return
+    if manifest is not None:
+        sys.exit(runbatch(manifest, processes=processes, retries=retries, cache=cache,
+                          profile=kwargs.pop('profile')))
+    if kwargs.pop('crawl'):
+        for k in ('extent', 'sheet', 'preview_size', 'profile'):
+            kwargs.pop(k)
+        sys.exit(1 if runcrawl(kwargs.pop('inputds'), kwargs.pop('outputname'), processes, **kwargs) else 0)
+
+    from scalebar.bar import bar
+    from scalebar.bar.cache import ScaleBarCache
+    from scalebar.utils.stats import Stats
+
+    if cache is not None:
+        kwargs['cache'] = ScaleBarCache(cache)
+    profile = kwargs.pop('profile')
+    if profile is not None:
+        kwargs['stats'] = Stats(memory=True)
     ds = kwargs.pop('inputds')
-    extent = kwargs.pop('extent')
-    
-    if os.path.exists(ds):
-        bar.ScaleBar.from_image(ds, **kwargs)
+    extents = kwargs.pop('extent')
+    sheet = kwargs.pop('sheet')
+    preview_size = kwargs.pop('preview_size')
+    if preview_size is not None and (len(extents) > 1 or sheet or not os.path.exists(ds)):
+        sys.exit('--preview requires a single input image')
+
+    if len(extents) > 1 or sheet:
+        #Map series, all of the extents share the projection
+        backend = None
+        if os.path.exists(ds):
+            from scalebar.fileio import gdalio
+            ds = gdalio.read_header(ds).projection
+            backend = 'osr'
+        outputname = kwargs.pop('outputname')
+        outputnames = None if sheet else seriesnames(outputname, len(extents))
+        bars = bar.ScaleBar.from_series(ds, extents, outputnames=outputnames, backend=backend,
+                                        **kwargs)
+        if sheet:
+            from scalebar.bar.sheet import Sheet
+            s = Sheet()
+            s.extend(bars)
+            s.save(outputname)
+    elif os.path.exists(ds):
+        bar.ScaleBar.from_image(ds, preview_size=preview_size, **kwargs)
     else:
-        bar.ScaleBar.from_projstring(ds, extent, **kwargs)  
+        bar.ScaleBar.from_projstring(ds, extents[0], **kwargs)
+
+    if profile is not None:
+        writeprofile(kwargs['stats'], profile)
 
 if __name__ == '__main__':
-    main()
+    try:
+        try:
+            main()
+        finally:
+            sys.stdout.flush()
+    except BrokenPipeError:
+        #The reader of stdout, e.g. head after --profile, exited early.  Point
+        #stdout at devnull so that the flush at exit does not raise again.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
@@ -1,5 +1,15 @@
-from . import examples
-from . import bar
-from . import metadata
-from . import fileio
-from . import utils
+import importlib
+
+#Subpackages are imported on first access so that importing scalebar, e.g. to
+#parse command line arguments, does not load GDAL, pyproj, numpy or svgwrite.
+__all__ = ['examples', 'bar', 'metadata', 'fileio', 'utils', 'batch', 'service']
+
+def __getattr__(name):
+    if name in __all__:
+        module = importlib.import_module('.' + name, __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
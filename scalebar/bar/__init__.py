@@ -1 +1,25 @@
-from .bar import ScaleBar
+import importlib
+
+#Names are imported from their modules on first access, as in the scalebar
+#package, so that importing one module, e.g. scalebar.bar.writers, does not
+#load numpy, pyproj or the asyncio machinery of the others.
+_modules = {'ScaleBar': 'bar',
+            'compute_geometry': 'geometry',
+            'compute_series': 'geometry',
+            'ScaleBarGeometry': 'geometry',
+            'ScaleBarCache': 'cache',
+            'Sheet': 'sheet',
+            'AsyncScaleBars': 'aio',
+            'ScaleBarBuilder': 'builder'}
+
+__all__ = list(_modules)
+
+def __getattr__(name):
+    if name in _modules:
+        value = getattr(importlib.import_module('.' + _modules[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
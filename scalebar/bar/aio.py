@@ -0,0 +1,131 @@
+import asyncio
+import functools
+from concurrent import futures
+
+from scalebar.bar.bar import ScaleBar
+
+class AsyncScaleBars(object):
+    """
+    asyncio counterparts of the ScaleBar constructors and of rendering,
+    for services running on an event loop.
+
+    Opening datasets, parsing and morphing spatial references, computing
+    the geometry and drawing all block, so they run on a bounded thread
+    pool while the loop keeps serving other handlers.  Output is written
+    from the pool, or to an asyncio stream, without blocking the loop.
+
+    Parameters
+    ----------
+    max_workers : int
+                  The number of threads in the pool (Default: the
+                  ThreadPoolExecutor default)
+
+    max_concurrency : int
+                      The maximum number of scale bars being built or
+                      rendered at once.  Further requests wait their turn
+                      on the loop (Default: max_workers, if given, else
+                      unlimited)
+
+    timeout : float
+              Seconds after which a request raises asyncio.TimeoutError
+              (Default: None, no timeout).  A timed out stage is abandoned,
+              but its thread runs to completion.
+
+    executor : object
+               A concurrent.futures executor to use in place of an owned
+               thread pool.  It is not shut down by close().
+    """
+    def __init__(self, max_workers=None, max_concurrency=None, timeout=None, executor=None):
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency if max_concurrency is not None else max_workers
+        self._owned = executor is None
+        self.executor = executor if executor is not None else futures.ThreadPoolExecutor(max_workers)
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Shut down the owned thread pool, without waiting for running stages
+        """
+        if self._owned:
+            self.executor.shutdown(wait=False)
+
+    async def _run(self, func, *args, **kwargs):
+        if self.max_concurrency is not None and self._semaphore is None:
+            #Created on first use so that it belongs to the running loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+        if self._semaphore is None:
+            return await asyncio.wait_for(loop.run_in_executor(self.executor, call), self.timeout)
+        async with self._semaphore:
+            return await asyncio.wait_for(loop.run_in_executor(self.executor, call), self.timeout)
+
+    async def _finish(self, scalebar, outputname):
+        if outputname is not None:
+            await self.save(scalebar, outputname)
+        return scalebar
+
+    async def from_image(self, datasource, **kwargs):
+        """
+        Asynchronous ScaleBar.from_image.  If an outputname is given the
+        scale bar is saved with save().
+
+        Returns
+        -------
+         : object
+           ScaleBar
+        """
+        outputname = kwargs.pop('outputname', None)
+        scalebar = await self._run(ScaleBar.from_image, datasource, **kwargs)
+        return await self._finish(scalebar, outputname)
+
+    async def from_projstring(self, projstring, extent, **kwargs):
+        """
+        Asynchronous ScaleBar.from_projstring.  If an outputname is given
+        the scale bar is saved with save().
+
+        Returns
+        -------
+         : object
+           ScaleBar
+        """
+        outputname = kwargs.pop('outputname', None)
+        scalebar = await self._run(ScaleBar.from_projstring, projstring, extent, **kwargs)
+        return await self._finish(scalebar, outputname)
+
+    async def render(self, scalebar):
+        """
+        Render a scale bar to memory
+
+        Returns
+        -------
+         : bytes
+           The UTF-8 encoded SVG document
+        """
+        return await self._run(scalebar.tobytes)
+
+    async def save(self, scalebar, outputname):
+        """
+        Render a scale bar and write it out
+
+        Parameters
+        ----------
+        scalebar : object
+                   A ScaleBar
+
+        outputname : str or object
+                     Name of the output file, written from the thread pool,
+                     or an asyncio StreamWriter, which is written to and
+                     drained on the loop
+        """
+        if isinstance(outputname, asyncio.StreamWriter):
+            outputname.write(await self.render(scalebar))
+            await outputname.drain()
+        else:
+            await self._run(scalebar.save, outputname)
@@ -1,18 +1,21 @@
 # -*- coding: utf-8 -*-
 
-import itertools
-import math
+import codecs
+import io
 import sys
 
 import numpy as np
-import pyproj
-import svgwrite as svg
-from svgwrite import cm
 
 from scalebar.examples import get_path
-from scalebar.fileio import gdalio
-from scalebar.utils import util
 from scalebar.metadata import extract_metadata as emd
+from scalebar.bar import writers
+from scalebar.bar.writers import cm, PX_PER_CM
+from scalebar.bar.geometry import compute_geometry, compute_series, _columns, _freeze
+from scalebar.utils import png
+from scalebar.utils.stats import phase
+
+#The file save() writes to if no outputname has been given
+DEFAULT_OUTPUTNAME = 'scalebar.svg'
 
 class ScaleBar():
 
@@ -20,13 +23,15 @@ class ScaleBar():
     Parameters
     ----------
     spatialreference : object
-                       A OSR spatial reference object.
+                       A OSR spatial reference object or a
+                       ProjectionParameters record.
     extent : iterable
              An iterable in the form (xmin, ymin, xmax, ymax) or
              (latmin, lonmin, latmax, lonmax)
 
     nnodes : int
-             The number of nodes used to create smoother lines
+             The number of nodes used to create smoother lines.  With a
+             tolerance, the number of candidates the nodes are chosen from.
 
     cliplat : float
               The latitude at which the scale bar reflects, e.g. the equator
@@ -56,230 +61,359 @@ class ScaleBar():
               The total padding around the scale bar used for label space, etc.
               Padding is added to each edge.
 
-    outputnamne : str
-                  Name of the output file.  This can be a full path.
+    outputname : str or object
+                 Name of the output file.  This can be a full path or any
+                 writable file-like object.  If given,
+                 the scale bar is rendered and saved on construction.  Otherwise
+                 rendering is deferred until render() or save() is called.
 
     latlon : boolean
+             If True the extent is in latitude and longitude
+
+    polyline : boolean
+               If True, each vertical curve is drawn as a single polyline
+               instead of one line element per pair of nodes (Default: False)
+
+    tolerance : float
+                If given, nodes are placed adaptively so that the curves are
+                drawn within tolerance cm of the nnodes sample curve, e.g. 0.001.
+                The scale factor is then only evaluated where the curves bend.
+
+    writer : str
+             The backend used by save(), either 'svgwrite' (Default), which
+             builds a validated document tree, or 'stream', which writes
+             each element straight to the file without validation.
+
+    precision : float
+                If given, output is minified with the MinifiedWriter: the
+                document is drawn in a cm viewBox and coordinates are
+                quantized to precision cm, e.g. 0.001.  Overrides writer.
+
+    max_bytes : int
+                If given, writing output larger than max_bytes raises a
+                ValueError reporting the size, and nothing is written
+
+    cache : object
+            A ScaleBarCache.  If given, rendered output is looked up in and
+            added to the cache, so an unchanged scale bar is copied rather
+            than rendered again.  The key is computed on construction from
+            the parameters alone and the geometry only on a miss.
+
+    stats : object
+            A scalebar.utils.stats.Stats object into which the time spent in
+            each phase (projection parameters, geometry, drawing, saving, ...)
+            is recorded (Default: None, no instrumentation)
+
+    geometry : object
+               A precomputed ScaleBarGeometry for this extent and these
+               parameters, e.g. from compute_series, used in place of
+               computing one
+
+    preview : ndarray
+              An 8 bit (rows, columns) or (rows, columns, channels) image,
+              e.g. from GeoDataSet.read_preview, embedded as a PNG thumbnail
+              to the right of the scale bar and scaled to its height
 
     Attributes
     ----------
+    geometry : object
+               ScaleBarGeometry namedtuple holding the node, tick and
+               label positions
+
+    latlon_bounds : tuple
+                    ((minlat, minlon), (maxlat, maxlon))
+
+    name : str
+           The projection name
+
+    coords, mask, y, minlat, minlon, maxlat, maxlon
+        Read-only views kept for compatibility with the attributes earlier
+        versions set on construction.  They are derived from the geometry,
+        or from the sampled vertical, on first access.
 
     """
     def __init__(self, spatialreference, extent, nnodes=51, cliplat=0.0, lat_tick_interval=5, mapscale=1000000,
                 lon_minor_ticks=[12.5], lon_major_ticks=[25, 50, 75],
-                symmetrical=True, height = 4.0, fontsize=12, padding=1.0, outputname='scalebar.svg',
-                latlon=False):
-
-        nnodes = self._checknnodes(nnodes)
+                symmetrical=True, height = 4.0, fontsize=12, padding=1.0, outputname=None,
+                latlon=False, polyline=False, writer='svgwrite', tolerance=None, cache=None, stats=None, geometry=None,
+                preview=None, precision=None, max_bytes=None):
 
         self.fontsize = fontsize
         self.height = height
-        self.nnodes = nnodes
         self.outputname = outputname
         self.padding = padding
+        self.symmetrical = symmetrical
+        self.polyline = polyline
+        self.writer = writer
         self._dwg = None
-        self.spatialreference = spatialreference.__str__()
+        self.stats = stats
+        self.preview = preview
+        self.precision = precision
+        self.max_bytes = max_bytes
+        with phase(stats, 'parameters'):
+            params = emd.get_parameters(spatialreference)
+        self.spatialreference = params.srs.__str__()
         self.mapscale = 1/float(mapscale)
+        self.name = params.name
+
+        #The geometry is computed on first use, so a cache hit skips it
+        self._geometry = geometry
+        self._params = params
+        self._extent = extent
+        self._options = dict(nnodes=nnodes, cliplat=cliplat, lat_tick_interval=lat_tick_interval,
+                             mapscale=mapscale, lon_minor_ticks=lon_minor_ticks,
+                             lon_major_ticks=lon_major_ticks, height=height, latlon=latlon,
+                             tolerance=tolerance)
+
+        self.cache = cache
+        if cache is not None:
+            self.cachekey = cache.key(params, extent, symmetrical=symmetrical, fontsize=fontsize,
+                                      padding=padding, polyline=polyline, precision=precision,
+                                      preview=png.data_uri(preview) if preview is not None else None,
+                                      **self._options)
+
+        if outputname is not None:
+            self.save()
+
+    @property
+    def geometry(self):
+        """
+        The ScaleBarGeometry, computed on first access
+        """
+        if self._geometry is None:
+            with phase(self.stats, 'geometry'):
+                self._geometry = compute_geometry(self._params, self._extent, stats=self.stats,
+                                                  **self._options)
+        return self._geometry
+
+    @property
+    def nnodes(self):
+        return len(self.geometry.y)
+
+    @property
+    def latlon_bounds(self):
+        return self.geometry.latlon_bounds
+
+    def _column(self):
+        #The sampled vertical, (y, lat) before clipping, as earlier versions kept it
+        if getattr(self, '_vertical', None) is None:
+            extents = np.asarray(self._extent, dtype=float).reshape(-1, 4)
+            y, lat, _ = _columns(self._params, extents, self._options['nnodes'],
+                                 self._options['latlon'], None)
+            self._vertical = (y[0], lat[0])
+        return self._vertical
+
+    @property
+    def coords(self):
+        """
+        (nnodes, 2) x and y of the sampled nodes along the vertical
+        """
+        y = self._column()[0]
+        coords = np.empty((len(y), 2))
+        coords[:, 0] = self._extent[0]
+        coords[:, 1] = y
+        return _freeze(coords)
+
+    @property
+    def mask(self):
+        """
+        (nnodes,) boolean, True where a node is not clipped by cliplat
+        """
+        return _freeze(self._column()[1] >= self._options['cliplat'])
 
-        (xmin, ymin, xmax, ymax) = extent
-        projstr = spatialreference.ExportToProj4()
-        semimajor = spatialreference.GetSemiMajor()
-        semiminor = spatialreference.GetSemiMinor()
-
-        self.name = emd.get_projection_name(spatialreference)
-        parallels = emd.get_standard_parallels(spatialreference)
-
-        #Create proj4 projection
-        proj = pyproj.Proj(projstr)
-        #Setup start and stop nodes
-
-        self.coords = np.empty((nnodes, 2))
-        self.coords[:,0] = xmin
-        self.coords[:,1] = np.linspace(ymin, ymax, self.nnodes)
+    @property
+    def y(self):
+        return self.geometry.y
 
+    @property
+    def minlat(self):
+        return self.latlon_bounds[0][0]
 
-        if latlon:
-            #This is intentionally inverting lat/lon to match how GDAL returns image extents
-            lat = self.coords[:,1]
-            lon = np.empty(len(lat))
-            lon[:] = xmin
-        else:
-            #Convert to pixel grid to latlon grid
-            lon, lat =  proj(self.coords[:,0], self.coords[:,1], inverse=True)
+    @property
+    def minlon(self):
+        return self.latlon_bounds[0][1]
 
+    @property
+    def maxlat(self):
+        return self.latlon_bounds[1][0]
 
-        self.minlat = np.min(lat)
-        self.minlon = np.min(lon)
-        self.maxlat = np.max(lat)
-        self.maxlon = np.max(lon)
+    @property
+    def maxlon(self):
+        return self.latlon_bounds[1][1]
 
-        self.latlon_bounds = ((self.minlat, self.minlon),
-                              (self.maxlat, self.maxlon))
-        #Parallels
-        if parallels[0] >= lat[0] and parallels[0] <= lat[1]:
-            p = parallels[0]
-        else:
-            p = parallels[1]
+    def render(self):
+        """
+        Render the scale bar geometry into an SVG drawing.  The drawing
+        is built once and cached.
 
-        if 'Transverse_Mercator' in self.name:
+        Returns
+        -------
+        dwg : object
+              svgwrite Drawing
+        """
+        if self._dwg is None:
+            with phase(self.stats, 'draw'):
+                self._dwg = self.draw(writers.SvgwriteWriter(self.outputname))
+        return self._dwg
 
-            clat = emd.get_latitude_of_origin(spatialreference)
-            clon = emd.get_central_meridian(spatialreference)
+    def save(self, outputname=None):
+        """
+        Render the scale bar, if needed, and write it out.
 
-            if clat > 0:
-                self.coords[:,1] = lat = np.linspace(np.min(lat), clat, self.nnodes)
+        Parameters
+        ----------
+        outputname : str or object
+                     Name of the output file or a writable file-like object.
+                     Defaults to the outputname the scale bar was created with,
+                     or to scalebar.svg.
+        """
+        if outputname is not None:
+            self.outputname = outputname
+        if self.outputname is None:
+            self.outputname = DEFAULT_OUTPUTNAME
+        with phase(self.stats, 'save'):
+            if hasattr(self.outputname, 'write'):
+                self.write(self.outputname)
+            elif self.max_bytes is not None:
+                #Render first so that no file is left behind if it is over budget
+                data = self.tobytes()
+                with open(self.outputname, 'wb') as f:
+                    f.write(data)
+            elif self.cache is not None and self.cache.copy(self.cachekey, self.outputname):
+                return
             else:
-                self.coords[:,1] = lat = np.linspace(np.max(lat), clat, self.nnodes)
+                with open(self.outputname, 'w', encoding='utf-8') as f:
+                    self.write(f)
 
-            distance = np.empty(len(lat))
-            k_naught = emd.get_scale_factor(spatialreference)
-            for i, l in enumerate(lat):
-                B = math.cos(math.radians(clon)) * math.sin(math.radians(clat) - math.radians(l))
-                distance[i] = k_naught / math.sqrt(1.0 - B ** 2.0)
-            distance = distance[::-1]
-            self.mask = self.coords[:,1] >= cliplat
+    def write(self, fileobj):
+        """
+        Write the scale bar to a text or binary file-like object using the
+        configured writer backend.  Binary streams receive UTF-8.
 
-        elif 'Mercator' in self.name:
-            self.mask = lat >= cliplat
-            distance = 1.0 / np.cos(np.radians(lat[self.mask]))
-            distance = distance[::-1]
+        Parameters
+        ----------
+        fileobj : object
+                  A writable file-like object
+        """
+        binary = isinstance(fileobj, (io.RawIOBase, io.BufferedIOBase)) or 'b' in getattr(fileobj, 'mode', '')
+        if self.cache is not None or self.max_bytes is not None:
+            data = self.cache.get(self.cachekey) if self.cache is not None else None
+            if data is None:
+                f = io.BytesIO()
+                self._write(codecs.getwriter('utf-8')(f))
+                data = f.getvalue()
+                if self.cache is not None:
+                    self.cache.put(self.cachekey, data)
+            if self.max_bytes is not None and len(data) > self.max_bytes:
+                raise ValueError('The scale bar is {} bytes, over the budget of {} bytes.'.format(len(data), self.max_bytes))
+            fileobj.write(data if binary else data.decode('utf-8'))
+            return
+        if binary:
+            fileobj = codecs.getwriter('utf-8')(fileobj)
+        self._write(fileobj)
+
+    def _write(self, fileobj):
+        if self.precision is not None:
+            with phase(self.stats, 'draw'):
+                self.draw(writers.MinifiedWriter(fileobj, self.precision))
+        elif self.writer == 'stream':
+            with phase(self.stats, 'draw'):
+                self.draw(writers.StreamWriter(fileobj))
+        else:
+            self.render().write(fileobj)
 
-        #elif 'Sinusoidal' in self.name:
+    def tobytes(self):
+        """
+        Render the scale bar to memory
 
-        elif (('Equirectangular' in self.name) or ('Equidistant_Cylindrical' in self.name) \
-              or ('Plate_Carree' in self.name) or ('Simple_Cylindrical' in self.name)):
+        Returns
+        -------
+         : bytes
+           The UTF-8 encoded SVG document
+        """
+        f = io.BytesIO()
+        self.write(f)
+        return f.getvalue()
 
-            p1 = parallels[0]
-            clon = emd.get_central_meridian(spatialreference)
+    def draw(self, writer):
+        """
+        Emit the scale bar, in document order, to a writer backend.
 
-            if p1 > 0:
-                self.coords[:,1] = lat = np.linspace(np.min(lat), p1, self.nnodes)
-            else:
-                self.coords[:,1] = lat = np.linspace(np.max(lat), p1, self.nnodes)
-
-            distance = np.empty(len(lat))
-            for i, l in enumerate(lat):
-                distance[i] = math.cos(math.radians(p1))/math.cos(math.radians(l))
-            distance = distance[::-1]
-            self.mask = self.coords[:,1] >= cliplat
-
-        elif 'Lambert_Conformal' in self.name:
-            self.mask = lat >= cliplat
-            parallels.sort()
-
-            p1 = math.radians(parallels[0])
-            p2 = math.radians(parallels[1])
-
-            cp1 = math.cos(p1)
-            cp2 = math.cos(p2)
-            n = np.log(cp1 / cp2) / np.log( math.tan((math.pi / 4) + (math.radians(parallels[1] / 2))) / math.tan((math.pi / 4) + (math.radians(parallels[0] / 2)) ))
-            num = cp1 * np.tan(math.pi / 4 + math.radians(parallels[0] / 2)) ** n
-            den = np.cos(np.radians(lat)) * np.tan(math.pi / 4 + np.radians(lat / 2.0)) ** n
-            distance = num / den
-            distance = distance[::-1]
-
-        elif 'Stereographic' in self.name:
-            clat = emd.get_latitude_of_origin(spatialreference)
-            clon = emd.get_central_meridian(spatialreference)
-
-            if clat > 0:
-                self.coords[:,1] = lat = np.linspace(np.min(lat), clat, self.nnodes)
-            else:
-                self.coords[:,1] = lat = np.linspace(np.max(lat), clat, self.nnodes)
-            distance = np.empty(len(lat))
-            k_naught = emd.get_scale_factor(spatialreference)
-            for i, l in enumerate(lat):
-                distance[i] = (2 * k_naught) / (1.0 + math.sin(math.radians(clat)) * math.sin(math.radians(l)) +\
-                            math.cos(math.radians(clat))*math.cos(math.radians(l))*math.cos(math.radians(180 - clon)))
-            distance = distance[::-1]
-            self.mask = self.coords[:,1] >= cliplat
-
-
-        lon_major_ticks = list(map(lambda x: x * 1000, lon_major_ticks)) #km to m
-        lon_minor_ticks = list(map(lambda x: x * 1000, lon_minor_ticks))
-
-        ticks = lon_major_ticks + lon_minor_ticks
-        ticks.sort()
-        ticks = ticks[::-1]
-
-        south = False
-        if lat[0] > lat[-1]:
-            south = True
-
-        #Vertical distance line logic
-        for l in ticks:
-            line_coords = ((l * 100) *  self.mapscale) * distance
-            if self._dwg == None:
-                length = np.max(line_coords)
-                size = (length * 2, self.height)
-                self.createdrawing(size)
-                if symmetrical == True:
-                    size = list(size)
-                    size[0] /= 2
-                    size = tuple(size)
-                self.createvertical(size)
-
-                #Check hemisphere
-                if south == True:
-                    ytext = self.y[0]
-                else:
-                    ytext = self.y[-1]
-
-                #Label the vertical
-                center = (size[0]  + self.padding)* 0.995 # Offset left for font size
-                dist = self._dwg.text('0', (center * cm, (ytext + self.padding * 1.3) * cm))
-                self._dwg.add(dist)
-
-            nodes = list(zip(line_coords[::-1] + size[0], self.y[::-1]))
-            for i, start in enumerate(nodes[:-1]):
-                coords = self._pad_and_convert(start, nodes[i + 1])
-                self.drawline(coords, group=self.vertical)
-                if i == 0 and l in lon_major_ticks:
-                    dist = self._dwg.text('{}km'.format(l / 1000), (coords[0][0], (ytext  + self.padding * 1.3) * cm))
-                    self._dwg.add(dist)
-            if symmetrical:
-                nline_coords = (line_coords * -1)
-                nodes = list(zip(nline_coords[::-1] + size[0], self.y[::-1]))
-                for i, start in enumerate(nodes[:-1]):
-                    coords = self._pad_and_convert(start, nodes[i + 1])
-                    self.drawline(coords, group=self.vertical)
-                    if i == 0 and l in lon_major_ticks:
-                        dist = self._dwg.text('{}km'.format(l / 1000), (coords[0][0], (ytext +self.padding * 1.3) * cm ))
-                        self._dwg.add(dist)
-
-
-        #Compute the latrange and labels
-        latrange = lat[self.mask]
-        if latrange[0] > latrange[-1]: #Ghetto monotonic check for southern hemisphere...
-            ticks = np.arange(util.integerround(latrange[-2]), latrange[0] + lat_tick_interval, lat_tick_interval)
-        else:
-            ticks = np.arange(util.integerround(latrange[0] + lat_tick_interval) ,latrange[-2], lat_tick_interval)
-        ticks = labels = np.hstack((round(latrange[0], 1), ticks, round(latrange[-1], 1)))
-        horizontal_ticks = self._dwg.add(self._dwg.g(id='horizontal_tick', stroke='black'))
-        #Compute the y coordinate values in scalebar space
-        horizontals = self.height / (np.max(ticks) - np.min(ticks)) *(ticks - np.min(ticks))
-        horizontals = np.abs(horizontals - self.height)
-        for i, h in enumerate(horizontals):
-            x = [(size[0] + self.padding) * cm, (size[0] * 2 + self.padding) * cm]
-            y = [(h + self.padding)  * cm] * 2
-            xy = list(zip(x, y))
-            line = self._dwg.line(start=xy[0], end=xy[1])
-            horizontal_ticks.add(line)
-            if i % 2 == 0:
-                ytext = y[1]
-                lat = self._dwg.text(u'{}\u00b0'.format(labels[i]), ((size[0] * 2 + 1.0) * cm, ytext))
-                self.text.add(lat)
+        Parameters
+        ----------
+        writer : object
+                 A writer from scalebar.bar.writers
 
-            if symmetrical:
-                x = [self.padding * cm, (size[0] + self.padding) * cm]
-                xy = list(zip(x, y))
-                line = self._dwg.line(start=xy[0], end=xy[1])
-                horizontal_ticks.add(line)
-                if i % 2 == 0:
-                    lat = self._dwg.text(u'{}\u00b0'.format(labels[i]), (0.0 * cm, y[1]))
-                    self.text.add(lat)
+        Returns
+        -------
+         : object
+           The result of writer.end()
+        """
+        geom = self.geometry
+        size = (np.max(geom.offsets[0]) * 2, self.height)
+        width = size[0] + self.padding * 2
+        if self.preview is not None:
+            rows, columns = np.shape(self.preview)[:2]
+            thumbnail = (size[1] * columns / float(rows), size[1])
+            width += thumbnail[0] + self.padding
+        writer.start((width * cm, (size[1] + self.padding * 2) * cm))
+        barwidth = size[0]
+        if self.symmetrical == True:
+            size = (size[0] / 2, size[1])
+
+        #Latitude labels
+        writer.group(font_size=self.fontsize)
+        for i, h in enumerate(geom.lat_ticks):
+            if i % 2 == 0:
+                y = (h + self.padding) * cm
+                writer.text(u'{}\u00b0'.format(geom.lat_labels[i]), ((size[0] * 2 + 1.0) * cm, y))
+                if self.symmetrical:
+                    writer.text(u'{}\u00b0'.format(geom.lat_labels[i]), (0.0 * cm, y))
+        writer.end_group()
+
+        #The vertical and the distance curves
+        if self.polyline and writer.units == 'cm':
+            writer.group(id='vertical', stroke='black', fill='none')
+        elif self.polyline:
+            #Points cannot carry units, so polylines are drawn in cm and scaled to user units
+            writer.group(id='vertical', stroke='black', fill='none',
+                         stroke_width=1 / PX_PER_CM, transform='scale({})'.format(PX_PER_CM))
+        else:
+            writer.group(id='vertical', stroke='black')
+        self.drawcurves(writer, *self.curves(size[0]))
+        writer.end_group()
 
-        self._dwg.save()
+        #Check hemisphere
+        if geom.south == True:
+            ytext = geom.y[0]
+        else:
+            ytext = geom.y[-1]
+        ytext = (ytext + self.padding * 1.3) * cm
+
+        #Label the vertical and the major ticks
+        center = (size[0]  + self.padding)* 0.995 # Offset left for font size
+        writer.text('0', (center * cm, ytext))
+        for l, major, line_coords in zip(geom.ticks, geom.major, geom.offsets):
+            if not major:
+                continue
+            writer.text('{}km'.format(l / 1000), ((line_coords[-1] + size[0] + self.padding) * cm, ytext))
+            if self.symmetrical:
+                writer.text('{}km'.format(l / 1000), ((line_coords[-1] * -1 + size[0] + self.padding) * cm, ytext))
+
+        #Latitude ticks
+        writer.group(id='horizontal_tick', stroke='black')
+        for h in geom.lat_ticks:
+            y = (h + self.padding)  * cm
+            writer.line(((size[0] + self.padding) * cm, y), ((size[0] * 2 + self.padding) * cm, y))
+            if self.symmetrical:
+                writer.line((self.padding * cm, y), ((size[0] + self.padding) * cm, y))
+        writer.end_group()
+
+        if self.preview is not None:
+            writer.image(png.data_uri(self.preview),
+                         ((barwidth + self.padding * 3) * cm, self.padding * cm),
+                         (thumbnail[0] * cm, thumbnail[1] * cm))
+        return writer.end()
 
     @classmethod
     def from_image(cls, datasource, **kwargs):
@@ -288,12 +422,30 @@ class ScaleBar():
 
         Parameters
         -----------
-        datasource : str
-                     Path to the datasource
+        datasource : str or object
+                     Path to the datasource or a GeoHeader snapshot of it
+
+        preview_size : int
+                       If given, a thumbnail of the datasource, at most
+                       preview_size pixels along its longest side, is read
+                       from the overviews or by a decimated read and
+                       embedded next to the scale bar
 
         """
-        ds = gdalio.GeoDataSet(datasource)
-        srs = ds.spatialreference
+        from scalebar.fileio import gdalio
+        stats = kwargs.get('stats')
+        preview_size = kwargs.pop('preview_size', None)
+        if isinstance(datasource, gdalio.GeoHeader):
+            ds = datasource
+        else:
+            ds = gdalio.read_header(datasource, stats=stats)
+        if preview_size is not None:
+            dataset = gdalio.GeoDataSet(ds.filename, stats=stats)
+            kwargs['preview'] = dataset.read_preview(preview_size)
+            dataset.ds = None
+        #Opened rasters keep the OSR ESRI morphing round trip of the GDAL path
+        with phase(stats, 'srs_parse'):
+            srs = emd.projection_parameters(ds.projection, backend='osr')
         packed_extent = ds.extent
         if 'extent' in kwargs.keys():
             extent = kwargs['extent']
@@ -319,42 +471,92 @@ class ScaleBar():
         extent : tuple
                  in the form (minlat, minlon, maxlat, maxlon)
         """
-        srs = emd.extract_projstring(projstring)
+        with phase(kwargs.get('stats'), 'srs_parse'):
+            srs = emd.projection_parameters(projstring)
         return cls(srs, extent, latlon=True, **kwargs)
 
-    def createdrawing(self, size):
-        xsize = (size[0] + self.padding * 2) * cm
-        ysize = (size[1] + self.padding * 2) * cm
-        self._dwg = svg.Drawing(self.outputname, size=(xsize, ysize), debug=True)
-        self.text = self._dwg.add(self._dwg.g(font_size=self.fontsize))
-        self.vertical = self._dwg.add(self._dwg.g(id='vertical', stroke='black'))
-
-    def createvertical(self, size):
-        y = self.coords[:, 1][self.mask]
-        #Rescale coordinates to scalebar space
-        y = self.height / (np.max(y) - np.min(y)) *(y - np.min(y))
-        ny = len(y)
-
-        self.y = y
-        #Draw the line(s)
-        center = size[0]
-        nodes = list(itertools.zip_longest([center], y, fillvalue=center))
-        for i, start in enumerate(nodes[:-1]):
-            coords = self._pad_and_convert(start, nodes[i + 1])
-            self.drawline(coords, group=self.vertical)
-
-    def drawline(self, coords, group=None):
-        line = self._dwg.line(start=coords[0], end=coords[1])
-        group.add(line)
-
-    def _pad_and_convert(self, *args):
-        formatted = []
-        for i, a in enumerate(args):
-            coords = list(a)
-            formatted.append(tuple(map(lambda x: (x + self.padding) * cm, coords)))
-        return formatted
-
-    def _checknnodes(self, nnodes):
-        if nnodes % 2 == 0:
-            nnodes += 1
-        return nnodes
+    @classmethod
+    def from_series(cls, projstring, extents, outputnames=None, backend=None, **kwargs):
+        """
+        Constructor that generates one scalebar per extent of a map series,
+        e.g. a quadrangle scheme, sharing one projection.  The geometry of
+        all of the scale bars is computed in a single vectorized pass.
+
+        Parameters
+        ----------
+        projstring : str
+                     OSR supported projection string, i.e. WKT, ESRI WKT, proj4
+
+        extents : iterable
+                  of extents in the form (minlat, minlon, maxlat, maxlon)
+
+        outputnames : iterable
+                      Output file names, one per extent.  If omitted, the
+                      scale bars are not saved.
+
+        backend : str
+                  The metadata backend used to parse projstring, e.g. 'osr'
+                  for the projection of an opened raster
+
+        Returns
+        -------
+         : list
+           of ScaleBar objects
+        """
+        stats = kwargs.get('stats')
+        with phase(stats, 'srs_parse'):
+            srs = emd.projection_parameters(projstring, backend=backend)
+        geomkwargs = {k: kwargs[k] for k in ('nnodes', 'cliplat', 'lat_tick_interval', 'mapscale',
+                                             'lon_minor_ticks', 'lon_major_ticks', 'height',
+                                             'tolerance') if k in kwargs}
+        extents = [tuple(e) for e in extents]
+        with phase(stats, 'geometry'):
+            geometries = compute_series(srs, extents, latlon=True, stats=stats, **geomkwargs)
+        if outputnames is None:
+            outputnames = [None] * len(extents)
+        return [cls(srs, extent, latlon=True, geometry=geometry, outputname=outputname, **kwargs)
+                for extent, geometry, outputname in zip(extents, geometries, outputnames)]
+
+    def curves(self, center):
+        """
+        Lay out the vertical and every tick curve, on each side, as one
+        broadcast array computation.
+
+        Parameters
+        ----------
+        center : float
+                 The x position, in cm, of the vertical
+
+        Returns
+        -------
+        x, y : ndarray
+               (curves, nodes) positions in scale bar space, without
+               padding.  The vertical comes first, followed by each tick,
+               largest first, right and then, if symmetrical, left.
+        """
+        geom = self.geometry
+        sides = np.array([1, -1] if self.symmetrical else [1], dtype=float)
+        #(ticks, sides, nodes), with the tick curves drawn from the far end of the vertical
+        ticks = sides[np.newaxis, :, np.newaxis] * geom.offsets[:, np.newaxis, ::-1] + center
+        x = np.vstack((np.full((1, len(geom.y)), center), ticks.reshape(-1, len(geom.y))))
+        y = np.vstack((geom.y, np.tile(geom.y[::-1], (len(x) - 1, 1))))
+        return x, y
+
+    def drawcurves(self, writer, x, y):
+        """
+        Draw curves through the (curves, nodes) arrays x and y, in scale bar
+        space, either as one polyline per curve or as one line element per
+        pair of nodes.  Padding is added to the whole arrays at once, while
+        units are applied, and lines written, one curve at a time so that
+        streamed output is produced in bounded memory.
+        """
+        x = x + self.padding
+        y = y + self.padding
+        if self.polyline:
+            for points in np.stack((x, y), axis=-1).tolist():
+                writer.polyline(points)
+            return
+        for cx, cy in zip(x, y):
+            cx = np.char.mod('%scm', cx).tolist()
+            cy = np.char.mod('%scm', cy).tolist()
+            writer.lines(cx[:-1], cy[:-1], cx[1:], cy[1:])
@@ -0,0 +1,201 @@
+import numpy as np
+
+from scalebar.bar.bar import ScaleBar
+from scalebar.bar import geometry
+from scalebar.metadata import extract_metadata as emd
+from scalebar.utils.stats import phase
+
+#The memoized stages, in order, and the parameters each one depends on.
+#Every stage also depends on all of the stages before it.
+STAGES = (('srs', ('spatialreference',)),
+          ('column', ('extent', 'nnodes', 'latlon')),
+          ('distance', ()),
+          ('layout', ('cliplat', 'lat_tick_interval', 'mapscale', 'lon_minor_ticks',
+                      'lon_major_ticks', 'height', 'tolerance')),
+          ('drawing', ('symmetrical', 'fontsize', 'padding', 'polyline', 'writer', 'preview',
+                       'precision', 'max_bytes')))
+
+DEFAULTS = {'nnodes': 51, 'cliplat': 0.0, 'lat_tick_interval': 5, 'mapscale': 1000000,
+            'lon_minor_ticks': (12.5,), 'lon_major_ticks': (25, 50, 75), 'symmetrical': True,
+            'height': 4.0, 'fontsize': 12, 'padding': 1.0, 'latlon': False, 'polyline': False,
+            'writer': 'svgwrite', 'tolerance': None, 'preview': None, 'precision': None,
+            'max_bytes': None}
+
+def _same(a, b):
+    if a is b:
+        return True
+    try:
+        return bool(np.array_equal(a, b))
+    except Exception:
+        return False
+
+class ScaleBarBuilder(object):
+    """
+    A mutable scale bar for interactive tuning.  Each stage of building a
+    scale bar is memoized:
+
+    - srs: parsing the projection
+    - column: sampling, and inverse projecting, the latitude column
+    - distance: the scale factor along the column
+    - layout: clipping, tick curves and latitude labels
+    - drawing: the rendered SVG document
+
+    Changing a parameter, by assignment or update(), recomputes only the
+    stages downstream of it.  For example a new fontsize is only redrawn
+    and new ticks or a new mapscale reuse the distance curve.
+
+    Parameters
+    ----------
+    spatialreference : object
+                       A projection string, an OSR spatial reference object
+                       or a ProjectionParameters record
+
+    extent : iterable
+             An iterable in the form (xmin, ymin, xmax, ymax) or
+             (latmin, lonmin, latmax, lonmax)
+
+    stats : object
+            A Stats object recording the phases of the computed stages
+
+    All other keyword arguments are ScaleBar parameters, e.g. fontsize.
+
+    Attributes
+    ----------
+    computed : list
+               The names of the stages computed, in order, since the
+               builder was created
+    """
+    def __init__(self, spatialreference, extent, stats=None, **kwargs):
+        unknown = set(kwargs) - set(DEFAULTS)
+        if unknown:
+            raise TypeError('Unknown scale bar parameters: {}'.format(', '.join(sorted(unknown))))
+        object.__setattr__(self, '_stages', {})
+        object.__setattr__(self, 'stats', stats)
+        object.__setattr__(self, 'computed', [])
+        params = dict(DEFAULTS, spatialreference=spatialreference, extent=extent)
+        params.update(kwargs)
+        for name, value in params.items():
+            object.__setattr__(self, name, self._coerce(name, value))
+
+    @staticmethod
+    def _coerce(name, value):
+        #Sequences are copied so that they cannot be changed behind the builder's back
+        if name in ('lon_minor_ticks', 'lon_major_ticks', 'extent'):
+            return tuple(value)
+        return value
+
+    def __setattr__(self, name, value):
+        if name in ('spatialreference', 'extent') or name in DEFAULTS:
+            self.update(**{name: value})
+        else:
+            object.__setattr__(self, name, value)
+
+    def update(self, **kwargs):
+        """
+        Change one or more parameters, invalidating the stages that depend
+        on them
+        """
+        first = len(STAGES)
+        for name, value in kwargs.items():
+            stage = self._stage_of(name)
+            value = self._coerce(name, value)
+            if _same(getattr(self, name), value):
+                continue
+            object.__setattr__(self, name, value)
+            first = min(first, stage)
+        for stage, _ in STAGES[first:]:
+            self._stages.pop(stage, None)
+        return self
+
+    @staticmethod
+    def _stage_of(name):
+        for i, (stage, names) in enumerate(STAGES):
+            if name in names:
+                return i
+        raise TypeError('Unknown scale bar parameter: {}'.format(name))
+
+    def _memoize(self, stage, compute):
+        if stage not in self._stages:
+            self._stages[stage] = compute()
+            self.computed.append(stage)
+        return self._stages[stage]
+
+    @property
+    def params(self):
+        """
+        The ProjectionParameters of the spatial reference
+        """
+        def compute():
+            with phase(self.stats, 'srs_parse'):
+                if isinstance(self.spatialreference, str):
+                    return emd.projection_parameters(self.spatialreference)
+                return emd.get_parameters(self.spatialreference)
+        return self._memoize('srs', compute)
+
+    @property
+    def column(self):
+        """
+        The (y, lat, latlon_bounds) of the nodes along the vertical
+        """
+        def compute():
+            extents = np.asarray(self.extent, dtype=float).reshape(-1, 4)
+            y, lat, bounds = geometry._columns(self.params, extents, self.nnodes, self.latlon,
+                                               self.stats)
+            return y[0], lat[0], bounds[0]
+        return self._memoize('column', compute)
+
+    @property
+    def distance(self):
+        """
+        The scale factor of the projection at each node
+        """
+        return self._memoize('distance', lambda: geometry._distance(self.params, self.column[1],
+                                                                    self.stats))
+
+    @property
+    def geometry(self):
+        """
+        The ScaleBarGeometry
+        """
+        def compute():
+            y, lat, bounds = self.column
+            return geometry._layout(y, lat, self.distance, bounds, self.cliplat,
+                                    self.lat_tick_interval, self.mapscale,
+                                    list(self.lon_minor_ticks), list(self.lon_major_ticks),
+                                    self.height, self.tolerance, self.stats)
+        return self._memoize('layout', compute)
+
+    @property
+    def scalebar(self):
+        """
+        A ScaleBar built from the current geometry
+        """
+        return ScaleBar(self.params, self.extent, nnodes=self.nnodes, cliplat=self.cliplat,
+                        lat_tick_interval=self.lat_tick_interval, mapscale=self.mapscale,
+                        lon_minor_ticks=list(self.lon_minor_ticks),
+                        lon_major_ticks=list(self.lon_major_ticks), symmetrical=self.symmetrical,
+                        height=self.height, fontsize=self.fontsize, padding=self.padding,
+                        latlon=self.latlon, polyline=self.polyline, writer=self.writer,
+                        tolerance=self.tolerance, geometry=self.geometry, preview=self.preview,
+                        precision=self.precision, max_bytes=self.max_bytes, stats=self.stats)
+
+    def tobytes(self):
+        """
+        Render the scale bar to memory
+
+        Returns
+        -------
+         : bytes
+           The UTF-8 encoded SVG document
+        """
+        return self._memoize('drawing', lambda: self.scalebar.tobytes())
+
+    def save(self, outputname):
+        """
+        Write the scale bar to a file or a writable binary file-like object
+        """
+        if hasattr(outputname, 'write'):
+            outputname.write(self.tobytes())
+        else:
+            with open(outputname, 'wb') as f:
+                f.write(self.tobytes())
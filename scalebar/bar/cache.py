@@ -0,0 +1,233 @@
+import errno
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from scalebar.metadata import extract_metadata as emd
+
+#Bump when the rendered output changes so that stale entries are not reused
+CACHE_VERSION = 1
+
+def signature(spatialreference, extent, **kwargs):
+    """
+    Compute the signature of a scale bar, a hash of its normalized
+    spatial reference, extent and options.  Scale bars with the same
+    signature are identical.
+
+    Parameters
+    ----------
+    spatialreference : object
+                       A OSR spatial reference object or a
+                       ProjectionParameters record
+
+    extent : iterable
+             The scale bar extent
+
+    kwargs : dict
+             The remaining ScaleBar parameters
+
+    Returns
+    -------
+     : str
+       The hex digest
+    """
+    params = emd.get_parameters(spatialreference)
+    record = dict(kwargs)
+    record['srs'] = emd.normalize_projstring(str(params.srs))
+    record['extent'] = [float(v) for v in extent]
+    record['version'] = CACHE_VERSION
+    canonical = json.dumps(record, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+class ScaleBarCache(object):
+    """
+    A content-addressed, size bounded, on-disk cache of rendered scale bars.
+
+    Entries are keyed on a SHA-256 hash of the normalized spatial reference
+    and every parameter that affects the output.  Writes go to a temporary
+    file that is atomically renamed into place, so any number of processes
+    can share one cache directory.  Reads refresh an entry's modification
+    time and, once the cache grows beyond maxbytes, the least recently
+    used entries are evicted.
+
+    The size of the cache is walked once, on the first write, and then
+    kept as a running total of this object's writes, so a write costs a
+    walk of the cache only when it takes the total over maxbytes.  Other
+    processes sharing the directory are picked up by walking again every
+    resync writes.
+
+    Parameters
+    ----------
+    directory : str
+                The cache directory, created if it does not exist
+
+    maxbytes : int
+               The size the cache is trimmed to once a write takes it over
+               (Default: 256 MiB)
+
+    resync : int
+             The number of writes after which the running total is
+             recomputed from the directory (Default: 128)
+    """
+    def __init__(self, directory, maxbytes=256 * 2 ** 20, resync=128):
+        self.directory = directory
+        self.maxbytes = maxbytes
+        self.resync = resync
+        #The running size of the cache, None until it has been walked
+        self._total = None
+        self._writes = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, spatialreference, extent, **kwargs):
+        """
+        Compute the cache key of a scale bar, see signature
+        """
+        return signature(spatialreference, extent, **kwargs)
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.svg')
+
+    def _touch(self, path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def get(self, key):
+        """
+        Get a cached scale bar
+
+        Parameters
+        ----------
+        key : str
+              The cache key
+
+        Returns
+        -------
+         : bytes
+           The SVG document or None if the key is not cached
+        """
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except (IOError, OSError):
+            return None
+        self._touch(path)
+        return data
+
+    def copy(self, key, outputname):
+        """
+        Copy a cached scale bar to a file
+
+        Parameters
+        ----------
+        key : str
+              The cache key
+
+        outputname : str
+                     The destination file name
+
+        Returns
+        -------
+         : bool
+           True if the key was cached and copied
+        """
+        path = self.path(key)
+        try:
+            shutil.copyfile(path, outputname)
+        except (IOError, OSError) as e:
+            #A concurrent eviction is a miss, anything else is a real error
+            if e.errno != errno.ENOENT or os.path.exists(path):
+                raise
+            return False
+        self._touch(path)
+        return True
+
+    def put(self, key, data):
+        """
+        Atomically add a scale bar to the cache and evict entries
+        if the write takes the cache over size.
+
+        Parameters
+        ----------
+        key : str
+              The cache key
+
+        data : bytes
+               The SVG document
+        """
+        path = self.path(key)
+        dirname = os.path.dirname(path)
+        os.makedirs(dirname, exist_ok=True)
+        try:
+            replaced = os.stat(path).st_size
+        except OSError:
+            replaced = 0
+        fd, tmp = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            self._writes += 1
+            if self._total is not None and self._writes % self.resync:
+                self._total += len(data) - replaced
+                if self._total <= self.maxbytes:
+                    return
+        self.evict()
+
+    def entries(self):
+        """
+        List the cache entries as (mtime, size, path) tuples,
+        least recently used first.
+        """
+        entries = []
+        for root, dirs, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.svg'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return sorted(entries)
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache is no
+        larger than maxbytes, and resynchronize the running total.
+        """
+        entries = self.entries()
+        total = sum(size for mtime, size, path in entries)
+        for mtime, size, path in entries:
+            if total <= self.maxbytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+        with self._lock:
+            self._total = total
+
+    def clear(self):
+        for mtime, size, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._total = 0
@@ -0,0 +1,347 @@
+import collections
+
+import numpy as np
+
+from scalebar.bar import projections
+from scalebar.utils import util
+from scalebar.utils.stats import phase
+from scalebar.metadata import extract_metadata as emd
+
+ScaleBarGeometry = collections.namedtuple('ScaleBarGeometry',
+                                          ['y', 'ticks', 'major', 'offsets',
+                                           'lat_ticks', 'lat_labels',
+                                           'latlon_bounds', 'height', 'south'])
+ScaleBarGeometry.__doc__ = """
+Immutable, array backed scale bar geometry.  All distances are in cm
+in scale bar space, without padding.
+
+Attributes
+----------
+y : ndarray
+    (nnodes,) y position of each node along the vertical
+
+ticks : ndarray
+        (nticks,) tick distances in meters, largest first
+
+major : ndarray
+        (nticks,) boolean, True where the tick is labeled
+
+offsets : ndarray
+          (nticks, nnodes) x offset of each tick curve from the vertical
+          at each node
+
+lat_ticks : ndarray
+            y position of each latitude tick
+
+lat_labels : ndarray
+             latitude, in degrees, of each latitude tick
+
+latlon_bounds : tuple
+                ((minlat, minlon), (maxlat, maxlon))
+
+height : float
+         The height of the scale bar
+
+south : bool
+        True if the nodes run from north to south
+"""
+
+def _freeze(arr):
+    arr = np.asarray(arr)
+    arr.flags.writeable = False
+    return arr
+
+def _checknnodes(nnodes):
+    if nnodes % 2 == 0:
+        nnodes += 1
+    return nnodes
+
+def adaptive_nodes(y, x, tolerance):
+    """
+    Select the nodes of a curve needed to draw it within a tolerance.
+    Intervals are recursively split at the node that deviates most from
+    the straight line between its ends, so nodes are only added where
+    the curve bends.
+
+    Parameters
+    ----------
+    y : ndarray
+        (n,) monotonic node positions
+
+    x : ndarray
+        (n,) curve value at each node
+
+    tolerance : float
+                The maximum allowed deviation, in the units of x, of the
+                dropped nodes from the simplified curve
+
+    Returns
+    -------
+     : ndarray
+       sorted indices of the nodes to keep, always including both ends
+    """
+    keep = np.zeros(len(y), dtype=bool)
+    keep[[0, -1]] = True
+    intervals = [(0, len(y) - 1)]
+    while intervals:
+        i, j = intervals.pop()
+        if j - i < 2:
+            continue
+        t = (y[i + 1:j] - y[i]) / (y[j] - y[i])
+        error = np.abs(x[i + 1:j] - (x[i] + t * (x[j] - x[i])))
+        k = np.argmax(error)
+        if error[k] > tolerance:
+            k += i + 1
+            keep[k] = True
+            intervals.extend([(i, k), (k, j)])
+    return np.flatnonzero(keep)
+
+def refine_nodes(y, f, tolerance, ninitial=9):
+    """
+    Sample a curve from a coarse grid, evaluating it only where it is
+    needed.  Starting from ninitial evenly spaced nodes, the midpoint of
+    every interval is evaluated and, if it deviates from the chord by more
+    than the tolerance, the interval is split.  Each round of midpoints is
+    evaluated with one call of f.
+
+    Parameters
+    ----------
+    y : ndarray
+        (n,) monotonic candidate node positions
+
+    f : callable
+        Taking an array of indices into y and returning the curve value at
+        those nodes
+
+    tolerance : float
+                The maximum allowed deviation, in the units of f, of an
+                interval midpoint from the chord
+
+    ninitial : int
+               The number of nodes of the coarse grid
+
+    Returns
+    -------
+    nodes : ndarray
+            sorted indices of the evaluated nodes, always including both ends
+
+    values : ndarray
+             the curve value at each of those nodes
+    """
+    n = len(y)
+    values = np.full(n, np.nan)
+    evaluated = np.zeros(n, dtype=bool)
+    nodes = np.unique(np.linspace(0, n - 1, min(ninitial, n)).round().astype(int))
+    values[nodes] = f(nodes)
+    evaluated[nodes] = True
+    i, j = nodes[:-1], nodes[1:]
+    while len(i):
+        split = j - i >= 2
+        i, j = i[split], j[split]
+        m = (i + j) // 2
+        values[m] = f(m)
+        evaluated[m] = True
+        t = (y[m] - y[i]) / (y[j] - y[i])
+        error = np.abs(values[m] - (values[i] + t * (values[j] - values[i])))
+        fail = error > tolerance
+        i, m, j = i[fail], m[fail], j[fail]
+        i, j = np.concatenate((i, m)), np.concatenate((m, j))
+    nodes = np.flatnonzero(evaluated)
+    return nodes, values[nodes]
+
+def compute_geometry(spatialreference, extent, nnodes=51, cliplat=0.0, lat_tick_interval=5,
+                     mapscale=1000000, lon_minor_ticks=[12.5], lon_major_ticks=[25, 50, 75],
+                     height=4.0, latlon=False, tolerance=None, stats=None):
+    """
+    Compute the geometry of a scale bar without rendering it.
+
+    Parameters
+    ----------
+    spatialreference : object
+                       A OSR spatial reference object or a
+                       ProjectionParameters record.
+
+    extent : iterable
+             An iterable in the form (xmin, ymin, xmax, ymax) or
+             (latmin, lonmin, latmax, lonmax)
+
+    nnodes : int
+             The number of nodes used to create smoother lines.  Even
+             values are incremented by one.
+
+    cliplat : float
+              The latitude at which the scale bar reflects, e.g. the equator
+
+    lat_tick_interval : int
+                        The frequency at which latitude lines are labeled
+
+    mapscale : float
+               The denominator of the map scale, e.g. 1000000.
+
+    lon_minor_ticks : list
+                      Unlabeled tick lines, in kilometers
+
+    lon_major_ticks : list
+                      Labeled tick lines, in kilometers
+
+    height : float
+             The height, in cm, of the scale bar
+
+    latlon : boolean
+             If True the extent is in latitude and longitude
+
+    tolerance : float
+                If given, nodes are placed adaptively among nnodes evenly
+                spaced candidates.  The scale factor is evaluated from a
+                coarse grid, only where the tick curves bend, and the
+                evaluated nodes reduced to the smallest set that keeps every
+                tick curve within tolerance cm of the curve.  The latitudes
+                of the candidates are still computed, for clipping and
+                labeling.
+
+    stats : object
+            A Stats object recording the inverse_projection, distance
+            and adaptive_nodes phases
+
+    Returns
+    -------
+     : object
+       ScaleBarGeometry namedtuple
+    """
+    return compute_series(spatialreference, [extent], nnodes=nnodes, cliplat=cliplat,
+                          lat_tick_interval=lat_tick_interval, mapscale=mapscale,
+                          lon_minor_ticks=lon_minor_ticks, lon_major_ticks=lon_major_ticks,
+                          height=height, latlon=latlon, tolerance=tolerance, stats=stats)[0]
+
+def compute_series(spatialreference, extents, nnodes=51, cliplat=0.0, lat_tick_interval=5,
+                   mapscale=1000000, lon_minor_ticks=[12.5], lon_major_ticks=[25, 50, 75],
+                   height=4.0, latlon=False, tolerance=None, stats=None):
+    """
+    Compute the geometry of a series of scale bars, e.g. one per quadrangle
+    of a map series, sharing one projection.  The inverse projection and the
+    scale factors of all of the tiles are computed as single
+    (tiles, nnodes) array operations.
+
+    Parameters
+    ----------
+    spatialreference : object
+                       A OSR spatial reference object or a
+                       ProjectionParameters record.
+
+    extents : iterable
+              of extents, each in the form (xmin, ymin, xmax, ymax) or
+              (latmin, lonmin, latmax, lonmax)
+
+    The remaining parameters are as for compute_geometry and apply to
+    every tile.
+
+    Returns
+    -------
+     : list
+       of ScaleBarGeometry namedtuples, one per extent
+    """
+    params = emd.get_parameters(spatialreference)
+    extents = np.asarray(extents, dtype=float).reshape(-1, 4)
+    y, lat, latlon_bounds = _columns(params, extents, nnodes, latlon, stats)
+    if tolerance is None:
+        scale = _distance(params, lat, stats)
+    else:
+        #Adaptive nodes evaluate the scale factor on demand, see _layout
+        scale = [lambda lat: _distance(params, lat, stats)] * len(extents)
+    return [_layout(y[i], lat[i], scale[i], latlon_bounds[i], cliplat, lat_tick_interval,
+                    mapscale, lon_minor_ticks, lon_major_ticks, height, tolerance, stats)
+            for i in range(len(extents))]
+
+def _columns(params, extents, nnodes, latlon, stats):
+    """
+    Sample the (tiles, nnodes) node positions and latitudes of the
+    verticals, resampled if the projection requires it
+    """
+    nnodes = _checknnodes(nnodes)
+    xmin = extents[:, 0:1]
+    y = np.linspace(extents[:, 1], extents[:, 3], nnodes, axis=-1)
+
+    if latlon:
+        #This is intentionally inverting lat/lon to match how GDAL returns image extents
+        lat = y
+        lon = np.repeat(xmin, nnodes, axis=1)
+    else:
+        #Convert to pixel grid to latlon grid
+        with phase(stats, 'inverse_projection'):
+            lon, lat = params.proj(np.repeat(xmin, nnodes, axis=1), y, inverse=True)
+
+    latlon_bounds = list(zip(zip(np.min(lat, axis=1), np.min(lon, axis=1)),
+                             zip(np.max(lat, axis=1), np.max(lon, axis=1))))
+
+    #Resample the nodes if the projection requires it
+    kernel = projections.get_kernel(params.name)
+    if kernel.anchor is not None:
+        y = lat = projections.resample(lat, kernel.anchor(params))
+    return y, lat, latlon_bounds
+
+def _distance(params, lat, stats):
+    """
+    The scale factor of the projection at each latitude
+    """
+    kernel = projections.get_kernel(params.name)
+    with phase(stats, 'distance'), np.errstate(divide='ignore', invalid='ignore'):
+        #Nodes beyond the clipping latitude are masked out per tile by _layout
+        return kernel.scale(lat, params)
+
+def _layout(y, lat, scale, latlon_bounds, cliplat, lat_tick_interval, mapscale,
+            lon_minor_ticks, lon_major_ticks, height, tolerance, stats):
+    """
+    Clip one tile of nodes and lay out its tick curves and labels.  The
+    scale is either the scale factor at each node or a callable returning
+    it for an array of latitudes.
+    """
+    mask = lat >= cliplat
+    latitudes = lat[mask][::-1]
+
+    #Rescale coordinates to scalebar space
+    y = y[mask]
+    y = height / (np.max(y) - np.min(y)) * (y - np.min(y))
+
+    lon_major_ticks = [t * 1000 for t in lon_major_ticks] #km to m
+    lon_minor_ticks = [t * 1000 for t in lon_minor_ticks]
+    ticks = sorted(lon_major_ticks + lon_minor_ticks)[::-1]
+    major = [t in lon_major_ticks for t in ticks]
+    factors = np.array(ticks, dtype=float) * 100 * (1 / float(mapscale))
+    if callable(scale):
+        distance = lambda nodes: scale(latitudes[nodes])
+    else:
+        dense = scale[mask][::-1]
+        distance = lambda nodes: dense[nodes]
+
+    if tolerance is not None and len(ticks):
+        #The largest tick has the largest error, so it bounds all of the others.
+        #A quarter of the tolerance goes to sampling the curve and the rest to
+        #simplifying the sampled curve.
+        evaluated = np.empty(len(y))
+
+        def largest(nodes):
+            evaluated[nodes] = distance(nodes)
+            return factors[0] * evaluated[nodes]
+
+        with phase(stats, 'adaptive_nodes'):
+            nodes, values = refine_nodes(y, largest, tolerance / 4)
+            nodes = nodes[adaptive_nodes(y[nodes], values, tolerance * 3 / 4)]
+        y = y[nodes]
+        offsets = np.outer(factors, evaluated[nodes])
+    else:
+        offsets = np.outer(factors, distance(np.arange(len(y))))
+
+    #Compute the latrange and labels
+    latrange = lat[mask]
+    if latrange[0] > latrange[-1]: #Ghetto monotonic check for southern hemisphere...
+        labels = np.arange(util.integerround(latrange[-2]), latrange[0] + lat_tick_interval, lat_tick_interval)
+    else:
+        labels = np.arange(util.integerround(latrange[0] + lat_tick_interval), latrange[-2], lat_tick_interval)
+    labels = np.hstack((round(latrange[0], 1), labels, round(latrange[-1], 1)))
+    #Compute the y coordinate values in scalebar space
+    horizontals = height / (np.max(labels) - np.min(labels)) * (labels - np.min(labels))
+    horizontals = np.abs(horizontals - height)
+
+    return ScaleBarGeometry(_freeze(y), _freeze(ticks), _freeze(major), _freeze(offsets),
+                            _freeze(horizontals), _freeze(labels), latlon_bounds,
+                            height, bool(lat[0] > lat[-1]))
@@ -0,0 +1,221 @@
+import collections
+
+import numpy as np
+
+Kernel = collections.namedtuple('Kernel', ['scale', 'anchor'])
+
+#Mapping of OSR projection names to scale factor kernels
+kernels = {}
+
+def register(*names, anchor=None):
+    """
+    Decorator that registers a scale factor kernel for one or more
+    OSR projection names.
+
+    Parameters
+    ----------
+    names : str
+            OSR projection names, e.g. 'Mercator_1SP'
+
+    anchor : callable
+             Function taking a ProjectionParameters record and returning the
+             latitude towards which the nodes are resampled.  If None
+             (Default), the inverse projected latitudes are used as is.
+
+    Returns
+    -------
+     : callable
+       The decorator
+    """
+    def decorator(func):
+        for name in names:
+            kernels[name] = Kernel(func, anchor)
+        return func
+    return decorator
+
+def get_kernel(name):
+    """
+    Get the scale factor kernel registered for a projection
+
+    Parameters
+    ----------
+    name : str
+           The OSR projection name
+
+    Returns
+    -------
+     : object
+       Kernel namedtuple with the scale factor function and
+       the resampling anchor
+    """
+    try:
+        return kernels[name]
+    except KeyError:
+        raise ValueError('No scale factor kernel registered for the {} projection.'.format(name))
+
+def resample(lat, stop):
+    """
+    Evenly resample a latitude array from its extreme value
+    to a stop latitude, e.g. the latitude of origin.
+
+    Parameters
+    ----------
+    lat : ndarray
+          Latitudes to be resampled.  A 2-D array is resampled row by row.
+
+    stop : float
+           The latitude at which sampling stops
+
+    Returns
+    -------
+     : ndarray
+       of latitudes with the shape of lat
+    """
+    if stop > 0:
+        start = np.min(lat, axis=-1)
+    else:
+        start = np.max(lat, axis=-1)
+    return np.linspace(start, stop, np.shape(lat)[-1], axis=-1)
+
+@register('Mercator', 'Mercator_1SP', 'Mercator_2SP', 'Mercator_Auxiliary_Sphere')
+def mercator(lat, params):
+    """
+    Scale factor along parallels for the Mercator projection
+
+    Parameters
+    ----------
+    lat : ndarray
+          Latitudes in degrees
+
+    params : object
+             ProjectionParameters record
+
+    Returns
+    -------
+     : ndarray
+       The scale factor at each latitude
+    """
+    return 1.0 / np.cos(np.radians(lat))
+
+@register('Transverse_Mercator', 'Transverse_Mercator_South_Orientated', 'Gauss_Kruger',
+          anchor=lambda params: params.latitude_of_origin)
+def transverse_mercator(lat, params):
+    """
+    Scale factor for the Transverse Mercator projection
+
+    Parameters
+    ----------
+    lat : ndarray
+          Latitudes in degrees
+
+    params : object
+             ProjectionParameters record
+
+    Returns
+    -------
+     : ndarray
+       The scale factor at each latitude
+    """
+    clat = np.radians(params.latitude_of_origin)
+    clon = np.radians(params.central_meridian)
+    k_naught = params.scale_factor
+    B = np.cos(clon) * np.sin(clat - np.radians(lat))
+    return k_naught / np.sqrt(1.0 - B ** 2.0)
+
+@register('Equirectangular', 'Equidistant_Cylindrical', 'Plate_Carree', 'Simple_Cylindrical',
+          anchor=lambda params: params.parallels[0])
+def equirectangular(lat, params):
+    """
+    Scale factor along parallels for the Equirectangular projection
+
+    Parameters
+    ----------
+    lat : ndarray
+          Latitudes in degrees
+
+    params : object
+             ProjectionParameters record
+
+    Returns
+    -------
+     : ndarray
+       The scale factor at each latitude
+    """
+    p1 = params.parallels[0]
+    return np.cos(np.radians(p1)) / np.cos(np.radians(lat))
+
+@register('Lambert_Conformal_Conic', 'Lambert_Conformal_Conic_1SP',
+          'Lambert_Conformal_Conic_2SP', 'Lambert_Conformal_Conic_2SP_Belgium')
+def lambert_conformal_conic(lat, params):
+    """
+    Scale factor for the Lambert Conformal Conic projection
+
+    Parameters
+    ----------
+    lat : ndarray
+          Latitudes in degrees
+
+    params : object
+             ProjectionParameters record
+
+    Returns
+    -------
+     : ndarray
+       The scale factor at each latitude
+    """
+    parallels = sorted(params.parallels)
+    p1, p2 = np.radians(parallels)
+    cp1 = np.cos(p1)
+    cp2 = np.cos(p2)
+    n = np.log(cp1 / cp2) / np.log(np.tan(np.pi / 4 + p2 / 2) / np.tan(np.pi / 4 + p1 / 2))
+    num = cp1 * np.tan(np.pi / 4 + p1 / 2) ** n
+    den = np.cos(np.radians(lat)) * np.tan(np.pi / 4 + np.radians(lat / 2.0)) ** n
+    return num / den
+
+@register('Stereographic', 'Polar_Stereographic', 'Oblique_Stereographic',
+          'Stereographic_North_Pole', 'Stereographic_South_Pole',
+          anchor=lambda params: params.latitude_of_origin)
+def stereographic(lat, params):
+    """
+    Scale factor for the Stereographic projection
+
+    Parameters
+    ----------
+    lat : ndarray
+          Latitudes in degrees
+
+    params : object
+             ProjectionParameters record
+
+    Returns
+    -------
+     : ndarray
+       The scale factor at each latitude
+    """
+    clat = np.radians(params.latitude_of_origin)
+    clon = np.radians(180 - params.central_meridian)
+    k_naught = params.scale_factor
+    lat = np.radians(lat)
+    return (2 * k_naught) / (1.0 + np.sin(clat) * np.sin(lat) +
+                             np.cos(clat) * np.cos(lat) * np.cos(clon))
+
+@register('Sinusoidal')
+def sinusoidal(lat, params):
+    """
+    Scale factor along parallels for the Sinusoidal projection.
+    Parallels are true to scale, so the factor is unity everywhere.
+
+    Parameters
+    ----------
+    lat : ndarray
+          Latitudes in degrees
+
+    params : object
+             ProjectionParameters record
+
+    Returns
+    -------
+     : ndarray
+       The scale factor at each latitude
+    """
+    return np.ones(np.shape(lat))
@@ -0,0 +1,229 @@
+import codecs
+import io
+import math
+
+from scalebar.bar import writers
+from scalebar.bar.writers import cm, _attributes
+
+#Group attributes that are moved into shared CSS classes
+STYLE_ATTRIBUTES = ('stroke', 'fill', 'font_size', 'stroke_width')
+
+def _length(value):
+    #Lengths are emitted as '<value>cm' strings
+    return float(str(value).rstrip('cm'))
+
+class _BodyWriter(writers.StreamWriter):
+    """
+    Stream writer for the body of one scale bar on a sheet.  The drawing
+    root is dropped, group styles are replaced by shared classes and the
+    latitude tick lines are replaced by references to shared definitions.
+    """
+    def __init__(self, fileobj, sheet):
+        super(_BodyWriter, self).__init__(fileobj)
+        self.sheet = sheet
+        self.size = None
+        self._groups = []
+
+    def start(self, size):
+        self.size = tuple(_length(s) for s in size)
+
+    def group(self, **attribs):
+        style = tuple(sorted((k, str(v)) for k, v in attribs.items() if k in STYLE_ATTRIBUTES))
+        attribs = {k: v for k, v in attribs.items() if k not in STYLE_ATTRIBUTES}
+        name = attribs.pop('id', None)
+        self._groups.append(name)
+        classes = [self.sheet._style(style)] if style else []
+        if name is not None:
+            classes.insert(0, name)
+        super(_BodyWriter, self).group(class_=' '.join(classes), **attribs)
+
+    def end_group(self):
+        self._groups.pop()
+        super(_BodyWriter, self).end_group()
+
+    def line(self, start, end):
+        if self._groups and self._groups[-1] == 'horizontal_tick' and start[1] == end[1]:
+            tick = self.sheet._tick(start[0], end[0])
+            self._write('<use{} />'.format(_attributes({'xlink:href': '#' + tick, 'y': start[1]})))
+        else:
+            super(_BodyWriter, self).line(start, end)
+
+    def end(self):
+        if self._opentag is not None:
+            self._opentag = None
+        return self.fileobj
+
+class Sheet(object):
+    """
+    A single SVG document holding many scale bars, e.g. one per quadrangle
+    of a map series.
+
+    Every distinct scale bar is written once, into the sheet's <defs>, and
+    placed with <use>, so identical bars cost one reference each.  Group
+    styles are written once as CSS classes and latitude tick lines of the
+    same length share one definition.
+
+    Parameters
+    ----------
+    columns : int
+              The number of columns used to place scale bars added without
+              a position (Default: ceil(sqrt(n)))
+
+    spacing : float
+              The gap, in cm, between automatically placed scale bars
+    """
+    def __init__(self, columns=None, spacing=0.5):
+        self.columns = columns
+        self.spacing = spacing
+        self.placements = []
+
+    def __len__(self):
+        return len(self.placements)
+
+    def add(self, scalebar, x=None, y=None):
+        """
+        Add a scale bar to the sheet
+
+        Parameters
+        ----------
+        scalebar : object
+                   A ScaleBar
+
+        x, y : float
+               The position, in cm, of the top left corner of the scale bar.
+               If omitted the scale bar is placed on a grid.
+        """
+        self.placements.append((scalebar, x, y))
+
+    def extend(self, scalebars):
+        for s in scalebars:
+            self.add(s)
+
+    def _style(self, style):
+        if style not in self._styles:
+            self._styles[style] = 's{}'.format(len(self._styles))
+        return self._styles[style]
+
+    def _tick(self, x1, x2):
+        if (x1, x2) not in self._ticks:
+            self._ticks[(x1, x2)] = 't{}'.format(len(self._ticks))
+        return self._ticks[(x1, x2)]
+
+    def _bodies(self):
+        """
+        Draw each distinct scale bar body, returning the bodies, their
+        sizes and the index of the body used by each placement.
+        """
+        bodies = []
+        sizes = []
+        index = {}
+        placed = []
+        for scalebar, x, y in self.placements:
+            f = io.StringIO()
+            writer = _BodyWriter(f, self)
+            scalebar.draw(writer)
+            body = f.getvalue()
+            if body not in index:
+                index[body] = len(bodies)
+                bodies.append(body)
+                sizes.append(writer.size)
+            placed.append(index[body])
+        return bodies, sizes, placed
+
+    def layout(self, sizes):
+        """
+        Compute the position of each placement
+
+        Parameters
+        ----------
+        sizes : list
+                The (width, height), in cm, of each placement
+
+        Returns
+        -------
+         : list
+           of (x, y) positions in cm
+        """
+        columns = self.columns or max(1, int(math.ceil(math.sqrt(len(sizes)))))
+        width = max([s[0] for s in sizes] or [0]) + self.spacing
+        height = max([s[1] for s in sizes] or [0]) + self.spacing
+        positions = []
+        auto = 0
+        for (scalebar, x, y) in self.placements:
+            if x is None or y is None:
+                row, column = divmod(auto, columns)
+                auto += 1
+                x = column * width if x is None else x
+                y = row * height if y is None else y
+            positions.append((x, y))
+        return positions
+
+    def draw(self, fileobj):
+        """
+        Write the sheet to a text mode file-like object
+        """
+        self._styles = {}
+        self._ticks = {}
+        bodies, sizes, placed = self._bodies()
+        placedsizes = [sizes[i] for i in placed]
+        positions = self.layout(placedsizes)
+        width = max([x + s[0] for (x, y), s in zip(positions, placedsizes)] or [0])
+        height = max([y + s[1] for (x, y), s in zip(positions, placedsizes)] or [0])
+
+        attribs = dict(writers.SVG_ATTRIBUTES)
+        attribs['width'], attribs['height'] = width * cm, height * cm
+        fileobj.write('<?xml version="1.0" encoding="utf-8" ?>\n')
+        fileobj.write('<svg{}><defs>'.format(_attributes(attribs)))
+
+        rules = []
+        for style, name in sorted(self._styles.items(), key=lambda item: item[1]):
+            declarations = []
+            for k, v in style:
+                if k in ('font_size', 'stroke_width'):
+                    v += 'px'
+                declarations.append('{}:{}'.format(k.replace('_', '-'), v))
+            rules.append('.{}{{{}}}'.format(name, ';'.join(declarations)))
+        if rules:
+            fileobj.write('<style type="text/css">{}</style>'.format(''.join(rules)))
+        for (x1, x2), name in sorted(self._ticks.items(), key=lambda item: item[1]):
+            fileobj.write('<line{} />'.format(_attributes({'id': name, 'x1': x1, 'x2': x2,
+                                                            'y1': 0, 'y2': 0})))
+        for i, body in enumerate(bodies):
+            fileobj.write('<g id="b{}">{}</g>'.format(i, body))
+        fileobj.write('</defs>')
+
+        for i, (x, y) in zip(placed, positions):
+            fileobj.write('<use{} />'.format(_attributes({'xlink:href': '#b{}'.format(i),
+                                                          'x': x * cm, 'y': y * cm})))
+        fileobj.write('</svg>')
+        return fileobj
+
+    def write(self, fileobj):
+        """
+        Write the sheet to a text or binary file-like object
+
+        Parameters
+        ----------
+        fileobj : object
+                  A writable file-like object
+        """
+        if isinstance(fileobj, (io.RawIOBase, io.BufferedIOBase)) or 'b' in getattr(fileobj, 'mode', ''):
+            fileobj = codecs.getwriter('utf-8')(fileobj)
+        self.draw(fileobj)
+
+    def save(self, outputname):
+        """
+        Write the sheet to a file
+
+        Parameters
+        ----------
+        outputname : str
+                     The output file name
+        """
+        with open(outputname, 'w', encoding='utf-8') as f:
+            self.write(f)
+
+    def tobytes(self):
+        f = io.BytesIO()
+        self.write(f)
+        return f.getvalue()
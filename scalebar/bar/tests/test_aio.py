@@ -0,0 +1,82 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from .. import aio
+from .. import bar
+
+WKT = """PROJCS["Mercator_MARS",GEOGCS["GCS_MARS",DATUM["MARS",SPHEROID["MARS",3396190,169.8944472236118]],PRIMEM["Reference_Meridian",0],UNIT["Degree",0.017453292519943295]],PROJECTION["Mercator_1SP"],PARAMETER["central_meridian",0],PARAMETER["false_easting",0],PARAMETER["false_northing",0],UNIT["Meter",1],PARAMETER["latitude_of_origin",0.0]]"""
+
+
+class TestAsyncScaleBars(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_from_projstring(self):
+        expected = bar.ScaleBar.from_projstring(WKT, (0, 0, 180, 65), nnodes=11).tobytes()
+
+        async def main():
+            async with aio.AsyncScaleBars(max_workers=2) as bars:
+                scalebars = await asyncio.gather(*[bars.from_projstring(WKT, (0, 0, 180, 65), nnodes=11)
+                                                   for i in range(4)])
+                return await asyncio.gather(*[bars.render(s) for s in scalebars])
+        self.assertEqual(asyncio.run(main()), [expected] * 4)
+
+    def test_save(self):
+        outputname = os.path.join(self.path, 'merc.svg')
+
+        async def main():
+            async with aio.AsyncScaleBars() as bars:
+                return await bars.from_projstring(WKT, (0, 0, 180, 65), nnodes=11, outputname=outputname)
+        s = asyncio.run(main())
+        with open(outputname, 'rb') as f:
+            self.assertEqual(f.read(), s.tobytes())
+
+    def test_max_concurrency(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def work():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.pop()
+
+        async def main():
+            async with aio.AsyncScaleBars(max_workers=4, max_concurrency=2) as bars:
+                await asyncio.gather(*[bars._run(work) for i in range(8)])
+        asyncio.run(main())
+        self.assertEqual(max(peak), 2)
+
+    def test_timeout(self):
+        async def main():
+            async with aio.AsyncScaleBars(timeout=0.01) as bars:
+                await bars._run(time.sleep, 0.5)
+        self.assertRaises(asyncio.TimeoutError, asyncio.run, main())
+
+    def test_loop_not_blocked(self):
+        events = []
+
+        def work():
+            time.sleep(0.1)
+            events.append('work')
+
+        async def ticker():
+            await asyncio.sleep(0)
+            events.append('tick')
+
+        async def main():
+            async with aio.AsyncScaleBars(max_workers=1) as bars:
+                await asyncio.gather(bars._run(work), ticker())
+        asyncio.run(main())
+        self.assertEqual(events, ['tick', 'work'])
@@ -0,0 +1,54 @@
+import io
+import unittest
+
+from .. import bar
+from .. import builder
+
+WKT = """PROJCS["Mercator_MARS",GEOGCS["GCS_MARS",DATUM["MARS",SPHEROID["MARS",3396190,169.8944472236118]],PRIMEM["Reference_Meridian",0],UNIT["Degree",0.017453292519943295]],PROJECTION["Mercator_1SP"],PARAMETER["central_meridian",0],PARAMETER["false_easting",0],PARAMETER["false_northing",0],UNIT["Meter",1],PARAMETER["latitude_of_origin",0.0]]"""
+
+
+class TestScaleBarBuilder(unittest.TestCase):
+    def setUp(self):
+        self.builder = builder.ScaleBarBuilder(WKT, (0, 0, 180, 65), latlon=True, writer='stream')
+        self.builder.tobytes()
+        del self.builder.computed[:]
+
+    def expected(self, **kwargs):
+        kwargs.setdefault('writer', 'stream')
+        return bar.ScaleBar.from_projstring(WKT, (0, 0, 180, 65), **kwargs).tobytes()
+
+    def test_matches_scalebar(self):
+        self.assertEqual(self.builder.tobytes(), self.expected())
+        self.assertEqual(self.builder.computed, [])
+
+    def test_styling_redraws_only(self):
+        self.builder.fontsize = 10
+        self.builder.padding = 0.5
+        self.assertEqual(self.builder.tobytes(), self.expected(fontsize=10, padding=0.5))
+        self.assertEqual(self.builder.computed, ['drawing'])
+
+    def test_ticks_reuse_distance(self):
+        self.builder.update(lon_major_ticks=[50, 100], mapscale=2000000, height=3.0)
+        self.assertEqual(self.builder.tobytes(),
+                         self.expected(lon_major_ticks=[50, 100], mapscale=2000000, height=3.0))
+        self.assertEqual(self.builder.computed, ['layout', 'drawing'])
+
+    def test_extent_reuses_srs(self):
+        self.builder.extent = (0, 0, 180, 45)
+        self.assertEqual(self.builder.tobytes(),
+                         bar.ScaleBar.from_projstring(WKT, (0, 0, 180, 45), writer='stream').tobytes())
+        self.assertEqual(self.builder.computed, ['column', 'distance', 'layout', 'drawing'])
+
+    def test_unchanged_value(self):
+        self.builder.update(fontsize=12, lon_major_ticks=[25, 50, 75])
+        self.builder.tobytes()
+        self.assertEqual(self.builder.computed, [])
+
+    def test_unknown_parameter(self):
+        self.assertRaises(TypeError, self.builder.update, color='red')
+        self.assertRaises(TypeError, builder.ScaleBarBuilder, WKT, (0, 0, 180, 65), color='red')
+
+    def test_save(self):
+        f = io.BytesIO()
+        self.builder.save(f)
+        self.assertEqual(f.getvalue(), self.expected())
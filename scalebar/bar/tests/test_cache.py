@@ -0,0 +1,110 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from .. import bar
+from .. import cache
+from scalebar.metadata import extract_metadata as em
+
+WKT = """PROJCS["Mercator_MARS",GEOGCS["GCS_MARS",DATUM["MARS",SPHEROID["MARS",3396190,169.8944472236118]],PRIMEM["Reference_Meridian",0],UNIT["Degree",0.017453292519943295]],PROJECTION["Mercator_1SP"],PARAMETER["central_meridian",0],PARAMETER["false_easting",0],PARAMETER["false_northing",0],UNIT["Meter",1],PARAMETER["latitude_of_origin",0.0]]"""
+
+
+def _put(args):
+    directory, key, data = args
+    c = cache.ScaleBarCache(directory)
+    c.put(key, data)
+    return c.get(key)
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cache = cache.ScaleBarCache(os.path.join(self.path, 'cache'))
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_miss(self):
+        self.assertIsNone(self.cache.get('00' * 32))
+        self.assertFalse(self.cache.copy('00' * 32, os.path.join(self.path, 'out.svg')))
+
+    def test_put_get_copy(self):
+        key = 'ab' * 32
+        self.cache.put(key, b'<svg />')
+        self.assertEqual(self.cache.get(key), b'<svg />')
+        outputname = os.path.join(self.path, 'out.svg')
+        self.assertTrue(self.cache.copy(key, outputname))
+        with open(outputname, 'rb') as f:
+            self.assertEqual(f.read(), b'<svg />')
+        self.assertEqual(os.listdir(os.path.dirname(self.cache.path(key))), [key + '.svg'])
+
+    def test_evict_lru(self):
+        keys = ['{:02d}'.format(i) * 32 for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, b'x' * 100)
+            os.utime(self.cache.path(key), (i, i))
+        #Reading the oldest entry makes it the most recently used
+        self.cache.get(keys[0])
+        self.cache.maxbytes = 250
+        self.cache.evict()
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+    def test_running_total(self):
+        c = cache.ScaleBarCache(os.path.join(self.path, 'total'), maxbytes=250, resync=10)
+        with mock.patch.object(c, 'entries', wraps=c.entries) as entries:
+            #The first write walks the cache, later writes only once over size
+            c.put('00' * 32, b'x' * 100)
+            c.put('01' * 32, b'x' * 100)
+            c.put('01' * 32, b'x' * 100)
+            self.assertEqual(entries.call_count, 1)
+            c.put('02' * 32, b'x' * 100)
+            self.assertEqual(entries.call_count, 2)
+            self.assertEqual(sum(size for mtime, size, path in c.entries()), 200)
+            entries.reset_mock()
+            #Writes from elsewhere are picked up every resync writes
+            for i in range(10):
+                c.put('10' * 32, b'x')
+            self.assertEqual(entries.call_count, 1)
+
+    def test_hit_skips_geometry(self):
+        c = cache.ScaleBarCache(os.path.join(self.path, 'bars'))
+        first = os.path.join(self.path, 'first.svg')
+        second = os.path.join(self.path, 'second.svg')
+        bar.ScaleBar.from_projstring(WKT, (0, 0, 180, 65), outputname=first, cache=c)
+        with mock.patch.object(bar, 'compute_geometry') as compute:
+            s = bar.ScaleBar.from_projstring(WKT, (0, 0, 180, 65), outputname=second, cache=c)
+            self.assertEqual(s.tobytes(), c.get(s.cachekey))
+        compute.assert_not_called()
+        with open(first, 'rb') as f, open(second, 'rb') as g:
+            self.assertEqual(f.read(), g.read())
+
+    def test_processes(self):
+        directory = os.path.join(self.path, 'shared')
+        args = [(directory, 'cd' * 32, b'<svg />')] * 8
+        with multiprocessing.Pool(4) as pool:
+            self.assertEqual(pool.map(_put, args), [b'<svg />'] * 8)
+        self.assertEqual(os.listdir(os.path.join(directory, 'cd')), ['cd' * 32 + '.svg'])
+
+    def test_key(self):
+        srs = em.projection_parameters(WKT)
+        key = self.cache.key(srs, (0, 0, 180, 65), nnodes=51)
+        self.assertEqual(key, self.cache.key(em.projection_parameters(WKT.replace(',', ', ')),
+                                             [0.0, 0.0, 180.0, 65.0], nnodes=51))
+        self.assertNotEqual(key, self.cache.key(srs, (0, 0, 180, 65), nnodes=101))
+
+    def test_scalebar(self):
+        c = cache.ScaleBarCache(os.path.join(self.path, 'bars'))
+        first = os.path.join(self.path, 'first.svg')
+        second = os.path.join(self.path, 'second.svg')
+        s = bar.ScaleBar.from_projstring(WKT, (0, 0, 180, 65), outputname=first, cache=c)
+        self.assertEqual(c.get(s.cachekey), s.tobytes())
+        bar.ScaleBar.from_projstring(WKT, (0, 0, 180, 65), outputname=second, cache=c)
+        with open(first, 'rb') as f, open(second, 'rb') as g:
+            self.assertEqual(f.read(), g.read())
+        uncached = bar.ScaleBar.from_projstring(WKT, (0, 0, 180, 65))
+        self.assertEqual(uncached.tobytes(), s.tobytes())
@@ -0,0 +1,162 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from .. import bar
+from .. import geometry
+from scalebar.metadata import extract_metadata as em
+
+
+class TestGeometry(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.dirname(os.path.realpath(__file__))
+        self.wkt = """PROJCS["Mercator_MARS",
+                 GEOGCS["GCS_MARS",
+                   DATUM["MARS",
+                   SPHEROID["MARS",3396190,169.8944472236118]],
+                   PRIMEM["Reference_Meridian",0],
+                   UNIT["Degree",0.017453292519943295]],
+                 PROJECTION["Mercator_1SP"],
+                 PARAMETER["central_meridian",0],
+                 PARAMETER["false_easting",0],
+                 PARAMETER["false_northing",0],
+                 UNIT["Meter",1],
+                 PARAMETER["latitude_of_origin",0.0]]"""
+        self.srs = em.extract_projstring(self.wkt)
+        self.geom = geometry.compute_geometry(self.srs, (0, 0, 180, 65), latlon=True)
+
+    def test_shapes(self):
+        self.assertEqual(self.geom.y.shape, (51,))
+        self.assertEqual(self.geom.offsets.shape, (4, 51))
+        np.testing.assert_array_equal(self.geom.ticks, [75000, 50000, 25000, 12500])
+        np.testing.assert_array_equal(self.geom.major, [True, True, True, False])
+        self.assertEqual(len(self.geom.lat_ticks), len(self.geom.lat_labels))
+        self.assertEqual(self.geom.latlon_bounds, ((0.0, 0.0), (65.0, 0.0)))
+
+    def test_checknnodes(self):
+        geom = geometry.compute_geometry(self.srs, (0, 0, 180, 65), nnodes=50, latlon=True)
+        self.assertEqual(len(geom.y), 51)
+
+    def test_immutable(self):
+        with self.assertRaises(ValueError):
+            self.geom.offsets[0, 0] = 1.0
+        with self.assertRaises(AttributeError):
+            self.geom.height = 1.0
+
+    def test_deferred_render(self):
+        testname = os.path.join(self.path, 'deferred.svg')
+        s = bar.ScaleBar(self.srs, (0, 0, 180, 65), latlon=True)
+        self.assertIsNone(s._dwg)
+        np.testing.assert_array_equal(s.geometry.offsets, self.geom.offsets)
+        self.assertFalse(os.path.exists(testname))
+        s.save(testname)
+        self.assertTrue(os.path.exists(testname))
+        os.remove(testname)
+
+    def test_save_default_outputname(self):
+        s = bar.ScaleBar(self.srs, (0, 0, 180, 65), latlon=True)
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as path:
+            os.chdir(path)
+            try:
+                s.save()
+                self.assertTrue(os.path.exists(bar.DEFAULT_OUTPUTNAME))
+            finally:
+                os.chdir(cwd)
+        self.assertEqual(s.outputname, 'scalebar.svg')
+
+    def test_compatibility_attributes(self):
+        s = bar.ScaleBar(self.srs, (0, -20, 180, 65), latlon=True, nnodes=11, cliplat=0)
+        self.assertEqual(s.coords.shape, (11, 2))
+        self.assertTrue(np.all(s.coords[:, 0] == 0))
+        self.assertEqual(s.coords[:, 1].tolist(), np.linspace(-20, 65, 11).tolist())
+        self.assertEqual(s.mask.tolist(), (s.coords[:, 1] >= 0).tolist())
+        self.assertIs(s.y, s.geometry.y)
+        self.assertEqual(((s.minlat, s.minlon), (s.maxlat, s.maxlon)), s.latlon_bounds)
+        with self.assertRaises(AttributeError):
+            s.minlat = 0
+        with self.assertRaises(ValueError):
+            s.coords[0, 0] = 1
+
+    def test_adaptive_nodes(self):
+        y = np.linspace(0, 1, 101)
+        # A straight line needs only its end points
+        np.testing.assert_array_equal(geometry.adaptive_nodes(y, 2 * y, 1e-9), [0, 100])
+        # A kink needs exactly one more
+        np.testing.assert_array_equal(geometry.adaptive_nodes(y, np.abs(y - 0.3), 1e-9), [0, 30, 100])
+
+    def test_refine_nodes(self):
+        y = np.linspace(0, 1, 101)
+        # A straight line is evaluated on the coarse grid and its midpoints only
+        nodes, values = geometry.refine_nodes(y, lambda n: 2 * y[n], 1e-9)
+        self.assertEqual(len(nodes), 17)
+        np.testing.assert_array_equal(values, 2 * y[nodes])
+        # A kink is refined down to the node it is at
+        x = np.abs(y - 0.3)
+        nodes, values = geometry.refine_nodes(y, lambda n: x[n], 1e-9)
+        self.assertLess(len(nodes), 40)
+        np.testing.assert_array_equal(nodes[geometry.adaptive_nodes(y[nodes], values, 1e-9)],
+                                      [0, 30, 100])
+
+    def test_adaptive_tolerance(self):
+        full = geometry.compute_geometry(self.srs, (0, 0, 180, 65), nnodes=5001, latlon=True)
+        with mock.patch.object(geometry, '_distance', wraps=geometry._distance) as distance:
+            geom = geometry.compute_geometry(self.srs, (0, 0, 180, 65), nnodes=5001, latlon=True,
+                                             tolerance=0.001)
+        #The scale factor is only evaluated where the curve needs it
+        evaluated = sum(np.size(call[0][1]) for call in distance.call_args_list)
+        self.assertLess(evaluated, len(full.y) // 10)
+        self.assertLess(len(geom.y), len(full.y) // 10)
+        self.assertEqual((geom.y[0], geom.y[-1]), (full.y[0], full.y[-1]))
+        for adaptive, dense in zip(geom.offsets, full.offsets):
+            error = np.abs(np.interp(full.y, geom.y, adaptive) - dense)
+            self.assertLessEqual(error.max(), 0.001)
+        np.testing.assert_array_equal(geom.lat_labels, full.lat_labels)
+
+    def test_series_matches_single(self):
+        extents = [(0, 0, 180, 65), (0, -30, 10, 30), (0, 60, 5, 85)]
+        series = geometry.compute_series(self.srs, extents, latlon=True)
+        self.assertEqual(len(series), 3)
+        for extent, geom in zip(extents, series):
+            single = geometry.compute_geometry(self.srs, extent, latlon=True)
+            np.testing.assert_array_equal(geom.y, single.y)
+            np.testing.assert_array_equal(geom.offsets, single.offsets)
+            np.testing.assert_array_equal(geom.lat_ticks, single.lat_ticks)
+            np.testing.assert_array_equal(geom.lat_labels, single.lat_labels)
+            self.assertEqual(geom.latlon_bounds, single.latlon_bounds)
+
+    def test_series_projected(self):
+        extents = np.array([(0, 0, 1e5, 1e6), (0, 1e6, 1e5, 2e6)])
+        series = geometry.compute_series(self.srs, extents)
+        for extent, geom in zip(extents, series):
+            single = geometry.compute_geometry(self.srs, extent)
+            np.testing.assert_array_equal(geom.offsets, single.offsets)
+
+    def test_from_series(self):
+        extents = [(0, 0, 180, 65), (0, -30, 10, 30)]
+        with tempfile.TemporaryDirectory() as path:
+            outputnames = [os.path.join(path, 'a.svg'), os.path.join(path, 'b.svg')]
+            bars = bar.ScaleBar.from_series(self.wkt, extents, outputnames=outputnames,
+                                            writer='stream')
+            self.assertEqual([b.outputname for b in bars], outputnames)
+            for extent, b, outputname in zip(extents, bars, outputnames):
+                single = bar.ScaleBar(self.srs, extent, latlon=True, writer='stream')
+                self.assertEqual(b.tobytes(), single.tobytes())
+                with open(outputname, 'rb') as f:
+                    self.assertEqual(f.read(), single.tobytes())
+
+    def test_curves(self):
+        s = bar.ScaleBar(self.srs, (0, 0, 180, 65), latlon=True)
+        x, y = s.curves(3.0)
+        self.assertEqual(x.shape, (1 + 2 * len(self.geom.ticks), len(self.geom.y)))
+        self.assertEqual(x.shape, y.shape)
+        np.testing.assert_array_equal(x[0], 3.0)
+        np.testing.assert_array_equal(y[0], self.geom.y)
+        np.testing.assert_array_equal(x[1], 3.0 + self.geom.offsets[0][::-1])
+        np.testing.assert_array_equal(x[2], 3.0 - self.geom.offsets[0][::-1])
+        np.testing.assert_array_equal(y[1:], np.tile(self.geom.y[::-1], (len(x) - 1, 1)))
+        s.symmetrical = False
+        self.assertEqual(s.curves(3.0)[0].shape, (1 + len(self.geom.ticks), len(self.geom.y)))
@@ -0,0 +1,84 @@
+import math
+import unittest
+
+import numpy as np
+
+from .. import projections
+from scalebar.metadata import extract_metadata as em
+
+
+class TestProjections(unittest.TestCase):
+    def setUp(self):
+        self.lat = np.linspace(-85, 85, 101)
+
+    def test_registry_lookup(self):
+        for name in ['Mercator_1SP', 'Transverse_Mercator', 'Equirectangular',
+                     'Lambert_Conformal_Conic_2SP', 'Polar_Stereographic', 'Sinusoidal']:
+            self.assertIn(name, projections.kernels)
+        self.assertIs(projections.get_kernel('Mercator_1SP').scale, projections.mercator)
+
+    def test_unknown_projection(self):
+        self.assertRaises(ValueError, projections.get_kernel, 'Not_A_Projection')
+
+    def test_register(self):
+        @projections.register('Test_Projection')
+        def unity(lat, params):
+            return np.ones(len(lat))
+        kernel = projections.get_kernel('Test_Projection')
+        self.assertIs(kernel.scale, unity)
+        self.assertIsNone(kernel.anchor)
+        projections.kernels.pop('Test_Projection')
+
+    def test_resample(self):
+        np.testing.assert_array_equal(projections.resample(self.lat, 90), np.linspace(-85, 90, 101))
+        np.testing.assert_array_equal(projections.resample(self.lat, -90), np.linspace(85, -90, 101))
+
+    def test_mercator(self):
+        truth = [1.0 / math.cos(math.radians(l)) for l in self.lat]
+        np.testing.assert_allclose(projections.mercator(self.lat, None), truth)
+
+    def test_sinusoidal(self):
+        np.testing.assert_array_equal(projections.sinusoidal(self.lat, None), np.ones(101))
+
+    def test_stereographic(self):
+        wkt = """PROJCS["Mars_South_Pole_Stereographic",
+                GEOGCS["Mars 2000",
+                    DATUM["D_Mars_2000",
+                    SPHEROID["Mars_2000_IAU_IAG",3396190.0,169.89444722361179]],
+                    PRIMEM["Greenwich",0],
+                    UNIT["Decimal_Degree",0.0174532925199433]],
+                    PROJECTION["Stereographic"],
+                    PARAMETER["False_Easting",0],
+                    PARAMETER["False_Northing",0],
+                    PARAMETER["Central_Meridian",0],
+                    PARAMETER["Scale_Factor",1],
+                    PARAMETER["Latitude_Of_Origin",-90],
+                    UNIT["Meter",1]]"""
+        params = em.projection_parameters(wkt)
+        kernel = projections.get_kernel(params.name)
+        self.assertEqual(kernel.anchor(params), -90)
+        clat = math.radians(-90)
+        truth = [2.0 / (1.0 + math.sin(clat) * math.sin(math.radians(l)) +
+                        math.cos(clat) * math.cos(math.radians(l)) * math.cos(math.pi)) for l in self.lat]
+        np.testing.assert_allclose(kernel.scale(self.lat, params), truth)
+
+    def test_lambert_conformal_conic(self):
+        wkt = """PROJCS["Moon_Lambert_Conformal_Conic_AUTO",
+                GEOGCS["Moon 2000",
+                    DATUM["D_Moon_2000",
+                    SPHEROID["Moon_2000_IAU_IAG",1737400.0,0.0]],
+                    PRIMEM["Greenwich",0],
+                    UNIT["Decimal_Degree",0.0174532925199433]],
+                    PROJECTION["Lambert_Conformal_Conic"],
+                    PARAMETER["False_Easting",0],
+                    PARAMETER["False_Northing",0],
+                    PARAMETER["Central_Meridian",0],
+                    PARAMETER["Standard_Parallel_1",43],
+                    PARAMETER["Standard_Parallel_2",73],
+                    PARAMETER["Latitude_Of_Origin",0],
+                    UNIT["Meter",1]]"""
+        params = em.projection_parameters(wkt)
+        kernel = projections.get_kernel(params.name)
+        k = kernel.scale(np.array([43.0, 73.0]), params)
+        # The scale factor is unity along both standard parallels
+        np.testing.assert_allclose(k, [1.0, 1.0])
@@ -1,3 +1,4 @@
+import io
 import unittest
 import os
 from .. import bar
@@ -110,3 +111,80 @@ class TestScaleBar(unittest.TestCase):
         self.assertEqual(ref, test)
         os.remove(testname)
 
+    def test_polyline(self):
+        wkt = """PROJCS["Mars_South_Pole_Stereographic",
+                GEOGCS["Mars 2000",
+                    DATUM["D_Mars_2000",
+                    SPHEROID["Mars_2000_IAU_IAG",3396190.0,169.89444722361179]],
+                    PRIMEM["Greenwich",0],
+                    UNIT["Decimal_Degree",0.0174532925199433]],
+                    PROJECTION["Stereographic"],
+                    PARAMETER["False_Easting",0],
+                    PARAMETER["False_Northing",0],
+                    PARAMETER["Central_Meridian",0],
+                    PARAMETER["Scale_Factor",1],
+                    PARAMETER["Latitude_Of_Origin",-90],
+                    UNIT["Meter",1]]"""
+        lines = bar.ScaleBar.from_projstring(wkt, (0, -90, 180,-40), cliplat=-90).render().tostring()
+        polylines = bar.ScaleBar.from_projstring(wkt, (0, -90, 180,-40), cliplat=-90, polyline=True).render().tostring()
+        # One vertical plus four ticks on each side
+        self.assertEqual(polylines.count('<polyline'), 9)
+        self.assertEqual(polylines.count('<text'), lines.count('<text'))
+        self.assertLess(len(polylines), len(lines))
+
+    def test_from_header(self):
+        from scalebar.fileio import gdalio
+        ds = get_path('Lunar_LRO_LOLA_Shade_MAP2_90.0N20.0_LAMB.tif')
+        s = bar.ScaleBar.from_image(ds)
+        h = bar.ScaleBar.from_image(gdalio.read_header(ds))
+        self.assertEqual(s.latlon_bounds, h.latlon_bounds)
+        self.assertEqual(s.geometry.offsets.tolist(), h.geometry.offsets.tolist())
+
+    def test_image_osr_parity(self):
+        #Images are parsed with OSR, so they match the GDAL path and not pyproj
+        from scalebar.fileio import gdalio
+        header = gdalio.read_header(get_path('Lunar_LRO_LOLA_Shade_MAP2_90.0N20.0_LAMB.tif'))
+        (xmin, ymin), (xmax, ymax) = header.extent
+        srs = bar.emd.projection_parameters(header.projection, backend='osr')
+        self.assertEqual(bar.ScaleBar.from_image(header).tobytes(),
+                         bar.ScaleBar(srs, (xmin, ymin, xmax, ymax)).tobytes())
+
+    def test_stats(self):
+        from scalebar.utils.stats import Stats
+        stats = Stats()
+        ds = get_path('Lunar_LRO_LOLA_Shade_MAP2_90.0N20.0_LAMB.tif')
+        s = bar.ScaleBar.from_image(ds, stats=stats)
+        s.save(io.StringIO())
+        for name in ['open', 'spatial_reference', 'header', 'srs_parse', 'inverse_projection',
+                     'distance', 'parameters', 'geometry', 'draw', 'save']:
+            self.assertEqual(stats.phases[name].calls, 1, name)
+
+    def test_in_memory(self):
+        wkt = """PROJCS["Moon_Lambert_Conformal_Conic_AUTO",
+                GEOGCS["Moon 2000",
+                    DATUM["D_Moon_2000",
+                    SPHEROID["Moon_2000_IAU_IAG",1737400.0,0.0]],
+                    PRIMEM["Greenwich",0],
+                    UNIT["Decimal_Degree",0.0174532925199433]],
+                    PROJECTION["Lambert_Conformal_Conic"],
+                    PARAMETER["False_Easting",0],
+                    PARAMETER["False_Northing",0],
+                    PARAMETER["Central_Meridian",0],
+                    PARAMETER["Standard_Parallel_1",43],
+                    PARAMETER["Standard_Parallel_2",73],
+                    PARAMETER["Latitude_Of_Origin",0],
+                    UNIT["Meter",1]]"""
+        testname = os.path.join(self.path, 'lunar_lamb_memory.svg')
+        s = bar.ScaleBar.from_projstring(wkt, (33.25, 36, 60, 78.11), outputname=testname)
+        with open(testname, 'rb') as f:
+            ref = f.read()
+        os.remove(testname)
+        self.assertEqual(s.tobytes(), ref)
+
+        binary = io.BytesIO()
+        bar.ScaleBar.from_projstring(wkt, (33.25, 36, 60, 78.11), outputname=binary, writer='stream')
+        self.assertEqual(binary.getvalue(), ref)
+
+        text = io.StringIO()
+        s.save(text)
+        self.assertEqual(text.getvalue().encode('utf-8'), ref)
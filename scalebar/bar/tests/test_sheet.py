@@ -0,0 +1,69 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+from .. import bar
+from .. import sheet
+
+PROJ = '+proj=merc +lon_0=0 +R=3396190 +units=m'
+SVG = '{http://www.w3.org/2000/svg}'
+XLINK = '{http://www.w3.org/1999/xlink}href'
+
+
+class TestSheet(unittest.TestCase):
+    def setUp(self):
+        self.bars = [bar.ScaleBar.from_projstring(PROJ, (0, 0, 180, 65), nnodes=11),
+                     bar.ScaleBar.from_projstring(PROJ, (0, 0, 180, 65), nnodes=11),
+                     bar.ScaleBar.from_projstring(PROJ, (0, 10, 180, 45), nnodes=11, polyline=True)]
+        self.sheet = sheet.Sheet(columns=2)
+        self.sheet.extend(self.bars)
+        self.root = ET.fromstring(self.sheet.tobytes())
+
+    def test_definitions(self):
+        defs = self.root.find(SVG + 'defs')
+        #Identical scale bars share one definition
+        self.assertEqual(len(defs.findall(SVG + 'g')), 2)
+        self.assertEqual(len(defs.findall(SVG + 'style')), 1)
+        self.assertGreater(len(defs.findall(SVG + 'line')), 0)
+        self.assertEqual([u.get(XLINK) for u in self.root.findall(SVG + 'use')], ['#b0', '#b0', '#b1'])
+
+    def test_ids_unique(self):
+        ids = [e.get('id') for e in self.root.iter() if e.get('id') is not None]
+        self.assertEqual(len(ids), len(set(ids)))
+
+    def test_references(self):
+        ids = set(e.get('id') for e in self.root.iter())
+        for use in self.root.iter(SVG + 'use'):
+            self.assertIn(use.get(XLINK)[1:], ids)
+
+    def test_layout(self):
+        positions = [(u.get('x'), u.get('y')) for u in self.root.findall(SVG + 'use')]
+        self.assertEqual(positions[0], ('0.0cm', '0.0cm'))
+        self.assertEqual(positions[1][1], '0.0cm')
+        self.assertNotEqual(positions[2][1], '0.0cm')
+
+    def test_smaller(self):
+        self.assertLess(len(self.sheet.tobytes()), sum(len(b.tobytes()) for b in self.bars))
+
+    def test_explicit_position(self):
+        s = sheet.Sheet()
+        s.add(self.bars[0], x=2.5, y=1.0)
+        root = ET.fromstring(s.tobytes())
+        use = root.find(SVG + 'use')
+        self.assertEqual((use.get('x'), use.get('y')), ('2.5cm', '1.0cm'))
+
+    def test_save(self):
+        path = tempfile.mkdtemp()
+        try:
+            outputname = os.path.join(path, 'sheet.svg')
+            self.sheet.save(outputname)
+            with open(outputname, 'rb') as f:
+                self.assertEqual(f.read(), self.sheet.tobytes())
+            f = io.StringIO()
+            self.sheet.write(f)
+            self.assertEqual(f.getvalue().encode('utf-8'), self.sheet.tobytes())
+        finally:
+            shutil.rmtree(path)
@@ -0,0 +1,159 @@
+import io
+import os
+import unittest
+
+import numpy as np
+from svgwrite import cm
+
+from .. import bar
+from .. import writers
+
+
+def emit(writer):
+    writer.start((10 * cm, 5 * cm))
+    writer.group(font_size=12)
+    writer.text(u'10.0°', (1.0 * cm, 2.5 * cm))
+    writer.end_group()
+    writer.group(id='empty', stroke='black')
+    writer.end_group()
+    writer.group(id='vertical', stroke='black', fill='none', stroke_width=0.5)
+    writer.line((1.0 * cm, 1.0 * cm), (1.0 * cm, 2.0 * cm))
+    writer.polyline([(1.0, 1.0), (1.5, 2.25)])
+    writer.lines(['1.0cm', '2.0cm'], ['1.0cm', '1.5cm'], ['2.0cm', '3.0cm'], ['1.5cm', '2.0cm'])
+    writer.end_group()
+    writer.text('a < b & c', (0 * cm, 0 * cm))
+    writer.image('data:image/png;base64,AAAA', (1.5 * cm, 0.5 * cm), (2 * cm, 3.0 * cm))
+    return writer.end()
+
+
+class TestWriters(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.dirname(os.path.realpath(__file__))
+
+    def test_unit(self):
+        for value in [0, 1.0, 2.5, 1 / 3.0, np.float64(37.795275590551185)]:
+            self.assertEqual(value * writers.cm, value * cm)
+
+    def test_stream_matches_svgwrite(self):
+        f = io.StringIO()
+        emit(writers.StreamWriter(f))
+        dwg = emit(writers.SvgwriteWriter())
+        g = io.StringIO()
+        dwg.write(g)
+        self.assertEqual(f.getvalue(), g.getvalue())
+
+    def test_stream_scalebar(self):
+        wkt = """PROJCS["Moon_Lambert_Conformal_Conic_AUTO",
+                GEOGCS["Moon 2000",
+                    DATUM["D_Moon_2000",
+                    SPHEROID["Moon_2000_IAU_IAG",1737400.0,0.0]],
+                    PRIMEM["Greenwich",0],
+                    UNIT["Decimal_Degree",0.0174532925199433]],
+                    PROJECTION["Lambert_Conformal_Conic"],
+                    PARAMETER["False_Easting",0],
+                    PARAMETER["False_Northing",0],
+                    PARAMETER["Central_Meridian",0],
+                    PARAMETER["Standard_Parallel_1",43],
+                    PARAMETER["Standard_Parallel_2",73],
+                    PARAMETER["Latitude_Of_Origin",0],
+                    UNIT["Meter",1]]"""
+        streamname = os.path.join(self.path, 'lunar_lamb_stream.svg')
+        treename = os.path.join(self.path, 'lunar_lamb_tree.svg')
+        bar.ScaleBar.from_projstring(wkt, (33.25, 36, 60, 78.11), outputname=streamname, writer='stream')
+        bar.ScaleBar.from_projstring(wkt, (33.25, 36, 60, 78.11), outputname=treename)
+        with open(streamname, 'r', encoding='utf-8') as f:
+            stream = f.read()
+        with open(treename, 'r', encoding='utf-8') as f:
+            tree = f.read()
+        self.assertEqual(stream, tree)
+        os.remove(streamname)
+        os.remove(treename)
+
+    def test_preview(self):
+        srs = bar.emd.projection_parameters('+proj=merc +lon_0=0 +R=3396190 +units=m +no_defs')
+        preview = np.arange(12, dtype=np.uint8).reshape(3, 4)
+        plain = bar.ScaleBar(srs, (0, 0, 180, 65), latlon=True, writer='stream')
+        stream = bar.ScaleBar(srs, (0, 0, 180, 65), latlon=True, writer='stream', preview=preview)
+        tree = bar.ScaleBar(srs, (0, 0, 180, 65), latlon=True, preview=preview)
+        self.assertEqual(stream.tobytes(), tree.tobytes())
+        data = stream.tobytes()
+        self.assertEqual(data.count(b'<image '), 1)
+        self.assertIn(b'xlink:href="data:image/png;base64,', data)
+        #The thumbnail is scaled to the bar height and widens the drawing by it and the padding
+        self.assertIn(b'height="4.0cm" width="5.333333333333333cm"', data)
+        width = lambda d: float(d.split(b'width="')[1].split(b'cm"')[0])
+        self.assertAlmostEqual(width(data) - width(plain.tobytes()), 4 / 3.0 * 4 + 1.0)
+
+    def test_lines_chunked(self):
+        #Large batches are written in CHUNK sized pieces and collinear segments merged across them
+        n = writers.CHUNK * 2 + 5
+        x = ['{}cm'.format(i) for i in range(n + 1)]
+        y = ['0cm'] * (n + 1)
+        f = io.StringIO()
+        calls = []
+        f.write = lambda s, write=f.write: calls.append(s) or write(s)
+        w = writers.StreamWriter(f)
+        w.lines(x[:-1], y[:-1], x[1:], y[1:])
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(f.getvalue().count('<line '), n)
+        self.assertEqual(max(c.count('<line ') for c in calls), writers.CHUNK)
+
+        f = io.StringIO()
+        w = writers.MinifiedWriter(f)
+        ys = ['{}cm'.format(i % 2) for i in range(n + 1)]
+        w.lines(x[:-1], ys[:-1], x[1:], ys[1:])
+        self.assertEqual(f.getvalue().count('<line '), n)
+        f = io.StringIO()
+        w = writers.MinifiedWriter(f)
+        w.lines(x[:-1], y[:-1], x[1:], y[1:])
+        self.assertEqual(f.getvalue(), '<line x1="0" x2="{}" y1="0" y2="0"/>'.format(n))
+
+    def test_minified(self):
+        f = io.StringIO()
+        w = writers.MinifiedWriter(f, precision=0.01)
+        w.start((10.004 * cm, 5 * cm))
+        w.group(font_size=12)
+        w.text('a', (0.5 * cm, -0.123 * cm))
+        w.end_group()
+        w.group(id='empty', stroke='black')
+        w.end_group()
+        w.group(stroke='black')
+        #Collinear segments are merged and a segment that quantizes to a point is dropped
+        w.lines(['1cm', '1cm', '1cm', '2cm'], ['1cm', '2cm', '3cm', '4cm'],
+                ['1cm', '1cm', '1.001cm', '3cm'], ['2cm', '3cm', '3.001cm', '4cm'])
+        w.polyline([(1.0, 1.0), (1.001, 1.0), (1.5, 2.25)])
+        w.end_group()
+        w.end()
+        self.assertEqual(f.getvalue(),
+                         '<svg height="5cm" stroke-width=".02646" viewBox="0 0 10 5" width="10cm" '
+                         'xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">'
+                         '<g font-size=".3175"><text x=".5" y="-.12">a</text></g>'
+                         '<g stroke="black"><line x1="1" x2="1" y1="1" y2="3"/>'
+                         '<line x1="2" x2="3" y1="4" y2="4"/>'
+                         '<polyline points="1,1 1.5,2.25"/></g></svg>')
+
+    def test_minified_polyline(self):
+        f = io.StringIO()
+        w = writers.MinifiedWriter(f, precision=0.01)
+        #Collinear runs are merged; a reversal, e.g. a tick drawn out and back, is kept
+        w.polyline([(0, 0), (0, 1), (0, 1.001), (0, 2), (0, 3), (1, 3), (0, 3), (0, 4)])
+        self.assertEqual(f.getvalue(), '<polyline points="0,0 0,3 1,3 0,3 0,4"/>')
+
+    def test_precision(self):
+        srs = bar.emd.projection_parameters('+proj=merc +lon_0=0 +R=3396190 +units=m +no_defs')
+        full = bar.ScaleBar(srs, (0, 0, 180, 65), latlon=True, writer='stream').tobytes()
+        small = bar.ScaleBar(srs, (0, 0, 180, 65), latlon=True, precision=0.001).tobytes()
+        self.assertLess(len(small), len(full) / 2)
+        self.assertNotIn(b'<?xml', small)
+        self.assertIn(b'viewBox=', small)
+
+    def test_max_bytes(self):
+        srs = bar.emd.projection_parameters('+proj=merc +lon_0=0 +R=3396190 +units=m +no_defs')
+        outputname = os.path.join(self.path, 'budget.svg')
+        s = bar.ScaleBar(srs, (0, 0, 180, 65), latlon=True, precision=0.001, max_bytes=1000)
+        with self.assertRaisesRegex(ValueError, 'over the budget of 1000 bytes'):
+            s.save(outputname)
+        self.assertFalse(os.path.exists(outputname))
+        s.max_bytes = 10 ** 6
+        self.assertEqual(len(s.tobytes()), len(bar.ScaleBar(srs, (0, 0, 180, 65), latlon=True,
+                                                            precision=0.001).tobytes()))
@@ -0,0 +1,298 @@
+import itertools
+import math
+from xml.sax.saxutils import escape
+
+SVG_ATTRIBUTES = {'baseProfile': 'full', 'version': '1.1',
+                  'xmlns': 'http://www.w3.org/2000/svg',
+                  'xmlns:ev': 'http://www.w3.org/2001/xml-events',
+                  'xmlns:xlink': 'http://www.w3.org/1999/xlink'}
+
+#The number of line elements the stream writers join into one write call
+CHUNK = 1024
+
+class Unit(object):
+    """
+    Append a unit to values, e.g. 5 * cm gives '5cm'.  This formats values
+    exactly as svgwrite.Unit does, without importing svgwrite.
+    """
+    def __init__(self, unit):
+        self._unit = unit
+
+    def __rmul__(self, other):
+        return '%s%s' % (other, self._unit)
+
+cm = Unit('cm')
+
+#CSS user units (px) per cm
+PX_PER_CM = 96 / 2.54
+
+def _attributes(attribs):
+    """
+    Format SVG attributes the way svgwrite does; keyword style names are
+    converted (stroke_width to stroke-width), None and empty values are
+    dropped and the attributes are sorted.
+    """
+    formatted = {}
+    for key, value in attribs.items():
+        value = str(value) if value is not None else ''
+        if value:
+            formatted[key.rstrip('_').replace('_', '-')] = value
+    return ''.join(' {}="{}"'.format(k, escape(v, {'"': '&quot;'}))
+                   for k, v in sorted(formatted.items()))
+
+class SvgwriteWriter(object):
+    """
+    Writer backend that builds a validating svgwrite Drawing.
+
+    Parameters
+    ----------
+    filename : str
+               Name of the output file, used when the drawing is saved.
+
+    debug : bool
+            Passed to svgwrite to enable attribute validation (Default: True)
+
+    Attributes
+    ----------
+    dwg : object
+          The svgwrite Drawing, available once start has been called
+    """
+    #The user unit of the document
+    units = 'px'
+
+    def __init__(self, filename=None, debug=True):
+        self.filename = filename
+        self.debug = debug
+        self.dwg = None
+        self._parents = []
+
+    def start(self, size):
+        #svgwrite is slow to import and is only needed by this backend
+        import svgwrite as svg
+        self.dwg = svg.Drawing(self.filename, size=size, debug=self.debug)
+        self._parents = [self.dwg]
+
+    def group(self, **attribs):
+        g = self._parents[-1].add(self.dwg.g(**attribs))
+        self._parents.append(g)
+
+    def end_group(self):
+        self._parents.pop()
+
+    def line(self, start, end):
+        self._parents[-1].add(self.dwg.line(start=start, end=end))
+
+    def lines(self, x1, y1, x2, y2):
+        for start in zip(x1, y1, x2, y2):
+            self.line(start[:2], start[2:])
+
+    def polyline(self, points):
+        self._parents[-1].add(self.dwg.polyline(points))
+
+    def text(self, text, insert):
+        self._parents[-1].add(self.dwg.text(text, insert))
+
+    def image(self, href, insert, size):
+        self._parents[-1].add(self.dwg.image(href, insert=insert, size=size))
+
+    def end(self):
+        self._parents = []
+        return self.dwg
+
+class StreamWriter(object):
+    """
+    Writer backend that streams SVG text to a file-like object as each
+    element is produced.  No document tree is kept and no validation is
+    performed.  Output is identical to the SvgwriteWriter so long as the
+    elements are emitted in document order.
+
+    Parameters
+    ----------
+    fileobj : object
+              A writable, text mode file-like object
+    """
+    units = 'px'
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self._opentag = None
+
+    def _write(self, s):
+        #Open a pending group only once it is known to have children
+        if self._opentag is not None:
+            self.fileobj.write(self._opentag)
+            self._opentag = None
+        self.fileobj.write(s)
+
+    def start(self, size):
+        attribs = dict(SVG_ATTRIBUTES)
+        attribs['width'], attribs['height'] = size
+        self.fileobj.write('<?xml version="1.0" encoding="utf-8" ?>\n')
+        self._write('<svg{}><defs />'.format(_attributes(attribs)))
+
+    def group(self, **attribs):
+        self._write('')
+        self._opentag = '<g{}>'.format(_attributes(attribs))
+
+    def end_group(self):
+        if self._opentag is not None:
+            self.fileobj.write(self._opentag[:-1] + ' />')
+            self._opentag = None
+        else:
+            self.fileobj.write('</g>')
+
+    def line(self, start, end):
+        self._write('<line{} />'.format(_attributes({'x1': start[0], 'y1': start[1],
+                                                     'x2': end[0], 'y2': end[1]})))
+
+    def lines(self, x1, y1, x2, y2):
+        """
+        Write a batch of line elements, from (x1, y1) to (x2, y2), with
+        one write call per CHUNK elements
+        """
+        coords = zip(x1, x2, y1, y2)
+        while True:
+            chunk = ''.join('<line x1="{}" x2="{}" y1="{}" y2="{}" />'.format(*c)
+                            for c in itertools.islice(coords, CHUNK))
+            if not chunk:
+                break
+            self._write(chunk)
+
+    def polyline(self, points):
+        points = ' '.join('{},{}'.format(x, y) for x, y in points)
+        self._write('<polyline{} />'.format(_attributes({'points': points})))
+
+    def text(self, text, insert):
+        self._write('<text{}>{}</text>'.format(_attributes({'x': insert[0], 'y': insert[1]}),
+                                               escape(text)))
+
+    def image(self, href, insert, size):
+        self._write('<image{} />'.format(_attributes({'x': insert[0], 'y': insert[1],
+                                                      'width': size[0], 'height': size[1],
+                                                      'xlink:href': href})))
+
+    def end(self):
+        self._write('</svg>')
+        return self.fileobj
+
+class MinifiedWriter(StreamWriter):
+    """
+    Stream writer backend for compact output.  The document is drawn in a
+    cm viewBox, so coordinates carry no unit, and every coordinate is
+    quantized to precision cm and written with as few characters as
+    possible.  The XML declaration, optional root attributes, empty groups
+    and segments that quantize to a point are dropped.
+
+    Parameters
+    ----------
+    fileobj : object
+              A writable, text mode file-like object
+
+    precision : float
+                The coordinate resolution, in cm (Default: 0.001)
+    """
+    units = 'cm'
+
+    def __init__(self, fileobj, precision=0.001):
+        super(MinifiedWriter, self).__init__(fileobj)
+        self.precision = precision
+        self._decimals = max(0, int(math.ceil(-math.log10(precision) - 1e-9)))
+
+    @staticmethod
+    def _strip(s):
+        #Trailing and leading zeros, e.g. 0.500 to .5
+        if '.' in s:
+            s = s.rstrip('0').rstrip('.')
+        if s.startswith('0.'):
+            s = s[1:]
+        elif s.startswith('-0.'):
+            s = '-' + s[2:]
+        return '0' if s in ('', '-0') else s
+
+    def _number(self, value):
+        if isinstance(value, str):
+            value = float(value[:-2] if value.endswith('cm') else value)
+        value = round(value / self.precision) * self.precision
+        return self._strip('{:.{}f}'.format(value, self._decimals))
+
+    def _size(self, value):
+        #Widths and font sizes keep four significant digits regardless of precision
+        return self._strip('{:.4g}'.format(value))
+
+    def start(self, size):
+        width, height = [self._number(s) for s in size]
+        attribs = {'xmlns': SVG_ATTRIBUTES['xmlns'], 'xmlns:xlink': SVG_ATTRIBUTES['xmlns:xlink'],
+                   'width': width + 'cm', 'height': height + 'cm',
+                   'viewBox': '0 0 {} {}'.format(width, height),
+                   'stroke-width': self._size(1 / PX_PER_CM)}
+        self._write('<svg{}>'.format(_attributes(attribs)))
+
+    def group(self, **attribs):
+        if 'font_size' in attribs:
+            attribs['font_size'] = self._size(float(attribs['font_size']) / PX_PER_CM)
+        super(MinifiedWriter, self).group(**attribs)
+
+    def end_group(self):
+        if self._opentag is not None:
+            self._opentag = None
+        else:
+            self.fileobj.write('</g>')
+
+    def line(self, start, end):
+        self.lines([start[0]], [start[1]], [end[0]], [end[1]])
+
+    def lines(self, x1, y1, x2, y2):
+        #Consecutive collinear segments, e.g. along the vertical, are merged
+        segments = []
+        for coords in zip(x1, y1, x2, y2):
+            coords = [self._number(c) for c in coords]
+            start, end = coords[:2], coords[2:]
+            if start == end:
+                continue
+            if segments and segments[-1][1] == start and self._extends(segments[-1][0], start, end):
+                segments[-1][1] = end
+                continue
+            segments.append([start, end])
+            if len(segments) > CHUNK:
+                #The last segment is held back as the next may extend it
+                self._segments(segments[:-1])
+                del segments[:-1]
+        self._segments(segments)
+
+    @staticmethod
+    def _extends(a, b, p):
+        #Whether p continues the quantized segment a to b in the same direction
+        (ax, ay), (bx, by), (px, py) = [[float(v) for v in point] for point in (a, b, p)]
+        cross = (bx - ax) * (py - by) - (by - ay) * (px - bx)
+        dot = (bx - ax) * (px - bx) + (by - ay) * (py - by)
+        return cross == 0 and dot > 0
+
+    def _segments(self, segments):
+        if segments:
+            self._write(''.join('<line x1="{}" x2="{}" y1="{}" y2="{}"/>'.format(a[0], b[0], a[1], b[1])
+                                for a, b in segments))
+
+    def polyline(self, points):
+        #Repeated nodes are dropped and, as in lines, collinear runs are merged
+        nodes = []
+        for x, y in points:
+            node = [self._number(x), self._number(y)]
+            if nodes and nodes[-1] == node:
+                continue
+            if len(nodes) > 1 and self._extends(nodes[-2], nodes[-1], node):
+                nodes[-1] = node
+                continue
+            nodes.append(node)
+        if len(nodes) > 1:
+            self._write('<polyline points="{}"/>'.format(' '.join('{},{}'.format(*n) for n in nodes)))
+
+    def text(self, text, insert):
+        self._write('<text x="{}" y="{}">{}</text>'.format(self._number(insert[0]),
+                                                          self._number(insert[1]), escape(text)))
+
+    def image(self, href, insert, size):
+        self._write('<image{}/>'.format(_attributes({'x': self._number(insert[0]),
+                                                     'y': self._number(insert[1]),
+                                                     'width': self._number(size[0]),
+                                                     'height': self._number(size[1]),
+                                                     'xlink:href': href})))
@@ -0,0 +1 @@
+from .batch import read_manifest, validate_job, run_batch, run_job, render_many, render_job, create_scalebar, JobResult
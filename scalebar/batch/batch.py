@@ -0,0 +1,396 @@
+import collections
+import csv
+import json
+import os
+import signal
+import tempfile
+import threading
+from concurrent import futures
+
+from scalebar.bar import bar
+from scalebar.bar.cache import ScaleBarCache
+from scalebar.utils.stats import Stats
+
+JobResult = collections.namedtuple('JobResult', ['index', 'job', 'status', 'attempts', 'error'])
+
+#The ScaleBarCache of each cache directory used by this process, reused
+#across jobs so that a worker walks a shared cache once, not once per job
+_caches = {}
+
+def _coerce(value):
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+def validate_job(job):
+    """
+    Check that a job provides the parameters needed to create a scale bar
+
+    Parameters
+    ----------
+    job : dict
+          Job parameters, see read_manifest
+
+    Raises
+    ------
+    ValueError
+        If the job is not a dict, has no inputds or outputname, or is a
+        projection string job without an extent
+    """
+    if not isinstance(job, dict):
+        raise ValueError('A job must be an object, got {}.'.format(type(job).__name__))
+    for key in ('inputds', 'outputname'):
+        if job.get(key) is None:
+            raise ValueError('The job has no {}.'.format(key))
+    inputds = job['inputds']
+    if isinstance(inputds, str) and not os.path.exists(inputds) and job.get('extent') is None:
+        raise ValueError('The job has no extent, which a projection string requires.')
+
+def read_manifest(manifest):
+    """
+    Lazily read scale bar jobs from a manifest file.  Files ending in .csv
+    are read as CSV with a header row, anything else as JSON lines.
+
+    Each job must provide an inputds (an image path or a projection string)
+    and an outputname.  Projection string jobs also need an extent.  All other
+    keys are passed to the ScaleBar constructor.  CSV values are decoded as
+    JSON where possible, e.g. an extent of [0, 0, 180, 65].  Jobs built in
+    code may pass a GeoHeader snapshot as the inputds.
+
+    Parameters
+    ----------
+    manifest : str
+               Path to the manifest
+
+    Yields
+    ------
+    job : dict
+          The job parameters
+
+    Raises
+    ------
+    ValueError
+        If a line is not valid JSON or its job is invalid, see
+        validate_job.  The message names the manifest and the line.
+    """
+    def check(job, lineno):
+        try:
+            validate_job(job)
+        except ValueError as e:
+            raise ValueError('{}:{}: {}'.format(manifest, lineno, e)) from None
+        return job
+
+    with open(manifest, 'r') as f:
+        if os.path.splitext(manifest)[1].lower() == '.csv':
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield check({k: _coerce(v) for k, v in row.items() if v}, reader.line_num)
+        else:
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    try:
+                        job = json.loads(line)
+                    except ValueError as e:
+                        raise ValueError('{}:{}: {}'.format(manifest, lineno, e)) from None
+                    yield check(job, lineno)
+
+def create_scalebar(job):
+    """
+    Create a scale bar from a job.  The scale bar is rendered and saved
+    only if the job has an outputname.
+
+    Parameters
+    ----------
+    job : dict
+          Job parameters, see read_manifest
+
+    Returns
+    -------
+     : object
+       ScaleBar
+    """
+    kwargs = dict(job)
+    inputds = kwargs.pop('inputds')
+    if not isinstance(inputds, str) or os.path.exists(inputds):
+        return bar.ScaleBar.from_image(inputds, **kwargs)
+    extent = kwargs.pop('extent')
+    return bar.ScaleBar.from_projstring(inputds, extent, **kwargs)
+
+def run_job(job, cache=None):
+    """
+    Generate and save a single scale bar.  Jobs are validated first, see
+    validate_job, so a job without an outputname fails instead of
+    rendering a scale bar that is never saved.
+
+    Parameters
+    ----------
+    job : dict
+          Job parameters, see read_manifest
+
+    cache : str
+            A ScaleBarCache directory shared by all jobs
+
+    Returns
+    -------
+     : str
+       The output file name
+    """
+    validate_job(job)
+    if cache is not None:
+        if cache not in _caches:
+            _caches[cache] = ScaleBarCache(cache)
+        job = dict(job, cache=_caches[cache])
+    return create_scalebar(job).outputname
+
+def _profile_job(job, cache=None, memory=False):
+    """
+    Run a job in a worker process, returning the phases it recorded,
+    see Stats.as_dict, for the coordinating process to merge.
+    """
+    stats = Stats(memory=memory)
+    run_job(dict(job, stats=stats), cache)
+    return stats.as_dict()
+
+def _write(outputname, data):
+    #Written to a temporary file and renamed into place, so a crash or a
+    #concurrent job on the same path never leaves a partial document
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(outputname)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, outputname)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+def render_job(job, cache=None, stats=None):
+    """
+    Render a single scale bar to memory and, if the job has an
+    outputname, atomically write it out.  The scale bar, and any dataset
+    handle it opens, belong to the calling thread only.
+
+    Parameters
+    ----------
+    job : dict
+          Job parameters, see read_manifest
+
+    cache : object
+            A ScaleBarCache or a cache directory
+
+    stats : object
+            A Stats object into which the phases of the job are recorded
+
+    Returns
+    -------
+     : bytes
+       The UTF-8 encoded SVG document
+    """
+    job = dict(job)
+    outputname = job.pop('outputname', None)
+    if cache is not None:
+        job['cache'] = cache if isinstance(cache, ScaleBarCache) else ScaleBarCache(cache)
+    if stats is not None:
+        job['stats'] = stats
+    data = create_scalebar(job).tobytes()
+    if outputname is not None:
+        _write(outputname, data)
+    return data
+
+def render_many(jobs, max_workers=None, cache=None, stats=None):
+    """
+    Render scale bar jobs concurrently on a thread pool, e.g. inside a
+    threaded web server where a process pool is not an option.
+
+    Jobs share no mutable state.  Each job builds its own ScaleBar, opens
+    its own dataset handle if it reads an image and records into its own
+    Stats.  The parsed projection parameters are shared read-only, and
+    the NumPy and pyproj array work, which releases the GIL, overlaps
+    across threads.
+
+    Parameters
+    ----------
+    jobs : iterable
+           of job dicts, see read_manifest.  The outputname is optional.
+
+    max_workers : int
+                  The number of threads (Default: the ThreadPoolExecutor
+                  default)
+
+    cache : object
+            A ScaleBarCache or a cache directory shared by all jobs
+
+    stats : object
+            A Stats object into which the phases of all of the jobs are
+            merged.  Times are wall times, so overlapping jobs add up to
+            more than the elapsed time.
+
+    Returns
+    -------
+     : list
+       of the rendered SVG documents, as bytes, in the order of the jobs.
+       The first exception raised by a job is re-raised once the
+       remaining jobs have finished.
+    """
+    if cache is not None and not isinstance(cache, ScaleBarCache):
+        cache = ScaleBarCache(cache)
+    lock = threading.Lock()
+
+    def render(job):
+        if stats is None:
+            return render_job(job, cache=cache)
+        jobstats = Stats()
+        try:
+            return render_job(job, cache=cache, stats=jobstats)
+        finally:
+            with lock:
+                stats.merge(jobstats)
+
+    with futures.ThreadPoolExecutor(max_workers) as executor:
+        pending = [executor.submit(render, job) for job in jobs]
+        futures.wait(pending)
+    return [future.result() for future in pending]
+
+def _initworker():
+    """
+    Process pool initializer.  Interrupts are left to the coordinating
+    process.  The one off per process costs, registering the GDAL drivers
+    when GDAL is installed and opening the PROJ database, are paid here
+    rather than by the first job of each worker.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import pyproj
+    crs = pyproj.CRS('+proj=longlat +R=1 +no_defs')
+    pyproj.Transformer.from_crs(crs, crs.geodetic_crs, always_xy=True)
+    try:
+        from osgeo import gdal
+    except ImportError:
+        return
+    gdal.AllRegister()
+
+def _cancelled(cancel):
+    return cancel is not None and cancel.is_set()
+
+def run_batch(jobs, processes=None, retries=0, progress=None, cancel=None, max_pending=None,
+              cache=None, stats=None):
+    """
+    Run scale bar jobs on a process pool, yielding the status of each
+    job as it completes.  Jobs are consumed lazily and at most max_pending
+    are in flight at once, so memory use does not grow with the batch.
+
+    Parameters
+    ----------
+    jobs : iterable
+           of job dicts, e.g. from read_manifest
+
+    processes : int
+                The number of worker processes (Default: the number of CPUs)
+
+    retries : int
+              The number of times a failed job is resubmitted
+
+    progress : callable
+               Called as progress(ncompleted, result) after each job
+
+    cancel : object
+             An Event-like object.  Once set, no further jobs are submitted,
+             queued jobs are reported as cancelled and running jobs finish.
+             A KeyboardInterrupt while waiting on the jobs does the same and
+             is re-raised once every submitted job has been reported.
+
+    max_pending : int
+                  The maximum number of submitted, unfinished jobs
+                  (Default: 2 * processes)
+
+    cache : str
+            A ScaleBarCache directory.  Workers share the cache, so
+            repeated jobs are rendered only once.
+
+    stats : object
+            A Stats object into which the phases of the successful jobs are
+            merged as they complete.  Each worker records into its own
+            Stats, tracing allocations if stats.memory is set.
+
+    Yields
+    ------
+    result : object
+             JobResult namedtuple with the job index, the job, a status of
+             'success', 'failed' or 'cancelled', the number of attempts and
+             the exception raised by the last failed attempt
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if max_pending is None:
+        max_pending = processes * 2
+
+    jobs = enumerate(jobs)
+    pending = {}
+    ncompleted = 0
+    exhausted = False
+    interrupted = False
+
+    def stopping():
+        return interrupted or _cancelled(cancel)
+
+    def submit(job):
+        if stats is None:
+            return executor.submit(run_job, job, cache)
+        return executor.submit(_profile_job, job, cache, stats.memory)
+
+    with futures.ProcessPoolExecutor(processes, initializer=_initworker) as executor:
+        try:
+            while True:
+                while not exhausted and len(pending) < max_pending and not stopping():
+                    try:
+                        index, job = next(jobs)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending[submit(job)] = (index, job, 1)
+
+                if stopping():
+                    for future in list(pending):
+                        if future.cancel():
+                            index, job, attempts = pending.pop(future)
+                            ncompleted += 1
+                            result = JobResult(index, job, 'cancelled', attempts - 1, None)
+                            if progress is not None:
+                                progress(ncompleted, result)
+                            yield result
+
+                if not pending:
+                    break
+
+                try:
+                    done, _ = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+                except KeyboardInterrupt:
+                    #The first interrupt cancels the batch, a second one abandons it
+                    if interrupted:
+                        raise
+                    interrupted = True
+                    continue
+                for future in done:
+                    index, job, attempts = pending.pop(future)
+                    error = future.exception()
+                    if error is not None and attempts <= retries and not stopping():
+                        pending[submit(job)] = (index, job, attempts + 1)
+                        continue
+
+                    if error is None and stats is not None:
+                        stats.merge(future.result())
+                    status = 'success' if error is None else 'failed'
+                    ncompleted += 1
+                    result = JobResult(index, job, status, attempts, error)
+                    if progress is not None:
+                        progress(ncompleted, result)
+                    yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+    if interrupted:
+        raise KeyboardInterrupt
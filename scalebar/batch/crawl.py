@@ -0,0 +1,197 @@
+import collections
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from concurrent import futures
+
+from scalebar.bar.cache import signature
+from scalebar.batch import batch
+from scalebar.metadata import extract_metadata as emd
+
+RASTER_EXTENSIONS = ('.tif', '.tiff', '.cub', '.img', '.jp2', '.vrt')
+
+#Default name of the manifest, written to the output directory
+MANIFEST = 'scalebars.json'
+
+CrawlResult = collections.namedtuple('CrawlResult', ['rendered', 'linked', 'unchanged', 'failed'])
+
+def find_rasters(directory, extensions=RASTER_EXTENSIONS):
+    """
+    Walk a directory tree, in sorted order, yielding the paths of the files
+    with a raster extension
+
+    Parameters
+    ----------
+    directory : str
+                The root of the tree
+
+    extensions : iterable
+                 Lower case file extensions, including the dot
+
+    Yields
+    ------
+    path : str
+    """
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in extensions:
+                yield os.path.join(root, name)
+
+def read_crawl_manifest(manifest):
+    """
+    Read a crawl manifest, or return an empty one if it does not exist
+    """
+    try:
+        with open(manifest, 'r') as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return {'options': None, 'files': {}}
+
+def write_crawl_manifest(manifest, record):
+    """
+    Atomically write a crawl manifest
+    """
+    directory = os.path.dirname(os.path.abspath(manifest))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(record, f, indent=1, sort_keys=True)
+        os.replace(tmp, manifest)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def link(source, destination):
+    """
+    Hard link destination to source, falling back to a copy where hard
+    links are not supported, e.g. across file systems
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(destination)), exist_ok=True)
+    _remove(destination)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+def crawl(directory, outputdir, manifest=None, extensions=RASTER_EXTENSIONS, max_workers=None,
+          **options):
+    """
+    Generate a scale bar for every raster in a directory tree, mirroring
+    the tree under outputdir, e.g. a/b.tif to outputdir/a/b.svg.
+
+    Only the headers of the rasters are read.  Inputs are grouped by the
+    signature of their normalized spatial reference, extent and options;
+    each unique scale bar is rendered once, on a thread pool, and hard
+    linked to the outputs of the other inputs in its group.
+
+    The mtime, size and signature of every input are kept in a manifest,
+    so a rerun only reads the headers of new or changed files and only
+    renders signatures without an up to date output.  Changing the options
+    reprocesses everything.
+
+    Parameters
+    ----------
+    directory : str
+                The root of the raster tree
+
+    outputdir : str
+                The directory the scale bars are written to
+
+    manifest : str
+               Path to the manifest (Default: outputdir/scalebars.json)
+
+    extensions : iterable
+                 Lower case raster file extensions, including the dot
+
+    max_workers : int
+                  The number of rendering threads
+
+    options : dict
+              ScaleBar parameters applied to every scale bar
+
+    Returns
+    -------
+     : object
+       CrawlResult namedtuple listing the input paths that were rendered,
+       linked to a duplicate and unchanged, and (path, exception) tuples
+       for those that failed
+    """
+    from scalebar.fileio import gdalio
+    if manifest is None:
+        manifest = os.path.join(outputdir, MANIFEST)
+    os.makedirs(outputdir, exist_ok=True)
+    previous = read_crawl_manifest(manifest)
+    optionshash = hashlib.sha256(json.dumps(options, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    if previous.get('options') != optionshash:
+        previous = {'files': {}}
+
+    entries = {}
+    existing = {}
+    groups = collections.OrderedDict()
+    result = CrawlResult([], [], [], [])
+    for path in find_rasters(directory, extensions):
+        rel = os.path.relpath(path, directory)
+        outputrel = os.path.splitext(rel)[0] + '.svg'
+        outputname = os.path.join(outputdir, outputrel)
+        st = os.stat(path)
+        old = previous['files'].get(rel)
+        if (old is not None and old['mtime'] == st.st_mtime and old['size'] == st.st_size and
+                os.path.exists(outputname)):
+            entries[rel] = old
+            existing.setdefault(old['signature'], outputname)
+            result.unchanged.append(path)
+            continue
+        try:
+            header = gdalio.read_header(path)
+            extent = [v for corner in header.extent for v in corner]
+            sig = signature(emd.projection_parameters(header.projection, backend='osr'), extent,
+                            **options)
+        except Exception as e:
+            result.failed.append((path, e))
+            continue
+        entries[rel] = {'mtime': st.st_mtime, 'size': st.st_size, 'signature': sig,
+                        'outputname': outputrel}
+        groups.setdefault(sig, (header, []))[1].append((path, rel, outputname))
+
+    pending = {}
+    with futures.ThreadPoolExecutor(max_workers) as executor:
+        for sig, (header, inputs) in groups.items():
+            if sig in existing:
+                continue
+            path, rel, outputname = inputs[0]
+            os.makedirs(os.path.dirname(os.path.abspath(outputname)), exist_ok=True)
+            #The old output may be hard linked to the outputs of unchanged inputs
+            _remove(outputname)
+            job = dict(options, inputds=header, outputname=outputname)
+            pending[executor.submit(batch.render_job, job)] = sig
+        for future in futures.as_completed(pending):
+            sig = pending[future]
+            inputs = groups[sig][1]
+            error = future.exception()
+            if error is not None:
+                for path, rel, outputname in inputs:
+                    result.failed.append((path, error))
+                    del entries[rel]
+                continue
+            existing[sig] = inputs[0][2]
+            result.rendered.append(inputs[0][0])
+            groups[sig] = (groups[sig][0], inputs[1:])
+
+    for sig, (header, inputs) in groups.items():
+        if sig not in existing:
+            continue
+        for path, rel, outputname in inputs:
+            link(existing[sig], outputname)
+            result.linked.append(path)
+
+    write_crawl_manifest(manifest, {'options': optionshash, 'files': entries})
+    return result
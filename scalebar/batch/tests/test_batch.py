@@ -0,0 +1,153 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from concurrent import futures
+from unittest import mock
+
+from .. import batch
+
+WKT = """PROJCS["Mercator_MARS",GEOGCS["GCS_MARS",DATUM["MARS",SPHEROID["MARS",3396190,169.8944472236118]],PRIMEM["Reference_Meridian",0],UNIT["Degree",0.017453292519943295]],PROJECTION["Mercator_1SP"],PARAMETER["central_meridian",0],PARAMETER["false_easting",0],PARAMETER["false_northing",0],UNIT["Meter",1],PARAMETER["latitude_of_origin",0.0]]"""
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.jobs = [{'inputds': WKT, 'extent': [0, 0, 180, 65], 'nnodes': 11,
+                      'outputname': os.path.join(self.path, 'merc{}.svg'.format(i))} for i in range(3)]
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_read_jsonlines(self):
+        manifest = os.path.join(self.path, 'manifest.jsonl')
+        with open(manifest, 'w') as f:
+            f.write('# comment\n')
+            for job in self.jobs:
+                f.write(json.dumps(job) + '\n')
+        self.assertEqual(list(batch.read_manifest(manifest)), self.jobs)
+
+    def test_read_csv(self):
+        manifest = os.path.join(self.path, 'manifest.csv')
+        image = os.path.join(self.path, 'image.tif')
+        open(image, 'w').close()
+        with open(manifest, 'w') as f:
+            f.write('inputds,outputname,extent,mapscale,cliplat\n')
+            f.write('{},image.svg,,2e6,\n'.format(image))
+            f.write('"{}",merc.svg,"[0, 0, 180, 65]",,-5\n'.format(WKT.replace('"', '""')))
+        jobs = list(batch.read_manifest(manifest))
+        self.assertEqual(jobs[0], {'inputds': image, 'outputname': 'image.svg', 'mapscale': 2e6})
+        self.assertEqual(jobs[1], {'inputds': WKT, 'outputname': 'merc.svg',
+                                   'extent': [0, 0, 180, 65], 'cliplat': -5})
+
+    def test_invalid_manifest(self):
+        manifest = os.path.join(self.path, 'manifest.jsonl')
+        for line, message in [({'extent': [0, 0, 180, 65], 'outputname': 'a.svg'}, 'no inputds'),
+                              ({'inputds': WKT, 'extent': [0, 0, 180, 65]}, 'no outputname'),
+                              ({'inputds': WKT, 'outputname': 'a.svg'}, 'no extent'),
+                              ('{not json', ''),
+                              ([1, 2], 'must be an object')]:
+            with open(manifest, 'w') as f:
+                f.write(json.dumps(self.jobs[0]) + '\n')
+                f.write('# comment\n')
+                f.write((line if isinstance(line, str) else json.dumps(line)) + '\n')
+            jobs = batch.read_manifest(manifest)
+            self.assertEqual(next(jobs), self.jobs[0])
+            with self.assertRaisesRegex(ValueError, '{}:3: .*{}'.format(manifest, message)):
+                next(jobs)
+
+    def test_invalid_csv(self):
+        manifest = os.path.join(self.path, 'manifest.csv')
+        with open(manifest, 'w') as f:
+            f.write('inputds,outputname,extent\n')
+            f.write('"{}",merc.svg,"[0, 0, 180, 65]"\n'.format(WKT.replace('"', '""')))
+            f.write('"{}",,"[0, 0, 180, 65]"\n'.format(WKT.replace('"', '""')))
+        with self.assertRaisesRegex(ValueError, ':3: The job has no outputname'):
+            list(batch.read_manifest(manifest))
+
+    def test_run_job_requires_outputname(self):
+        job = dict(self.jobs[0])
+        del job['outputname']
+        with self.assertRaisesRegex(ValueError, 'no outputname'):
+            batch.run_job(job)
+
+    def test_initworker(self):
+        with mock.patch.object(batch.signal, 'signal') as sig:
+            batch._initworker()
+        sig.assert_called_once_with(batch.signal.SIGINT, batch.signal.SIG_IGN)
+
+    def test_run_batch(self):
+        results = sorted(batch.run_batch(iter(self.jobs), processes=2), key=lambda r: r.index)
+        self.assertEqual([r.status for r in results], ['success'] * 3)
+        for job in self.jobs:
+            self.assertTrue(os.path.exists(job['outputname']))
+
+    def test_run_batch_stats(self):
+        stats = batch.Stats(memory=True)
+        results = list(batch.run_batch(self.jobs, processes=2, stats=stats))
+        self.assertEqual([r.status for r in results], ['success'] * 3)
+        self.assertEqual(stats.phases['geometry'].calls, 3)
+        self.assertGreater(stats.phases['geometry'].peak_memory, 0)
+
+    def test_retries(self):
+        progress = []
+        job = {'inputds': 'not a projection', 'extent': [0, 0, 180, 65],
+               'outputname': os.path.join(self.path, 'bad.svg')}
+        results = list(batch.run_batch([job], processes=1, retries=2,
+                                       progress=lambda n, r: progress.append(n)))
+        self.assertEqual(results[0].status, 'failed')
+        self.assertEqual(results[0].attempts, 3)
+        self.assertIsNotNone(results[0].error)
+        self.assertEqual(progress, [1])
+
+    def test_cancel(self):
+        cancel = threading.Event()
+        cancel.set()
+        results = list(batch.run_batch(self.jobs, processes=1, cancel=cancel))
+        self.assertEqual(results, [])
+
+    def test_interrupt(self):
+        jobs = [dict(self.jobs[0], outputname=os.path.join(self.path, 'int{}.svg'.format(i)))
+                for i in range(6)]
+        wait = futures.wait
+        calls = []
+
+        def interrupt(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                raise KeyboardInterrupt
+            return wait(*args, **kwargs)
+
+        results = []
+        with mock.patch.object(batch.futures, 'wait', side_effect=interrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                for result in batch.run_batch(jobs, processes=1, max_pending=6):
+                    results.append(result)
+        #Every submitted job is reported, the queued ones as cancelled
+        self.assertEqual(sorted(r.index for r in results), list(range(6)))
+        self.assertIn('cancelled', [r.status for r in results])
+
+    def test_render_many(self):
+        jobs = [dict(job, extent=[0, 0, 180, 50 + i],
+                     outputname=os.path.join(self.path, 'many{}.svg'.format(i)))
+                for i, job in enumerate(self.jobs * 3)]
+        stats = batch.Stats()
+        results = batch.render_many(jobs, max_workers=4, stats=stats)
+        self.assertEqual(len(results), len(jobs))
+        for job, data in zip(jobs, results):
+            expected = dict(job)
+            expected.pop('outputname')
+            self.assertEqual(data, batch.create_scalebar(expected).tobytes())
+        for job, data in zip(jobs, results):
+            with open(job['outputname'], 'rb') as f:
+                self.assertEqual(f.read(), data)
+        self.assertFalse([name for name in os.listdir(self.path) if name.endswith('.tmp')])
+        self.assertEqual(stats.phases['geometry'].calls, len(jobs))
+
+    def test_render_many_error(self):
+        jobs = self.jobs + [{'inputds': 'not a projection', 'extent': [0, 0, 180, 65]}]
+        self.assertRaises(Exception, batch.render_many, jobs, max_workers=2)
+        for job in self.jobs:
+            self.assertTrue(os.path.exists(job['outputname']))
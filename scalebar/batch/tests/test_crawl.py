@@ -0,0 +1,74 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from scalebar.examples import get_path
+from .. import crawl
+
+
+class TestCrawl(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.src = os.path.join(self.path, 'src')
+        self.out = os.path.join(self.path, 'out')
+        os.makedirs(os.path.join(self.src, 'a', 'b'))
+        with open(os.path.join(self.src, 'notes.txt'), 'w') as f:
+            f.write('not a raster')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def populate(self):
+        #Two copies of one image form a group, the other image its own group
+        merc = get_path('MOLA128Hillshade_Mercator_test.tif')
+        lamb = get_path('Lunar_LRO_LOLA_Shade_MAP2_90.0N20.0_LAMB.tif')
+        for source, rel in [(merc, 'merc.tif'), (merc, os.path.join('a', 'merc_band2.tif')),
+                            (lamb, os.path.join('a', 'b', 'lamb.tif'))]:
+            shutil.copyfile(source, os.path.join(self.src, rel))
+
+    def test_find_rasters(self):
+        for rel in ['merc.tif', os.path.join('a', 'merc_band2.TIF'), os.path.join('a', 'b', 'lamb.cub')]:
+            open(os.path.join(self.src, rel), 'w').close()
+        self.assertEqual([os.path.relpath(p, self.src) for p in crawl.find_rasters(self.src)],
+                         ['merc.tif', os.path.join('a', 'merc_band2.TIF'),
+                          os.path.join('a', 'b', 'lamb.cub')])
+
+    def test_link(self):
+        source = os.path.join(self.path, 'source.svg')
+        with open(source, 'w') as f:
+            f.write('<svg />')
+        destination = os.path.join(self.path, 'c', 'destination.svg')
+        crawl.link(source, destination)
+        self.assertTrue(os.path.samefile(source, destination))
+
+    def test_crawl(self):
+        self.populate()
+        result = crawl.crawl(self.src, self.out, nnodes=11)
+        self.assertEqual(len(result.rendered), 2)
+        self.assertEqual(result.linked, [os.path.join(self.src, 'a', 'merc_band2.tif')])
+        self.assertEqual(result.failed, [])
+        self.assertTrue(os.path.samefile(os.path.join(self.out, 'merc.svg'),
+                                         os.path.join(self.out, 'a', 'merc_band2.svg')))
+        self.assertTrue(os.path.exists(os.path.join(self.out, 'a', 'b', 'lamb.svg')))
+        with open(os.path.join(self.out, crawl.MANIFEST)) as f:
+            manifest = json.load(f)
+        self.assertEqual(len(manifest['files']), 3)
+
+    def test_rerun(self):
+        self.populate()
+        crawl.crawl(self.src, self.out, nnodes=11)
+        result = crawl.crawl(self.src, self.out, nnodes=11)
+        self.assertEqual((result.rendered, result.linked, len(result.unchanged)), ([], [], 3))
+
+        #A changed file is reprocessed and, as its signature is unchanged, linked
+        changed = os.path.join(self.src, 'merc.tif')
+        os.utime(changed, (time.time() + 10, time.time() + 10))
+        result = crawl.crawl(self.src, self.out, nnodes=11)
+        self.assertEqual((result.rendered, result.linked, len(result.unchanged)), ([], [changed], 2))
+
+        #New options reprocess everything
+        result = crawl.crawl(self.src, self.out, nnodes=21)
+        self.assertEqual((len(result.rendered), len(result.linked)), (2, 1))
@@ -1,54 +1,181 @@
+import threading
+
+import numpy as np
 from osgeo import gdal
 from osgeo import osr
 
 from scalebar.metadata import extract_metadata as em
+from scalebar.utils.stats import phase
+
+class GeoHeader(object):
+    """
+    A compact, pickleable snapshot of the header of a GeoDataSet.  The
+    snapshot holds no dataset handle, so it can be shipped cheaply to
+    worker processes in place of the dataset itself.
+
+    Attributes
+    ----------
+    filename : str
+
+    geotransform : tuple
+
+    rastersize : tuple
+                 (xsize, ysize)
+
+    projection : str
+                 The projection WKT
+
+    ndv : float
+          The no data value of the first band
+
+    unittype : str
+               The unit type of the first band
+
+    spheroid : tuple
+               semi-major, semi-minor, invflattening
+
+    standardparallels : list
+
+    central_meridian : float
+    """
+    __slots__ = ('filename', 'geotransform', 'rastersize', 'projection', 'ndv',
+                 'unittype', 'spheroid', 'standardparallels', 'central_meridian')
+
+    def __init__(self, filename, geotransform, rastersize, projection, ndv,
+                 unittype, spheroid, standardparallels, central_meridian):
+        self.filename = filename
+        self.geotransform = geotransform
+        self.rastersize = rastersize
+        self.projection = projection
+        self.ndv = ndv
+        self.unittype = unittype
+        self.spheroid = spheroid
+        self.standardparallels = standardparallels
+        self.central_meridian = central_meridian
+
+    def __repr__(self):
+        return 'GeoHeader({!r})'.format(self.filename)
+
+    @property
+    def extent(self):
+        gt = self.geotransform
+        minx = gt[0]
+        maxy = gt[3]
+
+        maxx = minx + gt[1] * self.rastersize[0]
+        miny = maxy + gt[5] * self.rastersize[1]
+        return [(minx, miny), (maxx, maxy)]
+
+def read_header(filename, stats=None):
+    """
+    Read the header of a dataset in one pass and release the dataset.
+
+    Parameters
+    ----------
+    filename : str
+               Path to the dataset
+
+    stats : object
+            A Stats object recording the open, spatial reference
+            and header phases
+
+    Returns
+    -------
+     : object
+       GeoHeader snapshot
+    """
+    ds = GeoDataSet(filename, stats=stats)
+    with phase(stats, 'header'):
+        header = ds.header()
+    ds.ds = None
+    return header
 
 class GeoDataSet(object):
-    def __init__(self, filename):
+    """
+    A GeoDataSet may be shared by threads.  A GDAL dataset handle can only
+    be used by one thread at a time, so each thread opens, on first use,
+    its own handle to the file, as it does its own OSR coordinate
+    transformations.  Header values are read once and shared.
+
+    Parameters
+    ----------
+    filename : str
+               Path to the dataset
+
+    stats : object
+            A Stats object recording the open, spatial_reference and
+            transform phases (Default: None, no instrumentation)
+    """
+    def __init__(self, filename, stats=None):
         self.filename = filename
-        self.ds = gdal.Open(filename)
+        self.stats = stats
+        self._local = threading.local()
+        #Open the handle of the creating thread eagerly, as before
+        self.ds
+
+    @property
+    def ds(self):
+        """
+        The GDAL dataset handle of the calling thread.  Setting it to None
+        releases the handle; it is reopened if used again.
+        """
+        if getattr(self._local, 'ds', None) is None:
+            with phase(self.stats, 'open'):
+                self._local.ds = gdal.Open(self.filename)
+        return self._local.ds
+
+    @ds.setter
+    def ds(self, ds):
+        self._local.ds = ds
 
     @property
     def geotransform(self):
-        if not getattr(self, '_geotransform', None):
+        if getattr(self, '_geotransform', None) is None:
             self._geotransform = self.ds.GetGeoTransform()
         return self._geotransform
 
     @property
     def standardparallels(self):
-        if not getattr(self, '_standardparallels', None):
+        if getattr(self, '_standardparallels', None) is None:
             self._standardparallels = em.get_standard_parallels(self.spatialreference)
         return self._standardparallels
 
+    @property
+    def projection(self):
+        if getattr(self, '_projection', None) is None:
+            self._projection = self.ds.GetProjection()
+        return self._projection
+
     @property
     def unittype(self):
-        if not getattr(self, '_unittype', None):
+        if getattr(self, '_unittype', None) is None:
             self._unittype = self.ds.GetRasterBand(1).GetUnitType()
         return self._unittype
 
     @property
     def spatialreference(self):
-        if not getattr(self, '_srs', None):
-            self._srs = osr.SpatialReference()
-            self._srs.ImportFromWkt(self.ds.GetProjection())
-            try:
-                self._srs.MorphToESRI()
-                self._srs.MorphFromESRI()
-            except: pass
-
-            #Setup the GCS
-            self._gcs = self._srs.CloneGeogCS()
+        if getattr(self, '_srs', None) is None:
+            with phase(self.stats, 'spatial_reference'):
+                self._srs = osr.SpatialReference()
+                self._srs.ImportFromWkt(self.projection)
+                try:
+                    self._srs.MorphToESRI()
+                    self._srs.MorphFromESRI()
+                except: pass
+
+                #Setup the GCS
+                self._gcs = self._srs.CloneGeogCS()
         return self._srs
 
     @property
     def geospatial_coordinate_system(self):
-        if not getattr(self, '_gcs', None):
+        if getattr(self, '_gcs', None) is None:
             self._gcs = self.spatialreference.CloneGeogCS()
         return self._gcs
 
     @property
     def latlon_extent(self):
-        if not getattr(self, '_latlonextent', None):
+        if getattr(self, '_latlonextent', None) is None:
             ext = self.extent
             llat, llon = self.pixel_to_latlon(ext[0][0], ext[0][1])
             ulat, ulon = self.pixel_to_latlon(ext[1][0], ext[1][1])
@@ -57,10 +184,10 @@ class GeoDataSet(object):
 
     @property
     def extent(self):
-        if not getattr(self, '_geotransform', None):
+        if getattr(self, '_geotransform', None) is None:
             self.geotransform
 
-        if not getattr(self, '_extent', None):
+        if getattr(self, '_extent', None) is None:
             gt = self.geotransform
             minx = gt[0]
             maxy = gt[3]
@@ -74,42 +201,206 @@ class GeoDataSet(object):
 
     @property
     def coordinate_transformation(self):
-        if not getattr(self, '_ct', None):
-            self._ct = osr.CoordinateTransformation(self.spatialreference,
-                                                  self.geospatial_coordinate_system)
-        return self._ct
+        if getattr(self._local, 'ct', None) is None:
+            self._local.ct = osr.CoordinateTransformation(self.spatialreference,
+                                                          self.geospatial_coordinate_system)
+        return self._local.ct
 
     @property
     def inverse_coordinate_transformation(self):
-        if not getattr(self, '_ict', None):
-                       self._ict = osr.CoordinateTransformation(self.geospatial_coordinate_system,
-                                                                self.spatialreference)
-        return self._ict
+        if getattr(self._local, 'ict', None) is None:
+            self._local.ict = osr.CoordinateTransformation(self.geospatial_coordinate_system,
+                                                           self.spatialreference)
+        return self._local.ict
+
+    @staticmethod
+    def _transform(ct, x, y):
+        #One batched OSR call for every point, reusing the per thread transformation
+        points = np.column_stack((x.ravel(), y.ravel()))
+        out = np.asarray(ct.TransformPoints(points.tolist()), dtype=float)
+        return out[:, 0].reshape(x.shape), out[:, 1].reshape(x.shape)
 
     def pixel_to_latlon(self, x, y):
-        gt = self.geotransform
-        x = gt[0] + (x * gt[1]) + (y * gt[2])
-        y = gt[3] + (x * gt[4]) + (y * gt[5])
-        lon, lat, _ = self.coordinate_transformation.TransformPoint(x, y)
+        """
+        Convert pixel coordinates to latitude and longitude.  Inputs may be
+        scalars or broadcastable arrays, which are converted in a single
+        batched transformation.
 
+        Parameters
+        ----------
+        x : float or ndarray
+            Pixel x (sample) coordinate(s)
+
+        y : float or ndarray
+            Pixel y (line) coordinate(s)
+
+        Returns
+        -------
+        lat, lon : float or ndarray
+                   Floats for scalar input, otherwise arrays of the
+                   broadcast shape
+        """
+        scalar = np.ndim(x) == 0 and np.ndim(y) == 0
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+        gt = self.geotransform
+        px = gt[0] + (x * gt[1]) + (y * gt[2])
+        py = gt[3] + (x * gt[4]) + (y * gt[5])
+        with phase(self.stats, 'transform'):
+            lon, lat = self._transform(self.coordinate_transformation, px, py)
+        if scalar:
+            return float(lat), float(lon)
         return lat, lon
 
     def latlon_to_pixel(self, lat, lon):
+        """
+        Convert latitude and longitude to pixel coordinates.  Inputs may be
+        scalars or broadcastable arrays, which are converted in a single
+        batched transformation.
+
+        Parameters
+        ----------
+        lat : float or ndarray
+              Latitude(s)
+
+        lon : float or ndarray
+              Longitude(s)
+
+        Returns
+        -------
+        x, y : float or ndarray
+               Floats for scalar input, otherwise arrays of the
+               broadcast shape
+        """
+        scalar = np.ndim(lat) == 0 and np.ndim(lon) == 0
+        lat, lon = np.broadcast_arrays(np.asarray(lat, dtype=float), np.asarray(lon, dtype=float))
+        with phase(self.stats, 'transform'):
+            px, py = self._transform(self.inverse_coordinate_transformation, lon, lat)
+        #Invert the geotransform
         gt = self.geotransform
-        ulat, ulon, _ = self.inverse_coordinate_transformation.TransformPoint(lon, lat)
-        x = (ulat - gt[0]) / gt[1]
-        y = (ulon - gt[3]) / gt[5]
+        px -= gt[0]
+        py -= gt[3]
+        det = gt[1] * gt[5] - gt[2] * gt[4]
+        x = (gt[5] * px - gt[2] * py) / det
+        y = (gt[1] * py - gt[4] * px) / det
+        if scalar:
+            return float(x), float(y)
         return x, y
 
+    def preview_size(self, size):
+        """
+        The pixel size of a preview whose longest side is at most size
+        pixels, keeping the aspect ratio.  Previews are never upsampled.
+
+        Parameters
+        ----------
+        size : int
+               The target length, in pixels, of the longest side
+
+        Returns
+        -------
+         : tuple
+           (xsize, ysize)
+        """
+        xsize, ysize = self.rastersize
+        factor = min(1.0, float(size) / max(xsize, ysize))
+        return (max(1, int(round(xsize * factor))), max(1, int(round(ysize * factor))))
+
+    def overview_level(self, size, band=1):
+        """
+        Pick the coarsest overview that still has at least the resolution
+        of a preview of the given size
+
+        Parameters
+        ----------
+        size : int
+               The target length, in pixels, of the longest side
+
+        band : int
+               The band whose overviews are searched
+
+        Returns
+        -------
+         : int
+           The overview index, or None if no overview is fine enough
+        """
+        xsize, ysize = self.preview_size(size)
+        rasterband = self.ds.GetRasterBand(band)
+        best = None
+        for i in range(rasterband.GetOverviewCount()):
+            overview = rasterband.GetOverview(i)
+            if overview.XSize < xsize or overview.YSize < ysize:
+                continue
+            if best is None or overview.XSize < best[1]:
+                best = (i, overview.XSize)
+        return best[0] if best is not None else None
+
+    def read_preview(self, size=256):
+        """
+        Read a decimated 8 bit thumbnail of the dataset.  The best
+        overview is read if one exists, otherwise the full raster window
+        is read into a preview sized buffer, so GDAL subsamples the
+        scanlines and the full resolution raster is never held in memory.
+
+        Parameters
+        ----------
+        size : int
+               The target length, in pixels, of the longest side
+
+        Returns
+        -------
+         : ndarray
+           (rows, columns) grayscale or (rows, columns, 3) RGB uint8
+           image, linearly stretched between the minimum and maximum
+           valid values of each band
+        """
+        xsize, ysize = self.preview_size(size)
+        level = self.overview_level(size)
+        nbands = 3 if self.ds.RasterCount >= 3 else 1
+        with phase(self.stats, 'preview'):
+            channels = []
+            for b in range(1, nbands + 1):
+                rasterband = self.ds.GetRasterBand(b)
+                if level is not None:
+                    rasterband = rasterband.GetOverview(level)
+                arr = rasterband.ReadAsArray(0, 0, rasterband.XSize, rasterband.YSize,
+                                             buf_xsize=xsize, buf_ysize=ysize).astype(np.float64)
+                valid = np.isfinite(arr)
+                ndv = self.ds.GetRasterBand(b).GetNoDataValue()
+                if ndv is not None:
+                    valid &= arr != ndv
+                if valid.any():
+                    minimum, maximum = arr[valid].min(), arr[valid].max()
+                    scale = 255.0 / (maximum - minimum) if maximum > minimum else 0.0
+                    arr = np.where(valid, (arr - minimum) * scale, 0)
+                else:
+                    arr = np.zeros_like(arr)
+                channels.append(np.round(arr).astype(np.uint8))
+        if nbands == 1:
+            return channels[0]
+        return np.dstack(channels)
+
+    def header(self):
+        """
+        Snapshot the header of this dataset
+
+        Returns
+        -------
+         : object
+           GeoHeader snapshot
+        """
+        return GeoHeader(self.filename, self.geotransform, self.rastersize,
+                         self.projection, self.ndv, self.unittype, self.spheroid,
+                         self.standardparallels, self.central_meridian)
+
     @property
     def ndv(self, band=1):
-        if not getattr(self, '_ndv', None):
+        if getattr(self, '_ndv', None) is None:
             self._ndv = self.ds.GetRasterBand(band).GetNoDataValue()
         return self._ndv
 
     @property
     def scale(self):
-        if not getattr(self, '_scale', None):
+        if getattr(self, '_scale', None) is None:
             unitname = self.spatialreference.GetLinearUnitsName()
             value = self.spatialreference.GetLinearUnits()
             self._scale = (unitname, value)
@@ -117,24 +408,24 @@ class GeoDataSet(object):
 
     @property
     def spheroid(self):
-        if not getattr(self, '_spheroid', None):
+        if getattr(self, '_spheroid', None) is None:
             self._spheroid = em.get_spheroid(self.spatialreference)
         return self._spheroid
 
     @property
     def standardparallels(self):
-        if not getattr(self, '_standardparallels', None):
+        if getattr(self, '_standardparallels', None) is None:
             self._standardparallels = em.get_standard_parallels(self.spatialreference)
         return self._standardparallels
 
     @property
     def rastersize(self):
-        if not getattr(self, '_rastersize', None):
+        if getattr(self, '_rastersize', None) is None:
             self._rastersize = (self.ds.RasterXSize, self.ds.RasterYSize)
         return self._rastersize
 
     @property
     def central_meridian(self):
-        if not getattr(self, '_central_meridian', None):
+        if getattr(self, '_central_meridian', None) is None:
             self._central_meridian = em.get_central_meridian(self.spatialreference)
         return self._central_meridian
@@ -1,4 +1,9 @@
+import pickle
 import unittest
+from unittest import mock
+
+import numpy as np
+
 from scalebar.examples import get_path
 from .. import gdalio
 
@@ -118,3 +123,112 @@ class TestPolar(unittest.TestCase):
         extent = self.ds.extent
         self.assertEqual(extent, [(-2129800.0, -2129800.0), (2129800.0, 2129800.0)])
 
+
+    def test_pixel_to_latlon_array(self):
+        x = np.array([0, 100, 200, 460])
+        y = np.array([[0], [250], [919]])
+        lat, lon = self.ds.pixel_to_latlon(x, y)
+        self.assertEqual(lat.shape, (3, 4))
+        self.assertAlmostEqual(lat[0, 0], 42.2574735013, 6)
+        for i, j in [(0, 3), (1, 1), (2, 2)]:
+            slat, slon = self.ds.pixel_to_latlon(x[j], y[i, 0])
+            self.assertAlmostEqual(lat[i, j], slat, 6)
+            self.assertAlmostEqual(lon[i, j], slon, 6)
+
+    def test_latlon_to_pixel_array(self):
+        x = np.linspace(0, 919, 50)
+        y = np.linspace(10, 900, 50)
+        lat, lon = self.ds.pixel_to_latlon(x, y)
+        px, py = self.ds.latlon_to_pixel(lat, lon)
+        np.testing.assert_allclose(px, x, atol=1e-6)
+        np.testing.assert_allclose(py, y, atol=1e-6)
+
+    def test_osr_parity(self):
+        #The batched conversion matches one OSR TransformPoint per point
+        x, y = np.linspace(0, 900, 7), np.linspace(10, 900, 7)
+        lat, lon = self.ds.pixel_to_latlon(x, y)
+        gt = self.ds.geotransform
+        ct = self.ds.coordinate_transformation
+        for i in range(len(x)):
+            plon, plat, _ = ct.TransformPoint(gt[0] + x[i] * gt[1] + y[i] * gt[2],
+                                              gt[3] + x[i] * gt[4] + y[i] * gt[5])
+            self.assertEqual((lat[i], lon[i]), (plat, plon))
+
+    def test_thread_local_transformation(self):
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(1) as executor:
+            ct = executor.submit(lambda: self.ds.coordinate_transformation).result()
+            latlon = executor.submit(self.ds.pixel_to_latlon, 0, 0).result()
+        self.assertIsNot(ct, self.ds.coordinate_transformation)
+        self.assertEqual(latlon, self.ds.pixel_to_latlon(0, 0))
+
+class TestHeader(unittest.TestCase):
+    def setUp(self):
+        self.path = get_path('Lunar_LRO_LOLA_Shade_MAP2_90.0N20.0_LAMB.tif')
+        self.ds = gdalio.GeoDataSet(self.path)
+        self.header = gdalio.read_header(self.path)
+
+    def test_snapshot(self):
+        for attr in ['geotransform', 'rastersize', 'projection', 'ndv', 'unittype',
+                     'spheroid', 'standardparallels', 'central_meridian', 'extent']:
+            self.assertEqual(getattr(self.header, attr), getattr(self.ds, attr))
+        self.assertEqual(self.header.filename, self.path)
+
+    def test_slots(self):
+        self.assertFalse(hasattr(self.header, '__dict__'))
+
+    def test_pickle(self):
+        header = pickle.loads(pickle.dumps(self.header))
+        self.assertEqual(header.geotransform, self.header.geotransform)
+        self.assertEqual(header.projection, self.header.projection)
+        self.assertEqual(header.extent, self.header.extent)
+
+    def test_falsy_cache(self):
+        handle = mock.Mock(wraps=self.ds.ds)
+        self.ds.ds = handle
+        #The no data value and unit type are read once, even though they are falsy
+        for i in range(2):
+            self.assertEqual(self.ds.ndv, 0.0)
+            unittype = self.ds.unittype
+            projection = self.ds.projection
+        self.assertEqual(handle.GetRasterBand.call_count, 2)
+        self.assertEqual(handle.GetProjection.call_count, 1)
+
+        #A released handle is not reopened for cached values
+        self.ds.ds = None
+        with mock.patch.object(gdalio.gdal, 'Open') as gdalopen:
+            self.assertEqual(self.ds.ndv, 0.0)
+            self.assertEqual(self.ds.unittype, unittype)
+            self.assertEqual(self.ds.projection, projection)
+        gdalopen.assert_not_called()
+
+class TestPreview(unittest.TestCase):
+    def setUp(self):
+        self.ds = gdalio.GeoDataSet(get_path('MOLA128Hillshade_Mercator_test.tif'))
+
+    def test_preview_size(self):
+        xsize, ysize = self.ds.rastersize
+        self.assertEqual(max(self.ds.preview_size(256)), 256)
+        self.assertEqual(self.ds.preview_size(10 ** 6), (xsize, ysize))
+
+    def test_read_preview(self):
+        preview = self.ds.read_preview(64)
+        self.assertEqual(preview.dtype, np.uint8)
+        self.assertEqual(preview.shape[:2][::-1], self.ds.preview_size(64))
+
+    def test_overview_level(self):
+        path = '/vsimem/overviews.tif'
+        copy = gdalio.gdal.GetDriverByName('GTiff').CreateCopy(path, self.ds.ds)
+        copy.BuildOverviews('NEAREST', [2, 4, 8])
+        copy = None
+        ds = gdalio.GeoDataSet(path)
+        widths = [ds.ds.GetRasterBand(1).GetOverview(i).XSize for i in range(3)]
+        self.assertEqual(widths, [488, 244, 122])
+        #The coarsest overview that is at least as large as the preview
+        for size, level in [(64, 2), (200, 1), (400, 0)]:
+            self.assertEqual(ds.overview_level(size), level)
+        self.assertIsNone(ds.overview_level(600))
+        self.assertIsNone(ds.overview_level(10 ** 6))
+        self.assertEqual(ds.read_preview(100).shape[:2][::-1], ds.preview_size(100))
+        ds.ds = None
+        gdalio.gdal.Unlink(path)
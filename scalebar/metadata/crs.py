@@ -0,0 +1,72 @@
+import re
+import warnings
+
+import pyproj
+
+class CRSReference(object):
+    """
+    A GDAL free stand in for an OSR SpatialReference, backed by a
+    pyproj.CRS.  Only the methods used by the get_* metadata functions
+    are provided.
+
+    Projection and parameter names follow OSR, e.g. 'Mercator_1SP' and
+    'standard_parallel_1', as they are read from the WKT1_GDAL form of
+    the CRS.
+
+    Parameters
+    ----------
+    crs : object
+          Anything accepted by pyproj.CRS, e.g. a WKT, ESRI WKT or proj4
+          string, an 'EPSG:<code>' string or a pyproj.CRS
+    """
+    def __init__(self, crs):
+        self.crs = pyproj.CRS(crs)
+        self._wkt = self.crs.to_wkt('WKT1_GDAL') or ''
+        projection = re.search(r'PROJECTION\["([^"]+)"', self._wkt)
+        if projection is not None:
+            self._projection = projection.group(1)
+        elif self.crs.coordinate_operation is not None:
+            self._projection = self.crs.coordinate_operation.method_name.replace(' ', '_')
+        else:
+            self._projection = None
+        self._parameters = {name.lower(): float(value) for name, value in
+                            re.findall(r'PARAMETER\["([^"]+)",([^,\]]+)\]', self._wkt)}
+
+    def __str__(self):
+        return self.crs.to_wkt('WKT1_GDAL', pretty=True) or self.crs.to_wkt()
+
+    def GetProjParm(self, name, default=0.0):
+        return self._parameters.get(name.lower(), default)
+
+    def GetAttrValue(self, key, child=0):
+        if key.upper() == 'PROJECTION':
+            return self._projection
+        return None
+
+    def GetSemiMajor(self):
+        return self.crs.ellipsoid.semi_major_metre
+
+    def GetSemiMinor(self):
+        return self.crs.ellipsoid.semi_minor_metre
+
+    def GetInvFlattening(self):
+        return self.crs.ellipsoid.inverse_flattening
+
+    def ExportToProj4(self):
+        with warnings.catch_warnings():
+            #PROJ warns that proj4 strings are lossy, which is expected here
+            warnings.simplefilter('ignore', UserWarning)
+            return self.crs.to_proj4()
+
+    def ExportToWkt(self):
+        return self._wkt
+
+    def CloneGeogCS(self):
+        return CRSReference(self.crs.geodetic_crs)
+
+    def transformer(self):
+        """
+        Transformer from the projection to its geographic
+        coordinate system, with longitude, latitude axis order
+        """
+        return pyproj.Transformer.from_crs(self.crs, self.crs.geodetic_crs, always_xy=True)
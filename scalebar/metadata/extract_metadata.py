@@ -1,26 +1,87 @@
-from osgeo import gdal
-from osgeo import osr
+import collections
+import functools
+import re
+
+import pyproj
+
+from scalebar.metadata.crs import CRSReference
 
 import_options = ['ImportFromWkt', 'ImportFromProj4',
                   'ImportFromEPSG', 'ImportFromUSGS',
                   'ImportFromXML']
 
-def extract_projstring(proj_string):
+ProjectionParameters = collections.namedtuple('ProjectionParameters',
+                                              ['name', 'parallels', 'central_meridian',
+                                               'latitude_of_origin', 'scale_factor',
+                                               'spheroid', 'proj4', 'srs', 'proj',
+                                               'transformation'])
+ProjectionParameters.__doc__ = """
+Immutable record of the projection parameters used to build a scale bar.
+The srs, proj and transformation objects are shared between all users
+of a cached record and must not be modified.
+
+Attributes
+----------
+name : str
+       The projection name
+
+parallels : tuple
+            of standard parallels
+
+central_meridian : float
+
+latitude_of_origin : float
+
+scale_factor : float
+
+spheroid : tuple
+           semi-major, semi-minor, invflattening
+
+proj4 : str
+        The proj4 representation of the projection
+
+srs : object
+      OSR spatial reference system
+
+proj : object
+       pyproj.Proj built from the proj4 string
+
+transformation : object
+                 Coordinate transformation from the projection to its
+                 geographic coordinate system; an OSR CoordinateTransformation
+                 or, for the pyproj backend, a pyproj Transformer
+"""
+
+#Default backend used to import projection strings, see extract_projstring
+DEFAULT_BACKEND = 'pyproj'
+
+def extract_projstring(proj_string, backend=None):
     """
-    Import an OSR supported projection string into
-    a spatial reference object
+    Import a projection string into a spatial reference object
 
     Parameters
     ----------
     proj_string : string
                   Projection String in some OSR supported format
 
+    backend : str
+              'pyproj', which reads the string with pyproj.CRS and does not
+              load GDAL, or 'osr' (Default: DEFAULT_BACKEND)
+
     Returns
     -------
     srs : object
-          OSR spatial reference object
+          OSR spatial reference object or, for the pyproj backend,
+          a CRSReference that provides the same metadata methods
 
     """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in backends:
+        raise ValueError('Unknown metadata backend {}, expected one of {}.'.format(backend, sorted(backends)))
+    return backends[backend](proj_string)
+
+def _osr_projstring(proj_string):
+    from osgeo import osr
     srs = osr.SpatialReference()
     for import_option in import_options:
         try:
@@ -35,6 +96,90 @@ def extract_projstring(proj_string):
     srs.MorphFromESRI()
     return srs
 
+#Mapping of backend names to functions importing a projection string
+backends = {'osr': _osr_projstring,
+            'pyproj': CRSReference}
+
+def normalize_projstring(proj_string):
+    """
+    Normalize a projection string so that equivalent strings share a cache
+    entry.  Runs of whitespace are collapsed and whitespace around WKT
+    delimiters is removed.
+
+    Parameters
+    ----------
+    proj_string : string
+                  Projection String in some OSR supported format
+
+    Returns
+    -------
+     : string
+       The normalized projection string
+    """
+    proj_string = ' '.join(str(proj_string).split())
+    return re.sub(r'\s*([\[\],])\s*', r'\1', proj_string)
+
+def get_parameters(srs):
+    """
+    Extract all of the projection parameters from a spatial reference system.
+    A ProjectionParameters record is returned unchanged.
+
+    Parameters
+    ----------
+    srs : object
+          OSR spatial reference system or CRSReference
+
+    Returns
+    -------
+     : object
+       ProjectionParameters record
+    """
+    if isinstance(srs, ProjectionParameters):
+        return srs
+    proj4 = srs.ExportToProj4()
+    if isinstance(srs, CRSReference):
+        transformation = srs.transformer()
+    else:
+        from osgeo import osr
+        transformation = osr.CoordinateTransformation(srs, srs.CloneGeogCS())
+    return ProjectionParameters(get_projection_name(srs),
+                                tuple(get_standard_parallels(srs)),
+                                get_central_meridian(srs),
+                                get_latitude_of_origin(srs),
+                                get_scale_factor(srs),
+                                get_spheroid(srs),
+                                proj4, srs,
+                                pyproj.Proj(proj4),
+                                transformation)
+
+@functools.lru_cache(maxsize=128)
+def _projection_parameters(proj_string, backend):
+    return get_parameters(extract_projstring(proj_string, backend))
+
+def projection_parameters(proj_string, backend=None):
+    """
+    Parse a projection string and extract its parameters.  Results are
+    held in a bounded LRU cache keyed on the normalized projection string,
+    so repeated projections are only parsed once.
+
+    Parameters
+    ----------
+    proj_string : string
+                  Projection String in some OSR supported format
+
+    backend : str
+              The metadata backend, see extract_projstring
+
+    Returns
+    -------
+     : object
+       ProjectionParameters record
+    """
+    return _projection_parameters(normalize_projstring(proj_string), backend or DEFAULT_BACKEND)
+
+projection_parameters.cache_info = _projection_parameters.cache_info
+projection_parameters.cache_clear = _projection_parameters.cache_clear
+
 def get_standard_parallels(srs):
     """
     Get all standard parallels for a given map projection
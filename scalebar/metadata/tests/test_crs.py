@@ -0,0 +1,51 @@
+import unittest
+
+import pyproj
+
+from .. import crs
+from .. import extract_metadata as em
+
+class TestCRSReference(unittest.TestCase):
+
+    def setUp(self):
+        self.wktsrs = 'PROJCS["Mercator",GEOGCS["GCS_Moon_2000",DATUM["D_Moon_2000",SPHEROID["Moon_2000_IAU_IAG",1737400.0,0.0]],PRIMEM["Reference_Meridian",0.0],UNIT["Degree",0.0174532925199433]],PROJECTION["Mercator"],PARAMETER["False_Easting",0.0],PARAMETER["False_Northing",0.0],PARAMETER["Central_Meridian",180.0],PARAMETER["Standard_Parallel_1",0.0],UNIT["Meter",1.0]]'
+        self.srs = em.extract_projstring(self.wktsrs, backend='pyproj')
+
+    def test_default_backend(self):
+        self.assertIsInstance(em.extract_projstring(self.wktsrs), crs.CRSReference)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            em.extract_projstring(self.wktsrs, backend='nope')
+
+    def test_get_functions(self):
+        self.assertEqual(em.get_projection_name(self.srs), 'Mercator_2SP')
+        self.assertEqual(em.get_central_meridian(self.srs), 180.0)
+        self.assertEqual(em.get_standard_parallels(self.srs), [0.0, 0.0])
+        self.assertEqual(em.get_false_easting(self.srs), 0.0)
+        self.assertEqual(em.get_false_northing(self.srs), 0.0)
+        self.assertEqual(em.get_scale_factor(self.srs), 1.0)
+        self.assertEqual(em.get_spheroid(self.srs), (1737400.0, 1737400.0, 0.0))
+
+    def test_parameters(self):
+        srs = crs.CRSReference('+proj=lcc +lat_0=0 +lon_0=10 +lat_1=43 +lat_2=73 +R=1737400')
+        self.assertEqual(em.get_projection_name(srs), 'Lambert_Conformal_Conic_2SP')
+        self.assertEqual(em.get_standard_parallels(srs), [43.0, 73.0])
+        self.assertEqual(em.get_latitude_of_origin(srs), 0.0)
+        self.assertEqual(em.get_central_meridian(srs), 10.0)
+
+    def test_projection_parameters(self):
+        em.projection_parameters.cache_clear()
+        params = em.projection_parameters(self.wktsrs)
+        self.assertEqual(params.name, 'Mercator_2SP')
+        self.assertIsInstance(params.transformation, pyproj.Transformer)
+        lon, lat = params.transformation.transform(0.0, 0.0)
+        self.assertAlmostEqual(lon, 180.0)
+        self.assertAlmostEqual(lat, 0.0)
+        self.assertIn('+proj=merc', params.proj4)
+        self.assertIs(em.projection_parameters(self.wktsrs), params)
+
+    def test_geographic(self):
+        srs = crs.CRSReference('EPSG:4326')
+        self.assertIsNone(em.get_projection_name(srs))
+        self.assertEqual(em.get_central_meridian(srs), 0.0)
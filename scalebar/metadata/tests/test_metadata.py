@@ -9,11 +9,11 @@ class TestSRSProjectionExtraction(unittest.TestCase):
     def setUp(self):
         self.wktsrs = 'PROJCS["Moon2000_Mercator180",GEOGCS["GCS_Moon_2000",DATUM["D_Moon_2000",SPHEROID["Moon_2000_IAU_IAG",1737400.0,0.0]],PRIMEM["Reference_Meridian",0.0],UNIT["Degree",0.0174532925199433]],PROJECTION["Mercator"],PARAMETER["False_Easting",0.0],PARAMETER["False_Northing",0.0],PARAMETER["Central_Meridian",180.0],PARAMETER["Standard_Parallel_1",0.0],UNIT["Meter",1.0]]'
         self.wktsrs = 'PROJCS["Mercator",GEOGCS["GCS_Moon_2000",DATUM["D_Moon_2000",SPHEROID["Moon_2000_IAU_IAG",1737400.0,0.0]],PRIMEM["Reference_Meridian",0.0],UNIT["Degree",0.0174532925199433]],PROJECTION["Mercator"],PARAMETER["False_Easting",0.0],PARAMETER["False_Northing",0.0],PARAMETER["Central_Meridian",180.0],PARAMETER["Standard_Parallel_1",0.0],UNIT["Meter",1.0]]'
-        self.srs = em.extract_projstring(self.wktsrs)
+        self.srs = em.extract_projstring(self.wktsrs, backend='osr')
 
     def test_generate_srs(self):
-        self.srs = em.extract_projstring(self.wktsrs)
-        print dir(self.srs)
+        self.srs = em.extract_projstring(self.wktsrs, backend='osr')
+        print(dir(self.srs))
 
     def test_false_easting(self):
         e = em.get_false_easting(self.srs)
@@ -56,3 +56,33 @@ class TestSRSProjectionExtraction(unittest.TestCase):
     def test_latitude_of_origin(self):
         lo = em.get_latitude_of_origin(self.srs)
         self.assertEqual(lo, 0.0)
+
+    def test_normalize_projstring(self):
+        spaced = self.wktsrs.replace(',', ' ,\n    ').replace('[', ' [ ')
+        self.assertEqual(em.normalize_projstring(spaced), self.wktsrs)
+        self.assertEqual(em.normalize_projstring(' +proj=merc   +lon_0=180 '), '+proj=merc +lon_0=180')
+
+    def test_projection_parameters(self):
+        params = em.projection_parameters(self.wktsrs, backend='osr')
+        self.assertEqual(params.name, 'Mercator_1SP')
+        self.assertEqual(params.parallels, (0.0, 0.0))
+        self.assertEqual(params.central_meridian, 180.0)
+        self.assertEqual(params.latitude_of_origin, 0.0)
+        self.assertEqual(params.scale_factor, 1.0)
+        self.assertEqual(params.spheroid, (1737400.0, 1737400.0, 0.0))
+        self.assertEqual(params.proj4, self.srs.ExportToProj4())
+        with self.assertRaises(AttributeError):
+            params.name = 'Sinusoidal'
+
+    def test_projection_parameters_cache(self):
+        em.projection_parameters.cache_clear()
+        params = em.projection_parameters(self.wktsrs)
+        spaced = em.projection_parameters(self.wktsrs.replace(',', ', '))
+        self.assertIs(params, spaced)
+        info = em.projection_parameters.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_get_parameters(self):
+        params = em.get_parameters(self.srs)
+        self.assertEqual(params.central_meridian, 180.0)
+        self.assertIs(em.get_parameters(params), params)
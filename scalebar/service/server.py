@@ -0,0 +1,243 @@
+import asyncio
+import collections
+import hashlib
+import json
+import os
+import threading
+from urllib.parse import urlsplit, parse_qsl
+
+from scalebar.batch import batch
+from scalebar.metadata import extract_metadata as emd
+
+REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+#Largest accepted request body, in bytes
+MAX_BODY = 1 << 20
+
+class HTTPError(Exception):
+    def __init__(self, status, message=''):
+        super(HTTPError, self).__init__(message)
+        self.status = status
+
+def _coerce(key, value):
+    try:
+        return json.loads(value)
+    except ValueError:
+        if key == 'extent':
+            return [float(v) for v in value.split(',')]
+        return value
+
+class ScaleBarService(object):
+    """
+    A small asyncio HTTP server that renders scale bars on request.
+
+    Requests are made to /scalebar, either as a GET with the job in the
+    query string, e.g.
+    /scalebar?inputds=<projection string>&extent=0,0,180,65&nnodes=101
+    or as a POST with a JSON job body.  A job holds an inputds (a raster
+    path or a projection string), an extent for projection strings and any
+    other ScaleBar keyword arguments.  The SVG is returned with an ETag
+    and an X-Content-SHA256 header; requests with a matching If-None-Match
+    get a 304.
+
+    Parsed projections are held by the metadata cache and recent results
+    in an LRU cache keyed on the normalized job.
+
+    Parameters
+    ----------
+    maxresults : int
+                 The number of rendered results held in memory
+
+    max_age : int
+              The Cache-Control max-age, in seconds, sent with results
+
+    executor : object
+               concurrent.futures executor used to render, so that the event
+               loop is not blocked (Default: the loop's default executor)
+    """
+    def __init__(self, maxresults=256, max_age=3600, executor=None):
+        self.maxresults = maxresults
+        self.max_age = max_age
+        self.executor = executor
+        self.results = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, job):
+        """
+        Canonical cache key of a job.  Projection strings are normalized
+        and raster inputs are keyed on their modification time as well.
+        """
+        job = dict(job)
+        if job.get('extent') is not None:
+            job['extent'] = [float(v) for v in job['extent']]
+        inputds = job.get('inputds')
+        if isinstance(inputds, str):
+            if os.path.exists(inputds):
+                job['mtime'] = os.path.getmtime(inputds)
+            else:
+                job['inputds'] = emd.normalize_projstring(inputds)
+        return json.dumps(job, sort_keys=True)
+
+    def render(self, job):
+        """
+        Render a job, or fetch it from the result cache
+
+        Parameters
+        ----------
+        job : dict
+              Job parameters, see scalebar.batch.read_manifest
+
+        Returns
+        -------
+        etag : str
+               The SHA-256 hex digest of the body
+
+        body : bytes
+               The SVG document
+        """
+        if 'inputds' not in job:
+            raise HTTPError(400, 'An inputds is required.')
+        job = {k: v for k, v in job.items() if k != 'outputname'}
+        try:
+            key = self.key(job)
+        except (TypeError, ValueError) as e:
+            raise HTTPError(400, '{}: {}'.format(type(e).__name__, e))
+        with self._lock:
+            if key in self.results:
+                self.results.move_to_end(key)
+                return self.results[key]
+        try:
+            body = batch.create_scalebar(job).tobytes()
+        except (KeyError, TypeError, ValueError, RuntimeError) as e:
+            raise HTTPError(400, '{}: {}'.format(type(e).__name__, e))
+        result = (hashlib.sha256(body).hexdigest(), body)
+        with self._lock:
+            self.results[key] = result
+            while len(self.results) > self.maxresults:
+                self.results.popitem(last=False)
+        return result
+
+    async def handle(self, reader, writer):
+        """
+        Serve the requests made on one connection
+        """
+        try:
+            keepalive = True
+            while keepalive:
+                requestline = await reader.readline()
+                if not requestline.strip():
+                    break
+                method, target, version = requestline.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                keepalive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY:
+                    await self.respond(writer, 413, b'Request body too large.', keepalive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                try:
+                    etag, content = await self.dispatch(method, target, body)
+                except HTTPError as e:
+                    await self.respond(writer, e.status, str(e).encode('utf-8'), keepalive=keepalive)
+                    continue
+                except Exception as e:
+                    await self.respond(writer, 500, repr(e).encode('utf-8'), keepalive=False)
+                    break
+
+                quoted = '"{}"'.format(etag)
+                extra = {'ETag': quoted,
+                         'X-Content-SHA256': etag,
+                         'Cache-Control': 'public, max-age={}'.format(self.max_age)}
+                matches = [t.strip() for t in headers.get('if-none-match', '').split(',')]
+                if quoted in matches or '*' in matches:
+                    await self.respond(writer, 304, b'', extra, keepalive=keepalive)
+                else:
+                    extra['Content-Type'] = 'image/svg+xml'
+                    await self.respond(writer, 200, content, extra, keepalive=keepalive)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, body):
+        """
+        Parse a request into a job and render it off the event loop
+        """
+        url = urlsplit(target)
+        if url.path.rstrip('/') != '/scalebar':
+            raise HTTPError(404, 'Unknown path {}.'.format(url.path))
+        if method == 'GET':
+            job = {k: _coerce(k, v) for k, v in parse_qsl(url.query)}
+        elif method == 'POST':
+            try:
+                job = json.loads(body.decode('utf-8'))
+            except ValueError as e:
+                raise HTTPError(400, 'Invalid JSON body: {}'.format(e))
+            if not isinstance(job, dict):
+                raise HTTPError(400, 'The JSON body must be an object.')
+        else:
+            raise HTTPError(405, 'Method {} not allowed.'.format(method))
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.render, job)
+
+    async def respond(self, writer, status, body, headers=None, keepalive=True):
+        lines = ['HTTP/1.1 {} {}'.format(status, REASONS[status]),
+                 'Content-Length: {}'.format(len(body) if status != 304 else 0),
+                 'Connection: {}'.format('keep-alive' if keepalive else 'close')]
+        if status >= 400:
+            lines.append('Content-Type: text/plain; charset=utf-8')
+        for name, value in sorted((headers or {}).items()):
+            lines.append('{}: {}'.format(name, value))
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        if status != 304:
+            writer.write(body)
+        await writer.drain()
+
+    async def start(self, host='127.0.0.1', port=8000):
+        """
+        Start listening
+
+        Parameters
+        ----------
+        host : str
+               The interface to bind
+
+        port : int
+               The port to bind, 0 selects a free port
+
+        Returns
+        -------
+         : object
+           The asyncio Server
+        """
+        return await asyncio.start_server(self.handle, host, port)
+
+def serve(host='127.0.0.1', port=8000, **kwargs):
+    """
+    Run a ScaleBarService until interrupted
+
+    Parameters
+    ----------
+    host : str
+           The interface to bind
+
+    port : int
+           The port to bind
+
+    kwargs : dict
+             Passed to ScaleBarService
+    """
+    async def main():
+        server = await ScaleBarService(**kwargs).start(host, port)
+        async with server:
+            await server.serve_forever()
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+import asyncio
+import json
+import unittest
+from urllib.parse import quote
+
+from .. import server
+
+WKT = """PROJCS["Mercator_MARS",GEOGCS["GCS_MARS",DATUM["MARS",SPHEROID["MARS",3396190,169.8944472236118]],PRIMEM["Reference_Meridian",0],UNIT["Degree",0.017453292519943295]],PROJECTION["Mercator_1SP"],PARAMETER["central_meridian",0],PARAMETER["false_easting",0],PARAMETER["false_northing",0],UNIT["Meter",1],PARAMETER["latitude_of_origin",0.0]]"""
+
+
+async def request(port, method, target, body=b'', headers=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    lines = ['{} {} HTTP/1.1'.format(method, target), 'Host: localhost',
+             'Connection: close', 'Content-Length: {}'.format(len(body))]
+    lines += ['{}: {}'.format(k, v) for k, v in (headers or {}).items()]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b'\r\n\r\n')
+    head = head.decode('latin-1').split('\r\n')
+    status = int(head[0].split()[1])
+    headers = dict(h.lower().split(': ', 1) for h in head[1:])
+    return status, headers, content
+
+
+class TestService(unittest.TestCase):
+    def setUp(self):
+        self.service = server.ScaleBarService(maxresults=2)
+        self.target = '/scalebar?inputds={}&extent=0,0,180,65&nnodes=11'.format(quote(WKT))
+
+    def fetch(self, *requests):
+        async def main():
+            s = await self.service.start('127.0.0.1', 0)
+            port = s.sockets[0].getsockname()[1]
+            try:
+                return [await request(port, *r) for r in requests]
+            finally:
+                s.close()
+                await s.wait_closed()
+        return asyncio.run(main())
+
+    def test_get(self):
+        (status, headers, content), = self.fetch(('GET', self.target))
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['content-type'], 'image/svg+xml')
+        self.assertTrue(content.startswith(b'<?xml'))
+        self.assertEqual(headers['etag'], '"{}"'.format(headers['x-content-sha256']))
+
+    def test_post_matches_get(self):
+        body = json.dumps({'inputds': WKT, 'extent': [0, 0, 180, 65], 'nnodes': 11}).encode('utf-8')
+        get, post = self.fetch(('GET', self.target), ('POST', '/scalebar', body))
+        self.assertEqual(post[0], 200)
+        self.assertEqual(get[2], post[2])
+        self.assertEqual(len(self.service.results), 1)
+
+    def test_not_modified(self):
+        (_, headers, _), = self.fetch(('GET', self.target))
+        (status, _, content), = self.fetch(('GET', self.target, b'', {'If-None-Match': headers['etag']}))
+        self.assertEqual(status, 304)
+        self.assertEqual(content, b'')
+
+    def test_errors(self):
+        responses = self.fetch(('GET', '/nothing'), ('DELETE', '/scalebar'),
+                               ('GET', '/scalebar'), ('POST', '/scalebar', b'{not json'))
+        self.assertEqual([r[0] for r in responses], [404, 405, 400, 400])
+
+    def test_lru(self):
+        for nnodes in (11, 12, 13):
+            self.service.render({'inputds': WKT, 'extent': [0, 0, 180, 65], 'nnodes': nnodes})
+        self.assertEqual(len(self.service.results), 2)
+
+    def test_key_normalizes(self):
+        a = self.service.key({'inputds': WKT.replace(',', ', ')})
+        b = self.service.key({'inputds': WKT})
+        self.assertEqual(a, b)
@@ -0,0 +1,52 @@
+import contextlib
+import importlib.util
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+spec = importlib.util.spec_from_file_location('generate_scalebar',
+                                              os.path.join(ROOT, 'generate_scalebar.py'))
+cli = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(cli)
+
+WKT = '+proj=stere +lat_0=-90 +lon_0=0 +k=1 +R=3396190 +units=m +no_defs'
+
+
+class TestCli(unittest.TestCase):
+    def test_negative_extents(self):
+        args = cli.parseargs(['-e', '-90,0,-65,30', '--extent', '-65,0,-40,30', WKT, 'out.svg'])
+        self.assertEqual(args.extent, [[-90, 0, -65, 30], [-65, 0, -40, 30]])
+        args = cli.parseargs(['-e=-90,0,-65,30', WKT, 'out.svg'])
+        self.assertEqual(args.extent, [[-90, 0, -65, 30]])
+
+    def test_single_number_extent(self):
+        args = cli.parseargs(['-e', '-90', '-e', '0', '-e', '-65', '-e', '30', WKT, 'out.svg'])
+        self.assertEqual(args.extent, [[-90, 0, -65, 30]])
+
+    def test_projstring_requires_extent(self):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr), self.assertRaises(SystemExit):
+            cli.parseargs([WKT, 'out.svg'])
+        self.assertIn('requires -e/--extent', stderr.getvalue())
+
+    def test_profile_broken_pipe(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        proc = subprocess.Popen([sys.executable, os.path.join(ROOT, 'generate_scalebar.py'), '--profile',
+                                 '-e', '0,0,180,65', WKT, os.path.join(path, 'out.svg')],
+                                cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                universal_newlines=True)
+        #The reader goes away before the report is printed, as with | head -0
+        proc.stdout.close()
+        stderr = proc.stderr.read()
+        proc.wait()
+        proc.stderr.close()
+        self.assertEqual(proc.returncode, 1)
+        self.assertNotIn('Traceback', stderr)
+        self.assertNotIn('BrokenPipeError', stderr)
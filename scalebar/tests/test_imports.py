@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+HEAVY = ('osgeo', 'pyproj', 'numpy', 'svgwrite')
+
+
+def imported(code, *args):
+    """
+    Run code in a fresh interpreter with -X importtime and return the set
+    of top level packages that were imported.
+    """
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code] + list(args),
+                          cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True)
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            modules.add(line.rsplit('|', 1)[1].strip().split('.')[0])
+    return modules
+
+
+class TestImports(unittest.TestCase):
+    def test_package(self):
+        modules = imported('import scalebar')
+        self.assertIn('scalebar', modules)
+        for name in HEAVY:
+            self.assertNotIn(name, modules)
+
+    def test_lazy_subpackage(self):
+        modules = imported('import scalebar; scalebar.utils.stats')
+        self.assertNotIn('osgeo', modules)
+        self.assertNotIn('numpy', modules)
+
+    def test_bar_without_svgwrite(self):
+        modules = imported('from scalebar.bar import bar')
+        self.assertNotIn('svgwrite', modules)
+
+    def test_lazy_bar_package(self):
+        modules = imported('import scalebar.bar.writers')
+        for name in ('osgeo', 'pyproj', 'numpy', 'asyncio'):
+            self.assertNotIn(name, modules)
+        modules = imported('from scalebar.bar import ScaleBarBuilder, Sheet')
+        self.assertIn('numpy', modules)
+        self.assertNotIn('asyncio', modules)
+
+    def test_bar_names(self):
+        import scalebar.bar
+        for name in scalebar.bar.__all__:
+            self.assertIn(name, dir(scalebar.bar))
+            self.assertIs(getattr(scalebar.bar, name),
+                          getattr(getattr(scalebar.bar, scalebar.bar._modules[name]), name))
+        with self.assertRaises(AttributeError):
+            scalebar.bar.missing
+
+    def test_cli_help(self):
+        code = 'import runpy, sys; sys.argv[0] = "generate_scalebar.py"; runpy.run_path("generate_scalebar.py", run_name="__main__")'
+        modules = imported(code, '--help')
+        for name in HEAVY:
+            self.assertNotIn(name, modules)
+
+    def test_projstring_without_gdal(self):
+        code = ('from scalebar.bar import bar; '
+                'bar.ScaleBar.from_projstring("+proj=merc +R=3396190", (0, 0, 180, 65)).tobytes()')
+        modules = imported(code)
+        self.assertIn('pyproj', modules)
+        self.assertNotIn('osgeo', modules)
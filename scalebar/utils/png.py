@@ -0,0 +1,52 @@
+import base64
+import struct
+import zlib
+
+import numpy as np
+
+#PNG color types by number of channels
+COLOR_TYPES = {1: 0, 2: 4, 3: 2, 4: 6}
+
+def _chunk(tag, data):
+    chunk = tag + data
+    return struct.pack('>I', len(data)) + chunk + struct.pack('>I', zlib.crc32(chunk) & 0xffffffff)
+
+def encode_png(array, level=9):
+    """
+    Encode an 8 bit image as a PNG
+
+    Parameters
+    ----------
+    array : ndarray
+            (rows, columns) grayscale or (rows, columns, channels) image,
+            with 2 (gray, alpha), 3 (RGB) or 4 (RGBA) channels
+
+    level : int
+            The zlib compression level (Default: 9)
+
+    Returns
+    -------
+     : bytes
+       The PNG file
+    """
+    array = np.asarray(array)
+    if array.ndim == 2:
+        array = array[:, :, np.newaxis]
+    if array.ndim != 3 or array.shape[2] not in COLOR_TYPES:
+        raise ValueError('Expected a (rows, columns[, channels]) image, got shape {}'.format(array.shape))
+    rows, columns, channels = array.shape
+    #Every scanline is prefixed with filter type 0, none
+    raw = np.zeros((rows, columns * channels + 1), dtype=np.uint8)
+    raw[:, 1:] = np.clip(array, 0, 255).reshape(rows, -1)
+    header = struct.pack('>IIBBBBB', columns, rows, 8, COLOR_TYPES[channels], 0, 0, 0)
+    return b''.join((b'\x89PNG\r\n\x1a\n',
+                     _chunk(b'IHDR', header),
+                     _chunk(b'IDAT', zlib.compress(raw.tobytes(), level)),
+                     _chunk(b'IEND', b'')))
+
+def data_uri(array):
+    """
+    Encode an 8 bit image as a base64 PNG data URI, suitable for
+    embedding in an SVG <image> element.
+    """
+    return 'data:image/png;base64,' + base64.b64encode(encode_png(array)).decode('ascii')
@@ -0,0 +1,149 @@
+import collections
+import contextlib
+import json
+import time
+import tracemalloc
+
+PhaseStats = collections.namedtuple('PhaseStats', ['calls', 'time', 'peak_memory'])
+
+class Stats(object):
+    """
+    Accumulates per-phase wall time, call counts and peak allocations.
+
+    Phases are timed with the phase context manager, e.g.
+
+        stats = Stats()
+        with stats.phase('save'):
+            ...
+
+    Nested phases are timed independently, so the time and allocations of
+    an inner phase are also counted in the outer one.
+
+    Parameters
+    ----------
+    memory : bool
+             If True, Python allocations are traced with tracemalloc and the
+             peak of each phase recorded.  Tracing slows the code being
+             measured considerably.  (Default: False)
+
+    Attributes
+    ----------
+    phases : dict
+             Mapping of phase names to PhaseStats records, in the order the
+             phases were first entered
+
+    hooks : list
+            Callables invoked as hook(name, elapsed, peak_memory) as each
+            phase ends.  peak_memory is None unless memory is traced.
+    """
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.phases = collections.OrderedDict()
+        self.hooks = []
+        #Peaks of the enclosing phases, carried over tracemalloc peak resets
+        self._peaks = []
+
+    def add_hook(self, hook):
+        """
+        Register a callable invoked as hook(name, elapsed, peak_memory)
+        at the end of each phase.
+        """
+        self.hooks.append(hook)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Context manager timing one call of a phase
+        """
+        started = False
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started = True
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self._peaks.append(0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            peak = None
+            if self.memory:
+                peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+                if started:
+                    tracemalloc.stop()
+            self.record(name, elapsed, peak)
+
+    def record(self, name, elapsed, peak_memory=None):
+        """
+        Add one call of a phase
+        """
+        calls, total, peak = self.phases.get(name, (0, 0.0, None))
+        if peak_memory is not None:
+            peak = max(peak or 0, peak_memory)
+        self.phases[name] = PhaseStats(calls + 1, total + elapsed, peak)
+        for hook in self.hooks:
+            hook(name, elapsed, peak_memory)
+
+    def merge(self, other):
+        """
+        Accumulate the phases of another Stats, or of its as_dict() output,
+        e.g. to aggregate over a batch.
+        """
+        phases = other.as_dict() if isinstance(other, Stats) else other
+        for name, p in phases.items():
+            calls, total, peak = self.phases.get(name, (0, 0.0, None))
+            if p['peak_memory'] is not None:
+                peak = max(peak or 0, p['peak_memory'])
+            self.phases[name] = PhaseStats(calls + p['calls'], total + p['time'], peak)
+
+    def as_dict(self):
+        return collections.OrderedDict((name, p._asdict()) for name, p in self.phases.items())
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.as_dict(), **kwargs)
+
+    def report(self):
+        """
+        Format the phases as a table
+
+        Returns
+        -------
+         : str
+           One line per phase with the call count, total and
+           per call wall time and the peak allocation
+        """
+        lines = ['{:24s} {:>6s} {:>12s} {:>12s} {:>12s}'.format('phase', 'calls', 'total (s)',
+                                                                 'per call (s)', 'peak (B)')]
+        for name, p in self.phases.items():
+            peak = '' if p.peak_memory is None else str(p.peak_memory)
+            lines.append('{:24s} {:6d} {:12.6f} {:12.6f} {:>12s}'.format(name, p.calls, p.time,
+                                                                         p.time / p.calls, peak))
+        return '\n'.join(lines)
+
+def phase(stats, name):
+    """
+    Time a phase if stats is a Stats object, otherwise do nothing.
+    Instrumented functions take an optional stats argument and use this
+    so that uninstrumented calls pay no cost.
+
+    Parameters
+    ----------
+    stats : object
+            A Stats object or None
+
+    name : str
+           The phase name
+
+    Returns
+    -------
+     : object
+       A context manager
+    """
+    if stats is None:
+        return contextlib.nullcontext()
+    return stats.phase(name)
@@ -0,0 +1,41 @@
+import struct
+import unittest
+import zlib
+
+import numpy as np
+
+from .. import png
+
+
+def chunks(data):
+    data = data[8:]
+    while data:
+        length, = struct.unpack('>I', data[:4])
+        yield data[4:8], data[8:8 + length]
+        data = data[12 + length:]
+
+
+class TestPNG(unittest.TestCase):
+
+    def test_signature(self):
+        data = png.encode_png(np.zeros((2, 3), dtype=np.uint8))
+        self.assertEqual(data[:8], b'\x89PNG\r\n\x1a\n')
+        self.assertEqual([tag for tag, _ in chunks(data)], [b'IHDR', b'IDAT', b'IEND'])
+
+    def test_header(self):
+        data = png.encode_png(np.zeros((2, 3, 3), dtype=np.uint8))
+        header = dict(chunks(data))[b'IHDR']
+        self.assertEqual(struct.unpack('>IIBBBBB', header), (3, 2, 8, 2, 0, 0, 0))
+
+    def test_roundtrip(self):
+        image = np.arange(24, dtype=np.uint8).reshape(2, 4, 3)
+        raw = zlib.decompress(dict(chunks(png.encode_png(image)))[b'IDAT'])
+        rows = np.frombuffer(raw, dtype=np.uint8).reshape(2, -1)
+        np.testing.assert_array_equal(rows[:, 0], [0, 0])
+        np.testing.assert_array_equal(rows[:, 1:].reshape(image.shape), image)
+
+    def test_bad_shape(self):
+        self.assertRaises(ValueError, png.encode_png, np.zeros((2, 2, 5)))
+
+    def test_data_uri(self):
+        self.assertTrue(png.data_uri(np.zeros((1, 1))).startswith('data:image/png;base64,iVBORw0KGgo'))
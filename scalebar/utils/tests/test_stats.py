@@ -0,0 +1,60 @@
+import json
+import unittest
+
+from .. import stats
+
+
+class TestStats(unittest.TestCase):
+
+    def setUp(self):
+        self.stats = stats.Stats()
+
+    def test_phase(self):
+        for i in range(3):
+            with self.stats.phase('draw'):
+                pass
+        with self.stats.phase('save'):
+            pass
+        self.assertEqual(list(self.stats.phases), ['draw', 'save'])
+        self.assertEqual(self.stats.phases['draw'].calls, 3)
+        self.assertGreaterEqual(self.stats.phases['draw'].time, 0)
+        self.assertIsNone(self.stats.phases['draw'].peak_memory)
+
+    def test_exception(self):
+        with self.assertRaises(ValueError):
+            with self.stats.phase('open'):
+                raise ValueError
+        self.assertEqual(self.stats.phases['open'].calls, 1)
+
+    def test_hooks(self):
+        calls = []
+        self.stats.add_hook(lambda name, elapsed, peak: calls.append(name))
+        with self.stats.phase('outer'):
+            with self.stats.phase('inner'):
+                pass
+        self.assertEqual(calls, ['inner', 'outer'])
+
+    def test_memory(self):
+        s = stats.Stats(memory=True)
+        with s.phase('outer'):
+            with s.phase('inner'):
+                data = bytearray(1 << 20)
+            del data
+            with s.phase('small'):
+                pass
+        self.assertGreaterEqual(s.phases['inner'].peak_memory, 1 << 20)
+        self.assertGreaterEqual(s.phases['outer'].peak_memory, s.phases['inner'].peak_memory)
+        self.assertLess(s.phases['small'].peak_memory, 1 << 20)
+
+    def test_merge_json(self):
+        with self.stats.phase('draw'):
+            pass
+        total = stats.Stats()
+        total.merge(self.stats)
+        total.merge(json.loads(self.stats.to_json()))
+        self.assertEqual(total.phases['draw'].calls, 2)
+        self.assertIn('draw', total.report())
+
+    def test_null_phase(self):
+        with stats.phase(None, 'draw'):
+            pass